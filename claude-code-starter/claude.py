@@ -4,15 +4,34 @@
 
 import subprocess
 import os
+import re
 import sys
 import time
+import json
+import shutil
+import socket
 import logging
 import hashlib
+import queue
+import tempfile
+import threading
+import socketserver
+import http.client
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Any, Callable, Dict
 from dataclasses import dataclass
 from enum import Enum
 
+# The daemon client is its own stdlib-only module so launcher_client.py can
+# start sessions without loading this file; make it importable when this
+# file is loaded by path (tests, the benchmark)
+if str(Path(__file__).resolve().parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+from launcher_client import LauncherClient  # noqa: E402
+
 # Enable BuildKit globally
 os.environ['DOCKER_BUILDKIT'] = '1'
 os.environ['COMPOSE_DOCKER_CLI_BUILD'] = '1'
@@ -25,10 +44,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Host-side launcher state (daemon socket, caches)
+STATE_DIR = Path(os.environ.get("CLAUDE_LAUNCHER_HOME", Path.home() / ".claude-launcher"))
+
 
 class ContainerStatus(Enum):
     """Container status enumeration."""
     RUNNING = "running"
+    PAUSED = "paused"
     STOPPED = "stopped"
     NOT_EXISTS = "not_exists"
     ERROR = "error"
@@ -41,17 +64,593 @@ class ContainerInfo:
     message: str
 
 
+@dataclass
+class ReadinessResult:
+    """Outcome of waiting for the container to become usable."""
+    ready: bool
+    waited: float
+    signal: str
+
+
+@dataclass
+class LaunchState:
+    """Resolved launch state, as cached between launches."""
+    image_name: str
+    image_id: str
+    container_id: str
+    container_state: str
+    checked_at: float
+    # Number of containers in the pool; placement is skipped for one
+    pool_size: int = 1
+
+
+@dataclass
+class PoolMember:
+    """One container of the persistent container pool."""
+    name: str
+    container_id: str
+    state: str
+
+    @property
+    def running(self) -> bool:
+        return self.state == "running"
+
+    @property
+    def status(self) -> ContainerStatus:
+        if self.state == "paused":
+            return ContainerStatus.PAUSED
+        # Restarting containers count as running, like State.Running
+        if self.state in ("running", "restarting"):
+            return ContainerStatus.RUNNING
+        return ContainerStatus.STOPPED
+
+
+@dataclass
+class MemberLoad:
+    """Live load of one pool container, as fractions of its limits."""
+    name: str
+    cpu: float
+    memory: float
+
+    @property
+    def score(self) -> float:
+        return self.cpu + self.memory
+
+
 class DockerContainerError(Exception):
     """Custom exception for Docker container errors."""
     pass
 
 
+class Tracer:
+    """Records timed spans of a launch as Chrome trace events.
+
+    Off by default; ``span`` then hands out one shared no-op context
+    manager, so instrumented code pays a single attribute check.
+    """
+
+    SUMMARY_TOP = 3
+
+    _events: Optional[List[dict]] = None
+    _path: Optional[str] = None
+    _origin = 0.0
+    _off = nullcontext()
+
+    @classmethod
+    def enable(cls, path: str) -> None:
+        """Start recording; the trace is written to ``path`` by ``finish``."""
+        cls._events = []
+        cls._path = path
+        cls._origin = time.perf_counter()
+
+    @classmethod
+    def span(cls, name: str, cat: str = "launcher", **args: Any):
+        """Context manager timing one phase."""
+        if cls._events is None:
+            return cls._off
+        return cls._record(name, cat, args)
+
+    @classmethod
+    @contextmanager
+    def _record(cls, name: str, cat: str, args: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            cls._events.append({
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - cls._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    @classmethod
+    def instant(cls, name: str, **args: Any) -> None:
+        """Mark a point in time, e.g. handing over to the interactive session."""
+        if cls._events is None:
+            return
+        cls._events.append({
+            "name": name,
+            "cat": "launcher",
+            "ph": "i",
+            "s": "p",
+            "ts": (time.perf_counter() - cls._origin) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+
+    @classmethod
+    def summary(cls) -> str:
+        """One line naming the slowest phases (longest single span of each)."""
+        longest: Dict[str, float] = {}
+        for event in cls._events or ():
+            if event["ph"] == "X":
+                longest[event["name"]] = max(longest.get(event["name"], 0.0), event["dur"] / 1e6)
+        slowest = sorted(longest.items(), key=lambda item: item[1], reverse=True)[:cls.SUMMARY_TOP]
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest) or "no spans"
+
+    @classmethod
+    def finish(cls) -> None:
+        """Write the trace file and log the summary; later calls do nothing."""
+        if cls._events is None or cls._path is None:
+            return
+        path, cls._path = cls._path, None
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"traceEvents": cls._events, "displayTimeUnit": "ms"}, f)
+        except OSError as e:
+            logger.warning(f"Could not write trace to {path}: {e}")
+            return
+        logger.info(f"Trace written to {path} - slowest: {cls.summary()}")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float = 5):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        """Connect to the Unix socket instead of a TCP host."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerEngineAPI:
+    """Minimal Docker Engine API client reusing keep-alive connections.
+
+    Each thread gets its own connection so concurrent probes do not
+    interleave requests on the same socket.
+    """
+
+    API_VERSION = "v1.41"
+    DEFAULT_SOCKET = "/var/run/docker.sock"
+
+    # Transport failures that should make the caller fall back to the CLI
+    ERRORS = (OSError, http.client.HTTPException, ValueError)
+
+    def __init__(self, socket_path: str, timeout: float = 5):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> Optional[UnixHTTPConnection]:
+        return getattr(self._local, "conn", None)
+
+    @_conn.setter
+    def _conn(self, conn: Optional[UnixHTTPConnection]) -> None:
+        self._local.conn = conn
+
+    @classmethod
+    def socket_path_from_env(cls) -> Optional[str]:
+        """Resolve the daemon socket from DOCKER_HOST, or None if not a Unix socket."""
+        if not hasattr(socket, "AF_UNIX"):
+            return None
+
+        host = os.environ.get("DOCKER_HOST", "")
+        if host:
+            if not host.startswith("unix://"):
+                # tcp://, ssh://, npipe:// - leave those to the docker CLI
+                return None
+            path = host[len("unix://"):]
+        else:
+            path = cls.DEFAULT_SOCKET
+
+        return path if os.path.exists(path) else None
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        query: Optional[dict] = None,
+        body: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        versioned: bool = True
+    ) -> Tuple[int, Any]:
+        """Send a request and return (status, decoded body)."""
+        url = f"/{self.API_VERSION}{path}" if versioned else path
+        if query:
+            url += "?" + urllib.parse.urlencode(query)
+
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers["Content-Type"] = "application/json"
+
+        with Tracer.span(f"{method} {path}", cat="api"):
+            # A keep-alive connection may have been closed by the daemon in the
+            # meantime, so retry once on a fresh connection.
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = UnixHTTPConnection(self.socket_path, self.timeout)
+                conn = self._conn
+                conn.timeout = timeout or self.timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(conn.timeout)
+                try:
+                    conn.request(method, url, body=payload, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    self.close()
+                    if attempt:
+                        raise
+                    continue
+                except self.ERRORS:
+                    self.close()
+                    raise
+
+                if response.will_close:
+                    self.close()
+
+                content_type = response.getheader("Content-Type", "")
+                if data and content_type.startswith("application/json"):
+                    return response.status, json.loads(data.decode('utf-8'))
+                return response.status, data.decode('utf-8', errors='replace')
+
+            raise ConnectionError("Docker Engine API request failed")
+
+    def open_stream(
+        self,
+        path: str,
+        query: Optional[dict] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[http.client.HTTPResponse, Callable[[], None]]:
+        """Open a streaming GET (events, stats) on a dedicated connection.
+
+        Returns the response and a callable that tears the stream down, also
+        unblocking any thread still reading from it.
+        """
+        url = f"/{self.API_VERSION}{path}"
+        if query:
+            url += "?" + urllib.parse.urlencode(query)
+
+        conn = UnixHTTPConnection(self.socket_path, timeout or self.timeout)
+        try:
+            conn.connect()
+            sock = conn.sock
+            conn.request("GET", url)
+            response = conn.getresponse()
+        except self.ERRORS:
+            conn.close()
+            raise
+
+        def close() -> None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+            conn.close()
+
+        if response.status != 200:
+            close()
+            raise ConnectionError(f"Docker Engine API returned {response.status} for {path}")
+        return response, close
+
+    @staticmethod
+    def quote(name: str) -> str:
+        """Quote an image or container reference for use in a URL path."""
+        return urllib.parse.quote(name, safe=":@")
+
+
+class ContainerReadiness:
+    """Waits for the persistent container to become usable.
+
+    Subscribes to the Docker events stream for the container before it is
+    started, then runs the container's own healthcheck command the moment
+    it is up, instead of polling the status once a second.
+    """
+
+    # Used when the container has no healthcheck (or on the CLI backend)
+    DEFAULT_PROBE = ["test", "-f", "/usr/local/bin/claude-session"]
+    DEADLINE_ENV = "CLAUDE_READY_TIMEOUT"
+    DEFAULT_DEADLINE = 30.0
+
+    def __init__(self, manager: "DockerManager", deadline: Optional[float] = None,
+                 name: Optional[str] = None):
+        self.manager = manager
+        self.name = name or manager.CONTAINER_NAME
+        self.deadline = deadline if deadline is not None else float(
+            os.environ.get(self.DEADLINE_ENV, self.DEFAULT_DEADLINE)
+        )
+        self.started_at = 0.0
+        self._events: "queue.Queue[dict]" = queue.Queue()
+        self._closers = []
+
+    def __enter__(self) -> "ContainerReadiness":
+        self.started_at = time.monotonic()
+        self._subscribe()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for close in self._closers:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def _remaining(self) -> float:
+        return self.deadline - (time.monotonic() - self.started_at)
+
+    def _subscribe(self) -> None:
+        """Start collecting start/health/die events for the container."""
+        filters = json.dumps({
+            "type": ["container"],
+            "container": [self.name],
+            "event": ["start", "health_status", "die"],
+        })
+        since = str(int(time.time()) - 1)
+
+        api = self.manager._engine_api()
+        if api is not None:
+            try:
+                response, close = api.open_stream(
+                    "/events", {"since": since, "filters": filters}, timeout=self.deadline
+                )
+                self._closers.append(close)
+                self._start_reader(response.readline)
+                return
+            except DockerEngineAPI.ERRORS as e:
+                self.manager._api_failed(e)
+
+        try:
+            process = subprocess.Popen(
+                ["docker", "events", "--since", since,
+                 "--filter", f"container={self.name}",
+                 "--filter", "event=start", "--filter", "event=health_status",
+                 "--filter", "event=die",
+                 "--format", "{{json .}}"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.debug(f"Cannot subscribe to Docker events: {e}")
+            return
+        self._closers.append(process.kill)
+        self._start_reader(process.stdout.readline)
+
+    def _start_reader(self, readline) -> None:
+        """Feed decoded events into the queue from a background thread."""
+        def reader() -> None:
+            try:
+                for line in iter(readline, b""):
+                    line = line.strip()
+                    if line:
+                        self._events.put(json.loads(line))
+            except Exception:
+                # Stream torn down (deadline, close, daemon gone) - stop reading
+                pass
+
+        threading.Thread(target=reader, daemon=True).start()
+
+    def _probe_command(self) -> List[str]:
+        """The container's healthcheck command, as exec arguments."""
+        api = self.manager._engine_api()
+        if api is not None:
+            try:
+                status, info = api.request(
+                    "GET", f"/containers/{self.name}/json"
+                )
+                test = ((info.get("Config") or {}).get("Healthcheck") or {}).get("Test") \
+                    if status == 200 else None
+                if test and test[0] == "CMD":
+                    return test[1:]
+                if test and test[0] == "CMD-SHELL":
+                    return ["/bin/sh", "-c", test[1]]
+            except DockerEngineAPI.ERRORS as e:
+                self.manager._api_failed(e)
+        return self.DEFAULT_PROBE
+
+    def wait(self) -> ReadinessResult:
+        """Block until the container is usable or the deadline passes."""
+        # The container may already have started before we subscribed
+        running = self.manager.container_status(self.name) == ContainerStatus.RUNNING
+
+        while not running:
+            remaining = self._remaining()
+            if remaining <= 0:
+                return self._result(False, "timeout")
+            try:
+                event = self._events.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            action = event.get("Action") or event.get("status", "")
+            if action == "die":
+                return self._result(False, "died")
+            if action == "health_status: healthy":
+                return self._result(True, "healthcheck")
+            running = action == "start"
+
+        # Running - now wait on the healthcheck command itself
+        probe = self._probe_command()
+        delay = 0.02
+        while True:
+            if self.manager.exec_probe(probe, timeout=max(self._remaining(), 0.5), name=self.name):
+                return self._result(True, "probe")
+            if self._remaining() <= 0:
+                return self._result(False, "timeout")
+            try:
+                event = self._events.get(timeout=min(delay, self._remaining()))
+                action = event.get("Action") or event.get("status", "")
+                if action == "die":
+                    return self._result(False, "died")
+                if action == "health_status: healthy":
+                    return self._result(True, "healthcheck")
+            except queue.Empty:
+                pass
+            delay = min(delay * 2, 0.1)
+
+    def _result(self, ready: bool, signal: str) -> ReadinessResult:
+        return ReadinessResult(ready, time.monotonic() - self.started_at, signal)
+
+
+class StartLock:
+    """Host-wide lock around creating or starting one container.
+
+    Launchers opened together (IDE tabs, tmux panes) would otherwise all
+    see the container missing and race docker-compose against each other.
+    The first one to take the lock does the work and publishes its outcome
+    next to the lock file; the others block on the lock and reuse that
+    outcome instead of starting the container again. The OS releases the
+    lock if its holder dies, so a crashed launcher never wedges the rest.
+    """
+
+    def __init__(self, container_name: str):
+        self.lock_path = STATE_DIR / f"start-{container_name}.lock"
+        self.outcome_path = STATE_DIR / f"start-{container_name}.json"
+        self.contended = False
+        # Outcomes published after this point answer our request
+        self.requested_at = time.time()
+        self._file = None
+
+    def acquire(self) -> None:
+        """Take the lock, blocking while another launcher holds it."""
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.lock_path, 'a+')
+        try:
+            self._lock()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def release(self) -> None:
+        try:
+            self._unlock()
+        finally:
+            self._file.close()
+
+    def _lock(self) -> None:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            # msvcrt has no blocking lock without a 10s timeout; poll instead
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                    return
+                except OSError:
+                    self.contended = True
+                    time.sleep(0.05)
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.contended = True
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+
+    def _unlock(self) -> None:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def shared_outcome(self) -> Optional[bool]:
+        """Outcome published by a holder that finished since we were created."""
+        try:
+            with open(self.outcome_path, 'r', encoding='utf-8') as f:
+                outcome = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if outcome.get("finished_at", 0) < self.requested_at:
+            return None
+        return bool(outcome.get("ready"))
+
+    def publish(self, ready: bool) -> None:
+        """Record the outcome for launchers blocked on the lock."""
+        try:
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=STATE_DIR, prefix=".start-", delete=False
+            ) as f:
+                json.dump({"ready": ready, "finished_at": time.time(), "pid": os.getpid()}, f)
+            os.replace(f.name, self.outcome_path)
+        except OSError as e:
+            logger.debug(f"Could not publish start outcome: {e}")
+
+
 class DockerManager:
     """Manages Docker container operations."""
 
     CONTAINER_NAME = "claude-persistent"
     DEFAULT_TIMEOUT = 5
 
+    # "auto" uses the Engine API socket when present, "cli" forces the docker binary
+    BACKEND_ENV = "CLAUDE_DOCKER_BACKEND"
+
+    IMAGE_BASE = "claude-code-container"
+    # Preferred order when several tags are present
+    IMAGE_TAGS = ["full", "slim"]
+
+    _api: Optional[DockerEngineAPI] = None
+    _api_resolved = False
+    _api_lock = threading.Lock()
+
+    @classmethod
+    def _engine_api(cls) -> Optional[DockerEngineAPI]:
+        """Return the Engine API client, or None to use the docker CLI."""
+        with cls._api_lock:
+            if not cls._api_resolved:
+                cls._api_resolved = True
+                backend = os.environ.get(cls.BACKEND_ENV, "auto").lower()
+                socket_path = DockerEngineAPI.socket_path_from_env()
+                if backend != "cli" and socket_path:
+                    cls._api = DockerEngineAPI(socket_path, cls.DEFAULT_TIMEOUT)
+                    logger.debug(f"Using Docker Engine API at {socket_path}")
+            return cls._api
+
+    @classmethod
+    def _api_failed(cls, error: Exception) -> None:
+        """Drop the Engine API backend and fall back to the docker CLI."""
+        logger.debug(f"Docker Engine API unavailable, falling back to CLI: {error}")
+        if cls._api is not None:
+            cls._api.close()
+        cls._api = None
+        # Re-resolve on the next call so a long-lived process picks the
+        # socket up again once the daemon is back
+        cls._api_resolved = False
+
     @staticmethod
     def _run_command(
         cmd: List[str],
@@ -62,37 +661,31 @@ class DockerManager:
         env = os.environ.copy()
         env['PYTHONIOENCODING'] = 'utf-8'
 
-        return subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            env=env,
-            timeout=timeout,
-            check=check
-        )
+        # "docker inspect", "docker image inspect", ...
+        name = " ".join(cmd[:3] if cmd[1:2] in (["image"], ["container"]) else cmd[:2])
+        with Tracer.span(name, cat="docker", cmd=" ".join(cmd)):
+            return subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                env=env,
+                timeout=timeout,
+                check=check
+            )
 
     @classmethod
     def check_image_exists(cls, image_name: str) -> bool:
         """Check if the Docker image exists."""
-        try:
-            result = cls._run_command(
-                ["docker", "images", "-q", image_name],
-                check=False
-            )
-            return bool(result.stdout.strip())
-        except Exception:
-            return False
+        return cls.image_id(image_name) is not None
 
     @classmethod
     def get_available_image(cls) -> str:
         """Find available image tag (full or slim)."""
-        base_name = "claude-code-container"
-
         # Check in preferred order
-        for tag in ["full", "slim"]:
-            image_name = f"{base_name}:{tag}"
+        for tag in cls.IMAGE_TAGS:
+            image_name = f"{cls.IMAGE_BASE}:{tag}"
             if cls.check_image_exists(image_name):
                 logger.debug(f"Found image: {image_name}")
                 return image_name
@@ -107,6 +700,14 @@ class DockerManager:
     @classmethod
     def check_docker_running(cls) -> bool:
         """Check if Docker daemon is running."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, _ = api.request("GET", "/_ping", timeout=2, versioned=False)
+                return status == 200
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
         try:
             result = cls._run_command(
                 ["docker", "version"],
@@ -118,61 +719,280 @@ class DockerManager:
             return False
 
     @classmethod
-    def container_status(cls) -> ContainerStatus:
-        """Check container status."""
+    def image_id(cls, image_name: str) -> Optional[str]:
+        """Return the image ID a tag currently points at."""
+        return cls._inspect_id("image", image_name)
+
+    @classmethod
+    def container_id(cls) -> Optional[str]:
+        """Return the ID of the persistent container."""
+        return cls.inspect_container()[1]
+
+    @classmethod
+    def _inspect_id(cls, kind: str, name: str) -> Optional[str]:
+        """Resolve an image or container reference to its full ID."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, info = api.request("GET", f"/{kind}s/{api.quote(name)}/json")
+                return info.get("Id") if status == 200 else None
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
+        try:
+            result = cls._run_command(
+                ["docker", kind, "inspect", "-f", "{{.Id}}", name],
+                check=False
+            )
+            if result.returncode != 0:
+                return None
+            return result.stdout.strip() or None
+        except Exception:
+            return None
+
+    @classmethod
+    def container_image_id(cls, name: str) -> Optional[str]:
+        """Return the ID of the image a container was created from."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, info = api.request("GET", f"/containers/{api.quote(name)}/json")
+                return info.get("Image") if status == 200 else None
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
+        try:
+            result = cls._run_command(["docker", "inspect", "-f", "{{.Image}}", name], check=False)
+            if result.returncode != 0:
+                return None
+            return result.stdout.strip() or None
+        except Exception:
+            return None
+
+    @classmethod
+    def inspect_image(cls, image_name: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Return an image's ID and labels in one lookup; None if it does not exist."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, info = api.request("GET", f"/images/{api.quote(image_name)}/json")
+                if status != 200:
+                    return None
+                return info.get("Id"), (info.get("Config") or {}).get("Labels") or {}
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
+        try:
+            result = cls._run_command(
+                ["docker", "image", "inspect", "-f", "{{.Id}} {{json .Config.Labels}}", image_name],
+                check=False
+            )
+            if result.returncode != 0:
+                return None
+            image_id, _, labels = result.stdout.strip().partition(" ")
+            try:
+                return image_id, json.loads(labels) or {}
+            except ValueError:
+                return image_id, {}
+        except Exception:
+            return None
+
+    @classmethod
+    def container_status(cls, name: Optional[str] = None) -> ContainerStatus:
+        """Check container status (default: the persistent container)."""
+        return cls.inspect_container(name)[0]
+
+    @classmethod
+    def inspect_container(cls, name: Optional[str] = None) -> Tuple[ContainerStatus, Optional[str]]:
+        """Return a container's status and ID in one lookup (default: the persistent container)."""
+        name = name or cls.CONTAINER_NAME
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, info = api.request("GET", f"/containers/{api.quote(name)}/json")
+                if status == 404:
+                    return ContainerStatus.NOT_EXISTS, None
+                if status != 200:
+                    return ContainerStatus.ERROR, None
+                state = info.get("State", {})
+                return cls._status(state.get("Running", False), state.get("Paused", False)), info.get("Id")
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
         try:
             result = cls._run_command(
-                ["docker", "inspect", "-f", "{{.State.Running}}", cls.CONTAINER_NAME],
+                ["docker", "inspect", "-f", "{{.Id}} {{.State.Running}} {{.State.Paused}}", name],
                 check=False
             )
             if result.returncode != 0:
-                return ContainerStatus.NOT_EXISTS
+                return ContainerStatus.NOT_EXISTS, None
 
-            is_running = result.stdout.strip().lower() == "true"
-            return ContainerStatus.RUNNING if is_running else ContainerStatus.STOPPED
+            container_id, running, paused = (result.stdout.split() + ["", "", ""])[:3]
+            return cls._status(running.lower() == "true", paused.lower() == "true"), container_id or None
         except Exception:
-            return ContainerStatus.ERROR
+            return ContainerStatus.ERROR, None
+
+    @staticmethod
+    def _status(running: bool, paused: bool) -> ContainerStatus:
+        # A paused container still reports Running
+        if paused:
+            return ContainerStatus.PAUSED
+        return ContainerStatus.RUNNING if running else ContainerStatus.STOPPED
 
     @classmethod
-    def start_container(cls, debug: bool = False) -> bool:
-        """Start the persistent container."""
-        status = cls.container_status()
+    def start_container(
+        cls,
+        debug: bool = False,
+        deadline: Optional[float] = None,
+        status: Optional[ContainerStatus] = None,
+        name: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """Start the persistent container and wait until it is usable.
+
+        ``status`` may carry a container status probed moments ago to skip
+        checking it again. ``name`` and ``env`` select another container and
+        the environment compose creates it with (an upgrade's new
+        generation). Concurrent launchers are serialized by ``StartLock``:
+        one creates or starts the container and the others return its
+        readiness result.
+        """
+        name = name or cls.CONTAINER_NAME
+        lock = StartLock(name)
+        if status is None or status == ContainerStatus.ERROR:
+            status = cls.container_status(name)
 
         if status == ContainerStatus.RUNNING:
             logger.info("Container already running")
             return True
 
-        if status == ContainerStatus.NOT_EXISTS:
-            logger.info("Creating persistent container...")
-            logger.info("First container creation may take 2-3 minutes...")
-            setup_dir = Path(__file__).parent
-            result = subprocess.run(
-                ["docker-compose", "-f", str(setup_dir / "docker-compose.yml"), "up", "-d"],
-                check=False,
-                capture_output=False
-            )
-            if result.returncode != 0:
-                logger.error("Failed to create container")
+        if status == ContainerStatus.PAUSED:
+            # Frozen by IdleManager - everything inside is still up
+            return IdleManager.resume(name)
+
+        with Tracer.span("start lock wait"):
+            lock.acquire()
+        try:
+            shared = lock.shared_outcome()
+            if shared is not None:
+                logger.info("Container was started by another launcher")
+                return shared
+            if lock.contended:
+                # The holder gave up before finishing; look again ourselves
+                status = cls.container_status(name)
+                if status == ContainerStatus.RUNNING:
+                    logger.info("Container already running")
+                    return True
+
+            ready = cls._start_and_wait(status, deadline, name, env)
+            lock.publish(ready)
+            return ready
+        finally:
+            lock.release()
+
+    @classmethod
+    def _start_and_wait(cls, status: ContainerStatus, deadline: Optional[float],
+                        name: str, env: Optional[Dict[str, str]]) -> bool:
+        """Create or start the container; the caller holds the start lock."""
+        # Subscribe before starting so the start event cannot be missed
+        with ContainerReadiness(cls, deadline, name) as readiness:
+            if status == ContainerStatus.NOT_EXISTS:
+                logger.info("Creating persistent container...")
+                logger.info("First container creation may take 2-3 minutes...")
+                with Tracer.span("docker-compose up", cat="docker"):
+                    created = ContainerPool._compose(1, "up", "-d", base=name, env=env)
+                if not created:
+                    logger.error("Failed to create container")
+                    return False
+                # Creation time should not eat into the readiness deadline
+                readiness.started_at = time.monotonic()
+
+            elif status == ContainerStatus.STOPPED:
+                logger.info("Starting existing container...")
+                if not cls._start_existing(name):
+                    logger.error("Failed to start container")
+                    return False
+
+            with Tracer.span("readiness wait"):
+                result = readiness.wait()
+
+        if result.ready:
+            logger.info(f"Container is ready (waited {result.waited:.2f}s, {result.signal})")
+        else:
+            logger.error(f"Container not ready after {result.waited:.1f}s ({result.signal})")
+        return result.ready
+
+    @classmethod
+    def exec_probe(cls, cmd: List[str], timeout: float = DEFAULT_TIMEOUT, name: Optional[str] = None) -> bool:
+        """Run a short command in the container and report whether it succeeded."""
+        name = name or cls.CONTAINER_NAME
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, created = api.request(
+                    "POST", f"/containers/{name}/exec",
+                    body={"Cmd": cmd, "AttachStdout": False, "AttachStderr": False}
+                )
+                if status != 201:
+                    return False
+                exec_id = created["Id"]
+                status, _ = api.request("POST", f"/exec/{exec_id}/start", body={"Detach": True})
+                if status != 200:
+                    return False
+
+                give_up = time.monotonic() + timeout
+                while time.monotonic() < give_up:
+                    _, info = api.request("GET", f"/exec/{exec_id}/json")
+                    if not info.get("Running"):
+                        return info.get("ExitCode") == 0
+                    time.sleep(0.01)
                 return False
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
 
-        elif status == ContainerStatus.STOPPED:
-            logger.info("Starting existing container...")
+        try:
             result = cls._run_command(
-                ["docker", "start", cls.CONTAINER_NAME],
+                ["docker", "exec", name] + cmd,
+                timeout=timeout,
                 check=False
             )
-            if result.returncode != 0:
-                logger.error("Failed to start container")
-                return False
+            return result.returncode == 0
+        except Exception:
+            return False
 
-        # Wait for container to be ready
-        for _ in range(10):
-            if cls.container_status() == ContainerStatus.RUNNING:
-                logger.info("Container is ready")
-                return True
-            time.sleep(1)
+    @classmethod
+    def _start_existing(cls, name: Optional[str] = None) -> bool:
+        """Start a stopped container."""
+        name = name or cls.CONTAINER_NAME
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                # 204 = started, 304 = already running
+                status, _ = api.request("POST", f"/containers/{name}/start")
+                return status in (204, 304)
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
+        result = cls._run_command(
+            ["docker", "start", name],
+            check=False
+        )
+        return result.returncode == 0
 
-        return False
+    @classmethod
+    def set_paused(cls, name: str, paused: bool) -> bool:
+        """Freeze or thaw a container's processes (cgroup freezer)."""
+        action = "pause" if paused else "unpause"
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, _ = api.request("POST", f"/containers/{api.quote(name)}/{action}")
+                return status == 204
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
+        result = cls._run_command(["docker", action, name], check=False)
+        return result.returncode == 0
 
     @classmethod
     def _convert_path_for_docker(cls, path: str) -> str:
@@ -189,6 +1009,928 @@ class DockerManager:
         return path
 
 
+class ContainerPool:
+    """Identical persistent containers sharing the same tool volumes.
+
+    Member 1 is the regular persistent container; members 2..N are named
+    ``<name>-2``, ``<name>-3``... and created from the same compose file under
+    their own compose project. New sessions go to the running member with
+    the lowest combined CPU and memory load. Members IdleManager paused are
+    woken up once every running one is busy. Launches within LOADS_TTL of
+    each other share one load sample (LOADS_PATH), each placement adding
+    SESSION_LOAD to its member, so placing costs no stats round trip on
+    the fast launch paths.
+    """
+
+    PROJECT_PREFIX = "claude-pool"
+    # Per-container CPU limit, as used by docker-compose.yml
+    CPU_LIMIT_ENV = "CLAUDE_CPU_LIMIT"
+    DEFAULT_CPU_LIMIT = 4.0
+    # Gap between the two CPU usage samples
+    SAMPLE_INTERVAL = 0.1
+    # Load of the least loaded running member from which a paused member
+    # is resumed for the session instead
+    RESUME_LOAD = 0.5
+    # Load sample shared by placements in quick succession
+    LOADS_PATH = STATE_DIR / "pool-loads.json"
+    LOADS_TTL = 5.0
+    # Load a freshly placed session is assumed to add until the next sample
+    SESSION_LOAD = 0.1
+
+    @classmethod
+    def member_name(cls, index: int, base: Optional[str] = None) -> str:
+        base = base or DockerManager.CONTAINER_NAME
+        return base if index == 1 else f"{base}-{index}"
+
+    @classmethod
+    def member_index(cls, name: str, base: Optional[str] = None) -> Optional[int]:
+        """Pool index of a container name, or None if it is not a member."""
+        base = base or DockerManager.CONTAINER_NAME
+        if name == base:
+            return 1
+        suffix = name[len(base) + 1:] if name.startswith(base + "-") else ""
+        return int(suffix) if suffix.isdigit() and int(suffix) >= 2 else None
+
+    @classmethod
+    def members(cls, base: Optional[str] = None) -> Optional[List[PoolMember]]:
+        """Existing members in index order, or None if Docker could not be asked."""
+        base = base or DockerManager.CONTAINER_NAME
+        found: List[PoolMember] = []
+        api = DockerManager._engine_api()
+        if api is not None:
+            try:
+                status, containers = api.request("GET", "/containers/json", query={
+                    "all": "1",
+                    "filters": json.dumps({"name": [base]}),
+                })
+                if status != 200:
+                    return None
+                for container in containers:
+                    name = (container.get("Names") or ["/"])[0].lstrip("/")
+                    found.append(PoolMember(name, container.get("Id", ""), container.get("State", "")))
+                return cls._sorted(found, base)
+            except DockerEngineAPI.ERRORS as e:
+                DockerManager._api_failed(e)
+
+        try:
+            result = DockerManager._run_command(
+                ["docker", "ps", "-a", "--no-trunc", "--filter", f"name={base}",
+                 "--format", "{{.ID}}\t{{.Names}}\t{{.State}}"],
+                check=False
+            )
+        except Exception:
+            return None
+        if result.returncode != 0:
+            return None
+        for line in result.stdout.splitlines():
+            fields = line.split("\t")
+            if len(fields) == 3:
+                found.append(PoolMember(fields[1], fields[0], fields[2]))
+        return cls._sorted(found, base)
+
+    @classmethod
+    def _sorted(cls, found: List[PoolMember], base: str) -> List[PoolMember]:
+        # The name filter matches substrings - keep exact members only
+        members = [m for m in found if cls.member_index(m.name, base) is not None]
+        return sorted(members, key=lambda m: cls.member_index(m.name, base))
+
+    @classmethod
+    def place(cls, default: str) -> str:
+        """Pick the container for a new session."""
+        members = cls.members() or []
+        running = [m.name for m in members if m.running]
+        paused = [m.name for m in members if m.status == ContainerStatus.PAUSED]
+        for member in members:
+            if not member.running and member.name not in paused:
+                logger.debug(f"Pool member {member.name} is {member.state} - skipped")
+        if not running:
+            return cls._resume(paused) or default
+        if len(running) < 2 and not paused:
+            return running[0]
+
+        loads = cls.recent_loads(running)
+        for load in loads:
+            logger.debug(f"Pool member {load.name}: cpu {load.cpu:.0%} mem {load.memory:.0%} "
+                         f"-> load {load.score:.2f}")
+        if not loads:
+            logger.debug("No load stats available - using the first running member")
+            return running[0]
+
+        chosen = min(loads, key=lambda load: load.score)
+        if paused and chosen.score >= cls.RESUME_LOAD:
+            resumed = cls._resume(paused)
+            if resumed:
+                return resumed
+        logger.debug(f"Placing session on {chosen.name}")
+        # Keep the next placements from the same sample off this member
+        chosen.cpu += cls.SESSION_LOAD
+        cls._save_loads(running, loads)
+        return chosen.name
+
+    @classmethod
+    def recent_loads(cls, names: List[str]) -> List[MemberLoad]:
+        """Member loads sampled within LOADS_TTL, else a fresh sample."""
+        try:
+            with open(cls.LOADS_PATH, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            age = time.time() - cached["sampled_at"]
+            if 0 <= age <= cls.LOADS_TTL and sorted(cached["names"]) == sorted(names):
+                return [MemberLoad(**load) for load in cached["loads"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        loads = cls.sample_loads(names)
+        cls._save_loads(names, loads, sampled_at=time.time())
+        return loads
+
+    @classmethod
+    def _save_loads(cls, names: List[str], loads: List[MemberLoad], sampled_at: Optional[float] = None) -> None:
+        """Write the shared sample atomically; keeps the old timestamp unless given one."""
+        if sampled_at is None:
+            try:
+                with open(cls.LOADS_PATH, 'r', encoding='utf-8') as f:
+                    sampled_at = json.load(f)["sampled_at"]
+            except (OSError, ValueError, KeyError, TypeError):
+                return
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=STATE_DIR, prefix=".pool-loads-", delete=False
+            ) as f:
+                json.dump({
+                    "sampled_at": sampled_at,
+                    "names": sorted(names),
+                    "loads": [load.__dict__ for load in loads],
+                }, f)
+            os.replace(f.name, cls.LOADS_PATH)
+        except OSError as e:
+            logger.debug(f"Could not cache the pool loads: {e}")
+
+    @classmethod
+    def _resume(cls, paused: List[str]) -> Optional[str]:
+        """Unpause the first paused member that can be; None if none could."""
+        for name in paused:
+            if IdleManager.resume(name):
+                logger.debug(f"Placing session on resumed {name}")
+                return name
+        return None
+
+    @classmethod
+    def sample_loads(cls, names: List[str]) -> List[MemberLoad]:
+        """CPU (over SAMPLE_INTERVAL) and memory use of running members."""
+        try:
+            cpu_limit = float(os.environ.get(cls.CPU_LIMIT_ENV, cls.DEFAULT_CPU_LIMIT))
+        except ValueError:
+            cpu_limit = cls.DEFAULT_CPU_LIMIT
+
+        api = DockerManager._engine_api()
+        if api is not None:
+            try:
+                first, started = cls._api_stats(api, names), time.monotonic()
+                time.sleep(cls.SAMPLE_INTERVAL)
+                second, elapsed = cls._api_stats(api, names), time.monotonic() - started
+                loads = []
+                for name in names:
+                    if name not in first or name not in second:
+                        continue
+                    used = second[name]["cpu"] - first[name]["cpu"]
+                    cores = used / 1e9 / elapsed
+                    loads.append(MemberLoad(name, cores / cpu_limit, second[name]["memory"]))
+                return loads
+            except DockerEngineAPI.ERRORS as e:
+                DockerManager._api_failed(e)
+
+        # docker stats samples CPU itself (and takes a second or two doing so)
+        try:
+            result = DockerManager._run_command(
+                ["docker", "stats", "--no-stream", "--format",
+                 "{{.Name}}\t{{.CPUPerc}}\t{{.MemPerc}}"] + names,
+                timeout=10,
+                check=False
+            )
+        except Exception:
+            return []
+        loads = []
+        for line in result.stdout.splitlines():
+            try:
+                name, cpu, memory = line.split("\t")
+                loads.append(MemberLoad(
+                    name, float(cpu.rstrip("%")) / 100 / cpu_limit, float(memory.rstrip("%")) / 100
+                ))
+            except ValueError:
+                continue
+        return loads
+
+    @classmethod
+    def _api_stats(cls, api: DockerEngineAPI, names: List[str]) -> Dict[str, Dict[str, float]]:
+        """Cumulative CPU time (ns) and memory fraction per member."""
+        stats = {}
+        for name in names:
+            status, data = api.request(
+                "GET", f"/containers/{name}/stats", query={"stream": "false", "one-shot": "true"}
+            )
+            if status != 200:
+                continue
+            memory = data.get("memory_stats") or {}
+            details = memory.get("stats") or {}
+            # Same as docker stats: page cache that can be dropped is not load
+            usage = memory.get("usage", 0) - details.get("inactive_file", details.get("total_inactive_file", 0))
+            limit = memory.get("limit") or 0
+            stats[name] = {
+                "cpu": data.get("cpu_stats", {}).get("cpu_usage", {}).get("total_usage", 0),
+                "memory": max(usage, 0) / limit if limit else 0.0,
+            }
+        return stats
+
+    @classmethod
+    def resize(cls, size: int, base: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> None:
+        """Grow or shrink the pool to ``size`` containers."""
+        if size < 1:
+            raise DockerContainerError("The container pool needs at least one container")
+
+        base = base or DockerManager.CONTAINER_NAME
+        members = cls.members(base)
+        if members is None:
+            raise DockerContainerError("Could not list the pool containers - is Docker running?")
+        existing = {cls.member_index(m.name, base) for m in members}
+        for index in range(1, size + 1):
+            if index not in existing:
+                logger.info(f"Creating pool member {cls.member_name(index, base)}...")
+                if not cls._compose(index, "up", "-d", base=base, env=env):
+                    raise DockerContainerError(f"Failed to create {cls.member_name(index, base)}")
+        for index in sorted(existing, reverse=True):
+            if index > size:
+                logger.info(f"Removing pool member {cls.member_name(index, base)}...")
+                if not cls._compose(index, "down", base=base, env=env):
+                    raise DockerContainerError(f"Failed to remove {cls.member_name(index, base)}")
+        logger.info(f"Container pool size: {size}")
+
+    @classmethod
+    def _compose(cls, index: int, *args: str, base: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None) -> bool:
+        """Run compose for one member of ``base``'s pool, with ``env`` (default: ours)."""
+        base = base or DockerManager.CONTAINER_NAME
+        cmd = ComposeSpec.compose_command() + ["-f", str(ComposeSpec.COMPOSE_FILE)]
+        # Each container is its own compose project; the blue base container
+        # keeps the default project it always had
+        prefix = BlueGreen.project_prefix(base)
+        project = None
+        if index > 1:
+            project = f"{prefix}-{index}"
+        elif prefix != cls.PROJECT_PREFIX:
+            project = prefix
+        if project:
+            cmd += ["-p", project]
+        env = dict(os.environ if env is None else env, CLAUDE_CONTAINER_NAME=cls.member_name(index, base))
+
+        if list(args) == ["up", "-d"]:
+            created = ComposeSpec.up(env, project or ComposeSpec.default_project())
+            if created is not None:
+                return created
+        return subprocess.run(cmd + list(args), env=env, check=False).returncode == 0
+
+    @classmethod
+    def show(cls) -> None:
+        """Log every member with its state and current load."""
+        members = cls.members()
+        if not members:
+            logger.info("No pool containers exist yet")
+            return
+        loads = {load.name: load for load in cls.sample_loads([m.name for m in members if m.running])}
+        for member in members:
+            load = loads.get(member.name)
+            if load is not None:
+                logger.info(f"{member.name}: running, cpu {load.cpu:.0%}, mem {load.memory:.0%}")
+            else:
+                logger.info(f"{member.name}: {member.state}")
+
+
+class ComposeSpec:
+    """Creates the service container without running docker-compose.
+
+    ``docker compose config`` turns docker-compose.yml into JSON once,
+    uninterpolated, and the result is cached until the file changes. Each
+    creation substitutes ${VAR} from the environment, builds the Engine API
+    create request (mounts, capabilities, limits, healthcheck, logging) and
+    creates and starts the container directly. Whenever this path cannot be
+    used - CLI backend, no compose to read the file with, an unsupported
+    key - ``up`` returns None and the caller runs compose as before.
+    """
+
+    COMPOSE_FILE = Path(__file__).parent / "docker-compose.yml"
+    CACHE_PATH = STATE_DIR / "create-spec.json"
+    SERVICE = "claude-code"
+    VAR_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?:(:?-)([^}]*))?\}")
+    # Service keys the create request covers; anything else goes to compose
+    SUPPORTED = {
+        "build", "image", "container_name", "hostname", "stdin_open", "tty", "user",
+        "cap_add", "security_opt", "volumes", "working_dir", "restart", "command",
+        "environment", "deploy", "healthcheck", "logging", "networks",
+    }
+
+    @staticmethod
+    def compose_command() -> List[str]:
+        """The standalone docker-compose if installed, else the docker compose plugin."""
+        return ["docker-compose"] if shutil.which("docker-compose") else ["docker", "compose"]
+
+    @classmethod
+    def default_project(cls) -> str:
+        """Compose's project name for the directory of the compose file."""
+        return re.sub(r"[^a-z0-9_-]", "", cls.COMPOSE_FILE.parent.name.lower())
+
+    @classmethod
+    def load(cls) -> Optional[dict]:
+        """The normalized compose model, cached per compose file content."""
+        try:
+            digest = hashlib.sha256(cls.COMPOSE_FILE.read_bytes()).hexdigest()
+        except OSError:
+            return None
+        try:
+            with open(cls.CACHE_PATH, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("compose_sha256") == digest:
+                return cached["model"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+        with Tracer.span("compose config", cat="docker"):
+            try:
+                result = subprocess.run(
+                    cls.compose_command() + ["-f", str(cls.COMPOSE_FILE), "config",
+                                             "--format", "json", "--no-interpolate"],
+                    capture_output=True, text=True, encoding='utf-8', errors='replace',
+                    timeout=30, check=False
+                )
+                model = json.loads(result.stdout) if result.returncode == 0 else None
+            except (OSError, subprocess.TimeoutExpired, ValueError):
+                model = None
+        if not isinstance(model, dict):
+            logger.debug("Could not read docker-compose.yml through compose config")
+            return None
+
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=STATE_DIR, prefix=".create-spec-", delete=False
+            ) as f:
+                json.dump({"compose_sha256": digest, "model": model}, f)
+            os.replace(f.name, cls.CACHE_PATH)
+        except OSError as e:
+            logger.debug(f"Could not cache the create spec: {e}")
+        return model
+
+    @classmethod
+    def interpolate(cls, value: Any, env: Dict[str, str]) -> Any:
+        """Substitute ${VAR}, ${VAR:-default} and ${VAR-default} like compose."""
+        if isinstance(value, dict):
+            return {key: cls.interpolate(item, env) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls.interpolate(item, env) for item in value]
+        if not isinstance(value, str):
+            return value
+
+        def substitute(match: "re.Match") -> str:
+            name, operator, default = match.groups()
+            current = env.get(name)
+            if operator == ":-" and not current:
+                return default
+            if operator == "-" and current is None:
+                return default
+            return current or ""
+        return cls.VAR_RE.sub(substitute, value).replace("$$", "$")
+
+    @staticmethod
+    def duration_ns(value: Any) -> int:
+        """Compose duration ("1m30s", "40s", "500ms") in nanoseconds."""
+        if isinstance(value, (int, float)):
+            return int(value)
+        units = {"h": 3600e9, "m": 60e9, "s": 1e9, "ms": 1e6, "us": 1e3, "ns": 1}
+        parts = re.findall(r"(\d+(?:\.\d+)?)(h|ms|m|s|us|ns)", str(value))
+        if not parts:
+            raise ValueError(f"Invalid duration: {value}")
+        return int(sum(float(number) * units[unit] for number, unit in parts))
+
+    @staticmethod
+    def size_bytes(value: Any) -> int:
+        """Compose size ("8G", "512m", "1gb") in bytes."""
+        if isinstance(value, (int, float)):
+            return int(value)
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)b?\s*", str(value).lower())
+        if not match:
+            raise ValueError(f"Invalid size: {value}")
+        return int(float(match.group(1)) * 1024 ** " kmgt".index(match.group(2) or " "))
+
+    @classmethod
+    def create_request(cls, model: dict, env: Dict[str, str], project: str) -> Tuple[str, dict]:
+        """Container name and Engine API create body for the service."""
+        service = cls.interpolate(model["services"][cls.SERVICE], env)
+        unsupported = set(service) - cls.SUPPORTED
+        if unsupported:
+            raise ValueError(f"Unsupported compose keys: {', '.join(sorted(unsupported))}")
+        volumes = cls.interpolate(model.get("volumes") or {}, env)
+
+        mounts = []
+        for volume in service.get("volumes") or []:
+            mount = {"Target": volume["target"], "ReadOnly": bool(volume.get("read_only"))}
+            if volume["type"] == "bind":
+                mount.update(Type="bind", Source=volume["source"])
+            elif volume["type"] == "volume":
+                declared = volumes.get(volume["source"]) or {}
+                mount.update(Type="volume", Source=declared.get("name") or f"{project}_{volume['source']}")
+            else:
+                raise ValueError(f"Unsupported volume type: {volume['type']}")
+            mounts.append(mount)
+
+        environment = service.get("environment") or {}
+        if isinstance(environment, list):
+            environment = dict(item.split("=", 1) if "=" in item else (item, None) for item in environment)
+        env_list = []
+        for key, value in environment.items():
+            # A bare key takes the value from the launching environment
+            value = env.get(key) if value is None else value
+            if value is not None:
+                env_list.append(f"{key}={value}")
+
+        host_config: Dict[str, Any] = {
+            "Mounts": mounts,
+            "CapAdd": service.get("cap_add") or [],
+            "SecurityOpt": service.get("security_opt") or [],
+        }
+        if service.get("restart"):
+            host_config["RestartPolicy"] = {"Name": service["restart"]}
+        resources = (service.get("deploy") or {}).get("resources") or {}
+        limits, reservations = resources.get("limits") or {}, resources.get("reservations") or {}
+        if limits.get("cpus"):
+            host_config["NanoCpus"] = int(float(limits["cpus"]) * 1e9)
+        if limits.get("memory"):
+            host_config["Memory"] = cls.size_bytes(limits["memory"])
+        if reservations.get("memory"):
+            host_config["MemoryReservation"] = cls.size_bytes(reservations["memory"])
+        logging_config = service.get("logging") or {}
+        if logging_config.get("driver"):
+            host_config["LogConfig"] = {
+                "Type": logging_config["driver"],
+                "Config": {key: str(value) for key, value in (logging_config.get("options") or {}).items()},
+            }
+
+        name = service.get("container_name") or f"{project}-{cls.SERVICE}-1"
+        body: Dict[str, Any] = {
+            "Image": service["image"],
+            "Hostname": service.get("hostname", ""),
+            "User": service.get("user", ""),
+            "WorkingDir": service.get("working_dir", ""),
+            "Env": env_list,
+            "Tty": bool(service.get("tty")),
+            "OpenStdin": bool(service.get("stdin_open")),
+            # compose down and ps find the container by these labels
+            "Labels": {
+                "com.docker.compose.project": project,
+                "com.docker.compose.service": cls.SERVICE,
+                "com.docker.compose.container-number": "1",
+                "com.docker.compose.oneoff": "False",
+                "com.docker.compose.project.config_files": str(cls.COMPOSE_FILE),
+                "com.docker.compose.project.working_dir": str(cls.COMPOSE_FILE.parent),
+            },
+            "HostConfig": host_config,
+        }
+        if service.get("command"):
+            command = service["command"]
+            body["Cmd"] = command if isinstance(command, list) else ["/bin/sh", "-c", command]
+        healthcheck = service.get("healthcheck")
+        if healthcheck and not healthcheck.get("disable"):
+            body["Healthcheck"] = {
+                "Test": healthcheck.get("test"),
+                "Interval": cls.duration_ns(healthcheck.get("interval", "30s")),
+                "Timeout": cls.duration_ns(healthcheck.get("timeout", "30s")),
+                "Retries": int(healthcheck.get("retries", 3)),
+                "StartPeriod": cls.duration_ns(healthcheck.get("start_period", "0s")),
+            }
+        return name, body
+
+    @classmethod
+    def up(cls, env: Dict[str, str], project: str) -> Optional[bool]:
+        """Create and start the container natively; None to fall back to compose."""
+        api = DockerManager._engine_api()
+        if api is None:
+            return None
+        model = cls.load()
+        if model is None or cls.SERVICE not in (model.get("services") or {}):
+            return None
+        try:
+            name, body = cls.create_request(model, env, project)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug(f"Native container creation not possible: {e}")
+            return None
+
+        try:
+            with Tracer.span("container create", cat="docker"):
+                status, created = api.request("POST", "/containers/create", query={"name": name}, body=body)
+            if status == 409:
+                # Created by someone else in the meantime - just make sure it runs
+                logger.debug(f"{name} already exists")
+            elif status != 201:
+                message = created.get("message") if isinstance(created, dict) else created
+                logger.error(f"Could not create {name}: {message}")
+                return False
+            status, _ = api.request("POST", f"/containers/{api.quote(name)}/start")
+            return status in (204, 304)
+        except DockerEngineAPI.ERRORS as e:
+            DockerManager._api_failed(e)
+            return None
+
+
+class BlueGreen:
+    """Zero-downtime switch of the persistent containers to a rebuilt image.
+
+    Containers come in two generations, blue (``claude-persistent``) and
+    green (``claude-persistent-green``), each with its own pool members and
+    compose projects but the same volumes. An upgrade starts the inactive
+    generation from the current image, waits until it is ready and then
+    points new launches at it through the ACTIVE_PATH file. A detached
+    ``--retire`` process removes each old container once its last session
+    has exited.
+    """
+
+    BLUE = "claude-persistent"
+    GREEN = "claude-persistent-green"
+    ACTIVE_PATH = STATE_DIR / "active-container"
+    RETIRE_POLL = 10.0
+    # A session claimed from the pool, or started by the namespace launcher
+    SESSION_MARKERS = ("session-pool claim", "claude-namespace-launcher")
+
+    @classmethod
+    def active(cls) -> str:
+        """Base name of the generation new sessions go to."""
+        try:
+            name = cls.ACTIVE_PATH.read_text(encoding='utf-8').strip()
+        except OSError:
+            return cls.BLUE
+        return name if name in (cls.BLUE, cls.GREEN) else cls.BLUE
+
+    @classmethod
+    def activate(cls, name: str) -> None:
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            'w', encoding='utf-8', dir=STATE_DIR, prefix=".active-container-", delete=False
+        ) as f:
+            f.write(name + "\n")
+        os.replace(f.name, cls.ACTIVE_PATH)
+        # Cached state would still send launches to the old container
+        LaunchStateCache.invalidate()
+
+    @classmethod
+    def project_prefix(cls, name: str) -> str:
+        return "claude-green" if name == cls.GREEN else ContainerPool.PROJECT_PREFIX
+
+    @classmethod
+    def sessions(cls, container: str) -> Optional[int]:
+        """Number of running sessions in a container; None if unknown."""
+        # docker top needs the PID column
+        processes: List[str] = []
+        api = DockerManager._engine_api()
+        try:
+            if api is not None:
+                status, top = api.request("GET", f"/containers/{container}/top", query={"ps_args": "-eo pid,args"})
+                if status != 200:
+                    return None
+                processes = [" ".join(row) for row in top.get("Processes") or []]
+            else:
+                result = DockerManager._run_command(["docker", "top", container, "-eo", "pid,args"], check=False)
+                if result.returncode != 0:
+                    return None
+                processes = result.stdout.splitlines()[1:]
+        except DockerEngineAPI.ERRORS as e:
+            DockerManager._api_failed(e)
+            return None
+        return sum(1 for line in processes if any(marker in line for marker in cls.SESSION_MARKERS))
+
+    @classmethod
+    def upgrade(cls) -> None:
+        """Start the other generation from the current image and switch to it."""
+        old = cls.active()
+        new = cls.GREEN if old == cls.BLUE else cls.BLUE
+        image_name = DockerManager.get_available_image()
+        image_id = DockerManager.image_id(image_name)
+
+        old_members = ContainerPool.members(old)
+        if old_members is None:
+            raise DockerContainerError("Could not list the containers - is Docker running?")
+        base = next((m for m in old_members if m.name == old), None)
+        if base is not None and base.running and DockerManager.container_image_id(old) == image_id:
+            logger.info(f"{old} already runs the current {image_name} image")
+            return
+
+        leftovers = ContainerPool.members(new) or []
+        if any(cls.sessions(m.name) for m in leftovers if m.running):
+            raise DockerContainerError(
+                f"{new} from an earlier upgrade still has sessions - try again once they have exited"
+            )
+        for member in reversed(leftovers):
+            ContainerPool._compose(ContainerPool.member_index(member.name, new), "down", base=new)
+
+        logger.info(f"Starting {new} from {image_name}...")
+        # docker-compose.yml picks the image by DOCKER_TARGET
+        env = dict(os.environ, DOCKER_TARGET=image_name.rsplit(":", 1)[-1])
+        if not DockerManager.start_container(name=new, env=env):
+            raise DockerContainerError(f"{new} did not become ready - still using {old}")
+        if len(old_members) > 1:
+            ContainerPool.resize(len(old_members), base=new, env=env)
+
+        cls.activate(new)
+        logger.info(f"New sessions now start in {new}")
+        if not old_members:
+            return
+
+        log_path = STATE_DIR / "retire.log"
+        logger.info(f"{old} is retired once its last session exits (log: {log_path})")
+        kwargs: Dict[str, Any] = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        with open(log_path, 'a', encoding='utf-8') as log:
+            subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), "--retire", old],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **kwargs
+            )
+
+    @classmethod
+    def retire(cls, old: str) -> None:
+        """Remove the old generation's containers as they run out of sessions."""
+        if old not in (cls.BLUE, cls.GREEN):
+            raise DockerContainerError(f"Unknown container generation: {old}")
+        # A launch that read the old pointer a moment before the switch may
+        # still be on its way - a container must be idle on two polls in a row
+        idle: set = set()
+        while cls.active() != old:
+            members = ContainerPool.members(old)
+            if members is None:
+                time.sleep(cls.RETIRE_POLL)
+                continue
+            if not members:
+                logger.info(f"{old} retired")
+                return
+            for member in reversed(members):
+                count = cls.sessions(member.name) if member.running else 0
+                if count != 0:
+                    idle.discard(member.name)
+                elif member.name in idle or not member.running:
+                    logger.info(f"Removing {member.name} (no sessions left)")
+                    ContainerPool._compose(ContainerPool.member_index(member.name, old), "down", base=old)
+                else:
+                    idle.add(member.name)
+            time.sleep(cls.RETIRE_POLL)
+        logger.info(f"{old} is active again - not retiring it")
+
+
+class IdleManager:
+    """Pauses the persistent container after a spell without sessions.
+
+    An idle container still holds its CPU and memory reservations and
+    keeps its background processes (session pool, GC) ticking. Pausing is
+    opt-in: with CLAUDE_IDLE_PAUSE set to a number of seconds, a launch
+    spawns a watcher process (unless one already holds the container's
+    lock) that polls the session count; once there has been none for that
+    long it freezes the container with docker pause and exits. The next launch sees PAUSED and unpauses it, which takes
+    milliseconds since every process is still there. Each pause/resume
+    cycle is logged with the CPU time it saved and the resume latency.
+    """
+
+    IDLE_ENV = "CLAUDE_IDLE_PAUSE"
+    # Unset means off; 1800 (half an hour) is a sensible value to opt in with
+    DEFAULT_IDLE = 0.0
+    POLL_INTERVAL = 30.0
+    HISTORY = STATE_DIR / "pause-history.jsonl"
+
+    @classmethod
+    def idle_after(cls) -> float:
+        """Seconds without sessions before pausing; 0 (the default) disables pausing."""
+        value = os.environ.get(cls.IDLE_ENV, "").strip()
+        if not value:
+            return cls.DEFAULT_IDLE
+        try:
+            return float(value)
+        except ValueError:
+            logger.warning(f"Ignoring {cls.IDLE_ENV}={value!r}: not a number of seconds")
+            return cls.DEFAULT_IDLE
+
+    @staticmethod
+    def _record_path(name: str) -> Path:
+        return STATE_DIR / f"paused-{name}.json"
+
+    @staticmethod
+    def _try_lock(name: str) -> Optional[Any]:
+        """Take the watcher lock without waiting; None if a watcher holds it."""
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        lock = open(STATE_DIR / f"idle-{name}.lock", 'a+')
+        try:
+            try:
+                import fcntl
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except ImportError:
+                import msvcrt
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock.close()
+            return None
+        return lock
+
+    @classmethod
+    def ensure_watcher(cls, name: str) -> None:
+        """Start a watcher for the container if pausing is enabled and none is running."""
+        if cls.idle_after() <= 0:
+            return
+        try:
+            lock = cls._try_lock(name)
+        except OSError as e:
+            logger.debug(f"Cannot check the idle watcher: {e}")
+            return
+        if lock is None:
+            return
+        lock.close()
+
+        kwargs: Dict[str, Any] = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        with open(STATE_DIR / "idle.log", 'a', encoding='utf-8') as log:
+            subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), "--idle-watch", name],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **kwargs
+            )
+
+    @classmethod
+    def _cpu_seconds(cls, name: str) -> Optional[float]:
+        """Cumulative CPU time of the container (Engine API only)."""
+        api = DockerManager._engine_api()
+        if api is None:
+            return None
+        try:
+            status, data = api.request(
+                "GET", f"/containers/{api.quote(name)}/stats", query={"stream": "false", "one-shot": "true"}
+            )
+        except DockerEngineAPI.ERRORS as e:
+            DockerManager._api_failed(e)
+            return None
+        if status != 200:
+            return None
+        return data.get("cpu_stats", {}).get("cpu_usage", {}).get("total_usage", 0) / 1e9
+
+    @classmethod
+    def cpu_cores_now(cls, name: str) -> float:
+        """Current CPU use in cores as docker stats samples it (CLI fallback)."""
+        try:
+            result = DockerManager._run_command(
+                ["docker", "stats", "--no-stream", "--format", "{{.CPUPerc}}", name], timeout=10, check=False
+            )
+            return float(result.stdout.strip().rstrip("%")) / 100
+        except Exception:
+            return 0.0
+
+    @classmethod
+    def watch(cls, name: str) -> None:
+        """Pause the container once it has had no sessions for long enough."""
+        lock = cls._try_lock(name)
+        if lock is None:
+            return  # another watcher has it
+        idle_after = cls.idle_after()
+        idle_since: Optional[float] = None
+        idle_cpu: Optional[float] = None
+        try:
+            while idle_after > 0:
+                time.sleep(cls.POLL_INTERVAL)
+                if DockerManager.container_status(name) != ContainerStatus.RUNNING:
+                    return  # stopped, removed or already paused
+                count = BlueGreen.sessions(name)
+                if count is None:
+                    continue
+                if count:
+                    idle_since = None
+                    continue
+                if idle_since is None:
+                    idle_since, idle_cpu = time.monotonic(), cls._cpu_seconds(name)
+                    continue
+                idle_for = time.monotonic() - idle_since
+                if idle_for >= idle_after:
+                    cpu_now = cls._cpu_seconds(name)
+                    if idle_cpu is not None and cpu_now is not None:
+                        cores = max(cpu_now - idle_cpu, 0.0) / idle_for
+                    else:
+                        cores = cls.cpu_cores_now(name)
+                    cls.pause(name, cores)
+                    return
+        finally:
+            lock.close()
+
+    @classmethod
+    def pause(cls, name: str, idle_cores: float = 0.0) -> bool:
+        """Freeze the container and remember what it was using while idle."""
+        # A session may have started since the watcher last looked
+        if BlueGreen.sessions(name):
+            logger.info(f"{name} has sessions again - not pausing")
+            return False
+        # Cached launches would exec straight into the frozen container
+        LaunchStateCache.invalidate()
+        if not DockerManager.set_paused(name, True):
+            logger.error(f"Could not pause {name}")
+            return False
+        # A launch that probed it running just before may have cached it again
+        LaunchStateCache.invalidate()
+        record = {"paused_at": time.time(), "idle_cores": round(idle_cores, 4)}
+        try:
+            with open(cls._record_path(name), 'w', encoding='utf-8') as f:
+                json.dump(record, f)
+        except OSError as e:
+            logger.debug(f"Could not record the pause: {e}")
+        logger.info(f"Paused {name} (idle, using {idle_cores:.3f} cores)")
+        return True
+
+    @classmethod
+    def resume(cls, name: str) -> bool:
+        """Unpause the container and report the resume latency and CPU saved."""
+        started = time.perf_counter()
+        with Tracer.span("docker unpause", cat="docker"):
+            resumed = DockerManager.set_paused(name, False)
+        latency = time.perf_counter() - started
+        if not resumed:
+            # Another launcher may have unpaused it a moment ago
+            members = ContainerPool.members() or []
+            if any(member.name == name and member.running for member in members):
+                return True
+            logger.error(f"Could not unpause {name}")
+            return False
+
+        path = cls._record_path(name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            path.unlink()
+        except (OSError, ValueError):
+            record = {}
+        paused_for = time.time() - record["paused_at"] if "paused_at" in record else 0.0
+        saved = paused_for * record.get("idle_cores", 0.0)
+        paused_text = f"{paused_for / 60:.0f} min" if paused_for >= 120 else f"{paused_for:.0f} s"
+        logger.info(f"Resumed paused container in {latency * 1000:.1f} ms "
+                    f"(paused {paused_text}, ~{saved:.0f} CPU-seconds of idle work saved)")
+        try:
+            with open(cls.HISTORY, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    "container": name,
+                    "paused_at": record.get("paused_at"),
+                    "paused_seconds": round(paused_for, 1),
+                    "idle_cores": record.get("idle_cores"),
+                    "cpu_seconds_saved": round(saved, 1),
+                    "resume_ms": round(latency * 1000, 1),
+                }) + "\n")
+        except OSError as e:
+            logger.debug(f"Could not record the resume: {e}")
+        return True
+
+
+class ProbeRunner:
+    """Runs independent prerequisite probes concurrently.
+
+    Wall-clock time is that of the slowest probe instead of the sum. A
+    failing probe listed in ``fail_fast`` returns immediately without
+    waiting for the others; their results are simply missing.
+    """
+
+    MAX_WORKERS = 8
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+
+    def run(
+        self,
+        probes: Dict[str, Callable[[], Any]],
+        fail_fast: Tuple[str, ...] = ()
+    ) -> Dict[str, Any]:
+        """Run all probes; an exception is stored as that probe's result."""
+        results: Dict[str, Any] = {}
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(probes)),
+            thread_name_prefix="probe"
+        )
+        futures = {executor.submit(probe): name for name, probe in probes.items()}
+        try:
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = e
+
+                failed = isinstance(results[name], Exception) or not results[name]
+                if name in fail_fast and failed:
+                    logger.debug(f"Probe '{name}' failed, skipping the rest")
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+
 class PathValidator:
     """Handles path validation."""
 
@@ -229,26 +1971,584 @@ class PathValidator:
         # Take first 8 characters of hex digest
         return hash_obj.hexdigest()[:8]
 
+    @classmethod
+    def project_fingerprint(cls, project_path: Path) -> str:
+        """Generate a stable project ID, the same for every session.
+
+        Keys the project's warm state area inside the container.
+        """
+        path_str = os.path.normcase(str(project_path.resolve()))
+        return hashlib.sha256(path_str.encode('utf-8')).hexdigest()[:16]
+
+
+class ImageFreshness:
+    """Spots images built from an older Dockerfile, compose file or build args.
+
+    setup.py labels every image with a fingerprint of its sources and build
+    args; this recomputes it from the current files. The labels come with
+    the image probe, so the check costs no extra Docker request.
+    """
+
+    LABEL = "claude.fingerprint"
+    ARGS_LABEL = "claude.build-args"
+    # Set to 1 to rebuild stale images in the background instead of only warning
+    AUTO_REBUILD_ENV = "CLAUDE_AUTO_REBUILD"
+
+    @staticmethod
+    def sources() -> List[Path]:
+        """Same file set as setup.py's ImageFingerprint."""
+        root = Path(__file__).parent
+        files = [root / "Dockerfile", root / "docker-compose.yml"]
+        if (root / "container").is_dir():
+            files += sorted(
+                path for path in (root / "container").rglob("*")
+                if path.is_file() and "__pycache__" not in path.parts
+            )
+        return [path for path in files if path.exists()]
+
+    @classmethod
+    def fingerprint(cls, build_args: Dict[str, str]) -> str:
+        root = Path(__file__).parent
+        digest = hashlib.sha256()
+        for path in cls.sources():
+            digest.update(path.relative_to(root).as_posix().encode('utf-8') + b"\0")
+            digest.update(path.read_bytes() + b"\0")
+        digest.update(json.dumps(build_args, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def is_stale(cls, labels: Dict[str, str]) -> bool:
+        """Whether an image with these labels no longer matches its sources."""
+        # Images from before the fingerprint label cannot be judged
+        if cls.LABEL not in labels:
+            return False
+        try:
+            build_args = json.loads(labels.get(cls.ARGS_LABEL) or "{}")
+            return labels[cls.LABEL] != cls.fingerprint(build_args)
+        except (OSError, ValueError):
+            return False
+
+    @classmethod
+    def check(cls, image_name: str, labels: Dict[str, str]) -> None:
+        """Warn about a stale image, or rebuild it in the background."""
+        with Tracer.span("image freshness"):
+            if not cls.is_stale(labels):
+                return
+
+        setup_path = Path(__file__).parent / "setup.py"
+        target = image_name.rsplit(":", 1)[-1]
+        if os.environ.get(cls.AUTO_REBUILD_ENV) != "1":
+            logger.warning(f"Image {image_name} is out of date with the Dockerfile or build args")
+            logger.warning(f"  Rebuild: python {setup_path} --rebuild --target {target}")
+            logger.warning(f"  then switch running containers over: python {Path(__file__)} --upgrade")
+            return
+
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        log_path = STATE_DIR / "rebuild.log"
+        logger.info(f"Image {image_name} is out of date - rebuilding in the background (log: {log_path})")
+        kwargs: Dict[str, Any] = {}
+        if sys.platform == "win32":
+            kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        with open(log_path, 'a', encoding='utf-8') as log:
+            # setup.py --rebuild holds a lock, so concurrent launches start at most one build
+            subprocess.Popen(
+                [sys.executable, str(setup_path), "--rebuild", "--target", target],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **kwargs
+            )
+
+
+class LaunchStateCache:
+    """On-disk cache of the resolved launch state.
+
+    Lets launches a few seconds apart skip the Docker probes entirely. The
+    file is replaced atomically, so several terminals reading it at once
+    never see a partial write. An entry is keyed on the image and container
+    IDs: a probing launch that finds either changed drops it, and a
+    container still running an older build of the image is never cached.
+    A stale entry used in between is caught by docker exec failing against
+    the cached container ID.
+    """
+
+    PATH = STATE_DIR / "launch-state.json"
+    TTL_ENV = "CLAUDE_CACHE_TTL"
+    DEFAULT_TTL = 120.0
+
+    @classmethod
+    def ttl(cls) -> float:
+        """Cache lifetime in seconds."""
+        try:
+            return float(os.environ.get(cls.TTL_ENV, cls.DEFAULT_TTL))
+        except ValueError:
+            return cls.DEFAULT_TTL
+
+    @classmethod
+    def _read(cls) -> Optional[LaunchState]:
+        try:
+            with open(cls.PATH, 'r', encoding='utf-8') as f:
+                return LaunchState(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    @classmethod
+    def load(cls) -> Optional[LaunchState]:
+        """Return the cached state if present and still fresh."""
+        state = cls._read()
+        if state is None:
+            return None
+
+        age = time.time() - state.checked_at
+        if not 0 <= age <= cls.ttl() or state.container_state != ContainerStatus.RUNNING.value:
+            return None
+        return state
+
+    @classmethod
+    def save(cls, state: LaunchState) -> None:
+        """Write the state atomically."""
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=STATE_DIR, prefix=".launch-state-", delete=False
+            ) as f:
+                json.dump(state.__dict__, f)
+            os.replace(f.name, cls.PATH)
+        except OSError as e:
+            logger.debug(f"Could not write launch state cache: {e}")
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Drop the cached state."""
+        try:
+            cls.PATH.unlink()
+        except OSError:
+            pass
+
+    @classmethod
+    def check(cls, image_id: Optional[str], container_id: Optional[str]) -> None:
+        """Drop the cached state if the probed image or container differs from it."""
+        state = cls._read()
+        if state is not None and (state.image_id, state.container_id) != (image_id, container_id):
+            logger.debug("Image or container changed since the launch state was cached")
+            cls.invalidate()
+
+
+class SessionLimits:
+    """Per-session cgroup limits, applied by the session pool in the container.
+
+    Each launcher flag maps to a CLAUDE_SESSION_* variable passed with the
+    docker exec; a flag wins over the host variable of the same name. The
+    pool puts the session in its own cgroup with these limits, so one heavy
+    session cannot starve the others, and records what each session used.
+    """
+
+    OPTIONS = {
+        "--session-cpus": "CLAUDE_SESSION_CPUS",
+        "--session-memory": "CLAUDE_SESSION_MEMORY",
+        "--session-cpu-weight": "CLAUDE_SESSION_CPU_WEIGHT",
+        "--session-io-weight": "CLAUDE_SESSION_IO_WEIGHT",
+        "--session-cpuset": "CLAUDE_SESSION_CPUSET",
+    }
+    PATTERNS = {
+        "CLAUDE_SESSION_CPUS": r"\d+(\.\d+)?",
+        "CLAUDE_SESSION_MEMORY": r"\d+(\.\d+)?[KMGT]?B?",
+        "CLAUDE_SESSION_CPU_WEIGHT": r"\d{1,5}",
+        "CLAUDE_SESSION_IO_WEIGHT": r"\d{1,5}",
+        "CLAUDE_SESSION_CPUSET": r"\d+(-\d+)?(,\d+(-\d+)?)*",
+    }
+    USAGE_CMD = ["/usr/lib/claude-launcher/session-pool", "usage"]
+
+    @classmethod
+    def resolve(cls, flags: Dict[str, Optional[str]], env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Environment for the session from flag values and host variables."""
+        env = os.environ if env is None else env
+        limits = {}
+        for flag, var in cls.OPTIONS.items():
+            value = flags.get(flag) or env.get(var, "")
+            if not value:
+                continue
+            if not re.fullmatch(cls.PATTERNS[var], value.strip(), re.IGNORECASE):
+                raise DockerContainerError(f"Invalid {flag} value: {value}")
+            limits[var] = value.strip()
+        return limits
+
+    @classmethod
+    def show_usage(cls, container: str) -> None:
+        """Print per-project CPU time, peak memory and I/O of past sessions."""
+        result = subprocess.run(["docker", "exec", container] + cls.USAGE_CMD, check=False)
+        if result.returncode != 0:
+            logger.error("Could not read session usage (is the container running?)")
+
+
+class DetachedSessions:
+    """Sessions that survive closing the terminal (``claude.py --detach-session``).
+
+    They run under tmux inside the container, one per project fingerprint;
+    launching in a project with one running attaches to it instead of
+    starting another CLI (see session-pool's DetachedSessions).
+    """
+
+    DETACH_ENV = "CLAUDE_DETACH"
+    SESSION_POOL = "/usr/lib/claude-launcher/session-pool"
+
+    @classmethod
+    def requested(cls, flag: bool, env: Optional[Dict[str, str]] = None) -> bool:
+        return flag or (os.environ if env is None else env).get(cls.DETACH_ENV) == "1"
+
+    @classmethod
+    def _name(cls, name: str) -> str:
+        """Session name; ``.`` is the current project."""
+        if name != ".":
+            return name
+        project_path = PathValidator.validate_project_path(os.getcwd())
+        return PathValidator.project_fingerprint(project_path)
+
+    @classmethod
+    def _exec(cls, container: str, *args: str, interactive: bool = False) -> int:
+        cmd = ["docker", "exec"] + (["-it"] if interactive else []) + [container, cls.SESSION_POOL, *args]
+        return subprocess.run(cmd, check=False).returncode
+
+    @classmethod
+    def show(cls, container: str) -> None:
+        if cls._exec(container, "sessions") != 0:
+            logger.error("Could not list detached sessions (is the container running?)")
+
+    @classmethod
+    def attach(cls, container: str, name: str) -> None:
+        if cls._exec(container, "attach", cls._name(name), interactive=True) != 0:
+            sys.exit(1)
+
+    @classmethod
+    def kill(cls, container: str, name: str) -> None:
+        if cls._exec(container, "kill", cls._name(name)) != 0:
+            sys.exit(1)
+
+
+class VolumeBudgets:
+    """Size budgets of the shared tool volumes (``claude.py --gc``).
+
+    The pool server inside the container enforces them once a day; this
+    runs it now, or with --gc-dry-run only reports what it would reclaim.
+    """
+
+    GC_CMD = ["/usr/lib/claude-launcher/session-pool", "gc"]
+
+    @classmethod
+    def collect_garbage(cls, container: str, dry_run: bool) -> None:
+        cmd = ["docker", "exec", "-u", "root", container] + cls.GC_CMD + (["--dry-run"] if dry_run else [])
+        if subprocess.run(cmd, check=False).returncode != 0:
+            logger.error("Could not run the volume GC (is the container running?)")
+
+
+class SessionMonitor:
+    """Live view of the container and its sessions (``claude.py --top``).
+
+    Fed by two streams that stay open the whole time: the Docker stats
+    stream for the container as a whole, and ``session-pool top`` inside
+    the container for per-session process trees with CPU, RSS and I/O.
+    Between updates the launcher only blocks on them, so the view can be
+    left open all day.
+    """
+
+    INTERVAL_ENV = "CLAUDE_TOP_INTERVAL"
+    DEFAULT_INTERVAL = 2.0
+    SESSIONS_CMD = ["/usr/lib/claude-launcher/session-pool", "top"]
+
+    def __init__(self, container: str):
+        self.container = container
+        try:
+            self.interval = max(float(os.environ.get(self.INTERVAL_ENV, self.DEFAULT_INTERVAL)), 0.5)
+        except ValueError:
+            self.interval = self.DEFAULT_INTERVAL
+        self.container_stats: Optional[Dict[str, str]] = None
+        self.sessions: Optional[List[dict]] = None
+        self.sessions_note = "waiting for the first sample..."
+        self._updates: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self._closers: List[Callable[[], None]] = []
+
+    @staticmethod
+    def _size(size: float) -> str:
+        for unit in ("B", "K", "M", "G"):
+            if abs(size) < 1024:
+                return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+            size /= 1024
+        return f"{size:.1f}T"
+
+    def run(self) -> None:
+        """Show the view until Ctrl-C or the container goes away."""
+        self._open_stats_stream()
+        self._open_sessions_stream()
+        last_render = 0.0
+        try:
+            while True:
+                kind, data = self._updates.get()
+                if kind == "stats":
+                    self.container_stats = data
+                elif kind == "sessions":
+                    self.sessions = data
+                elif kind == "end-sessions":
+                    self.sessions = None
+                    self.sessions_note = "per-session view unavailable (image without session-pool top?)"
+                elif kind == "end-stats":
+                    logger.info(f"{self.container} is no longer running")
+                    return
+                # Docker sends stats every second; redraw at our own pace
+                if kind != "stats" or time.monotonic() - last_render >= self.interval:
+                    self.render()
+                    last_render = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for close in self._closers:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+    def _reader(self, kind: str, readline: Callable[[], bytes], parse: Callable[[dict], Any]) -> None:
+        """Decode a JSON-lines stream into updates from a background thread."""
+        def reader() -> None:
+            try:
+                for line in iter(readline, b""):
+                    # docker stats clears the screen before every sample
+                    start = line.find(b"{")
+                    if start >= 0:
+                        self._updates.put((kind, parse(json.loads(line[start:]))))
+            except Exception as e:
+                logger.debug(f"{kind} stream ended: {e}")
+            self._updates.put((f"end-{kind}", None))
+
+        threading.Thread(target=reader, daemon=True).start()
+
+    def _open_stats_stream(self) -> None:
+        api = DockerManager._engine_api()
+        if api is not None:
+            try:
+                response, close = api.open_stream(
+                    f"/containers/{api.quote(self.container)}/stats", {"stream": "true"}, timeout=30
+                )
+                self._closers.append(close)
+                self._reader("stats", response.readline, self._api_stats)
+                return
+            except DockerEngineAPI.ERRORS as e:
+                DockerManager._api_failed(e)
+
+        process = subprocess.Popen(
+            ["docker", "stats", "--format", "{{json .}}", self.container],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._closers.append(process.kill)
+        self._reader("stats", process.stdout.readline, self._cli_stats)
+
+    def _open_sessions_stream(self) -> None:
+        # stdin stays open: session-pool top exits when it is closed
+        process = subprocess.Popen(
+            ["docker", "exec", "-i", "-u", "root", self.container]
+            + self.SESSIONS_CMD + [str(self.interval)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+
+        def close() -> None:
+            process.stdin.close()
+            process.kill()
+
+        self._closers.append(close)
+        self._reader("sessions", process.stdout.readline, lambda sample: sample.get("sessions", []))
+
+    def _api_stats(self, data: dict) -> Dict[str, str]:
+        cpu, precpu = data.get("cpu_stats") or {}, data.get("precpu_stats") or {}
+        cpu_delta = (cpu.get("cpu_usage") or {}).get("total_usage", 0) \
+            - (precpu.get("cpu_usage") or {}).get("total_usage", 0)
+        system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+        cpus = cpu.get("online_cpus") or len((cpu.get("cpu_usage") or {}).get("percpu_usage") or []) or 1
+        cpu_percent = cpu_delta / system_delta * cpus * 100 if system_delta > 0 else 0.0
+
+        memory = data.get("memory_stats") or {}
+        details = memory.get("stats") or {}
+        usage = memory.get("usage", 0) - details.get("inactive_file", details.get("total_inactive_file", 0))
+
+        block = {"read": 0, "write": 0}
+        for entry in (data.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+            op = entry.get("op", "").lower()
+            if op in block:
+                block[op] += entry.get("value", 0)
+        networks = (data.get("networks") or {}).values()
+
+        return {
+            "CPU": f"{cpu_percent:.1f}%",
+            "Memory": f"{self._size(max(usage, 0))} / {self._size(memory.get('limit', 0))}",
+            "Block I/O": f"{self._size(block['read'])} / {self._size(block['write'])}",
+            "Net I/O": f"{self._size(sum(n.get('rx_bytes', 0) for n in networks))} / "
+                       f"{self._size(sum(n.get('tx_bytes', 0) for n in networks))}",
+            "PIDs": str((data.get("pids_stats") or {}).get("current", "?")),
+        }
+
+    @staticmethod
+    def _cli_stats(data: dict) -> Dict[str, str]:
+        return {
+            "CPU": data.get("CPUPerc", "?"),
+            "Memory": data.get("MemUsage", "?"),
+            "Block I/O": data.get("BlockIO", "?"),
+            "Net I/O": data.get("NetIO", "?"),
+            "PIDs": data.get("PIDs", "?"),
+        }
+
+    def render(self) -> None:
+        lines = []
+        stats = self.container_stats
+        summary = "  ".join(f"{key} {value}" for key, value in stats.items()) if stats else "waiting for stats..."
+        lines.append(f"{self.container}  {summary}  {time.strftime('%H:%M:%S')}")
+        lines.append("")
+        if self.sessions is None:
+            lines.append(self.sessions_note)
+        elif not self.sessions:
+            lines.append("No sessions running")
+        else:
+            lines.append(f"{'SESSION':<10} {'PROCS':>5} {'CPU%':>6} {'RSS':>8} {'READ/s':>8} {'WRITE/s':>8}  PROJECT")
+            for session in self.sessions:
+                lines.append(
+                    f"{session['session'][:10]:<10} {session['processes']:>5} {session['cpu']:>6.1f} "
+                    f"{self._size(session['rss']):>8} {self._size(session['read_rate']):>8} "
+                    f"{self._size(session['write_rate']):>8}  {session['project']}"
+                )
+                for proc in session["tree"]:
+                    name = "  " * proc["depth"] + proc["name"]
+                    lines.append(
+                        f"  {proc['pid']:>8} {proc['cpu']:>6.1f} {self._size(proc['rss']):>8} "
+                        f"{self._size(proc['read_rate']):>8} {self._size(proc['write_rate']):>8}  {name}"
+                    )
+
+        # Home + clear on a terminal; plain blocks when piped
+        prefix = "\033[H\033[2J" if sys.stdout.isatty() else "\n"
+        sys.stdout.write(prefix + "\n".join(lines) + "\n")
+        sys.stdout.flush()
+
 
 class ClaudeLauncher:
     """Main launcher for Claude Code sessions."""
 
+    # docker exec exits with 1 when the daemon rejects it (no such
+    # container, container not running or paused) - the same code as a
+    # failing session. A cached launch whose exec fails this quickly gets
+    # its container looked at once
+    STALE_EXEC_WINDOW = 5.0
+
+    # Hands the session to a pre-created worker of the in-container session
+    # pool; containers from images without the pool use the namespace launcher
+    SESSION_ENTRYPOINT = [
+        "sh", "-c",
+        'if [ -x "$0" ]; then exec "$0" claim "$@"; fi; '
+        'exec /usr/local/bin/claude-namespace-launcher "$@"',
+        "/usr/lib/claude-launcher/session-pool",
+    ]
+
     def __init__(self, debug: bool = False):
         self.docker_manager = DockerManager()
         self.path_validator = PathValidator()
         self.image_name = None  # Will be set dynamically
         self.debug = debug
+        # Filled in by the probe phase, reused by launch_claude
+        self.project_path: Optional[Path] = None
+        self.container_status: Optional[ContainerStatus] = None
+        self.image_id: Optional[str] = None
+        self.container_id: Optional[str] = None
+        self.pool_size = 1
+        # CLAUDE_SESSION_* cgroup limits for the session
+        self.session_limits: Dict[str, str] = {}
+        self.detach = False
+        # Exec target - the container ID when launching from the cache
+        self.container_ref = self.docker_manager.CONTAINER_NAME
+
+    def load_cached_state(self) -> bool:
+        """Use the cached launch state instead of probing, if fresh."""
+        state = LaunchStateCache.load()
+        if state is None:
+            return False
+
+        self.image_name = state.image_name
+        self.container_ref = state.container_id
+        self.pool_size = state.pool_size
+        logger.debug(f"Using cached launch state ({time.time() - state.checked_at:.0f}s old)")
+        return True
+
+    def _save_state(self) -> None:
+        """Record the state we just verified for the next launch."""
+        image_id = self.image_id
+        if image_id is None and self.image_name:
+            image_id = self.docker_manager.image_id(self.image_name)
+        # The probed ID is still valid unless the container had to be
+        # started (unpausing keeps it)
+        container_id = self.container_id
+        if container_id is None or self.container_status not in (ContainerStatus.RUNNING, ContainerStatus.PAUSED):
+            container_id = self.docker_manager.container_id()
+        if image_id and container_id:
+            # Not cached while the container runs an older build of the image,
+            # so launches keep probing (and warning) until it is recreated
+            if self.docker_manager.container_image_id(container_id) != image_id:
+                logger.debug("Container runs an older build of the image - launch state not cached")
+                LaunchStateCache.invalidate()
+                return
+            LaunchStateCache.save(LaunchState(
+                image_name=self.image_name,
+                image_id=image_id,
+                container_id=container_id,
+                container_state=ContainerStatus.RUNNING.value,
+                checked_at=time.time(),
+                pool_size=self.pool_size,
+            ))
+
+    def _run_probes(self) -> Dict[str, Any]:
+        """Probe Docker, images, container and project path concurrently."""
+        manager = self.docker_manager
+        probes: Dict[str, Callable[[], Any]] = {
+            "docker": manager.check_docker_running,
+            "project": lambda: self.path_validator.validate_project_path(os.getcwd()),
+            # Lists every pool member - including the persistent container
+            # itself, so it doubles as the container probe
+            "pool": ContainerPool.members,
+        }
+        for tag in manager.IMAGE_TAGS:
+            image_name = f"{manager.IMAGE_BASE}:{tag}"
+            probes[image_name] = lambda image_name=image_name: manager.inspect_image(image_name)
+
+        return ProbeRunner().run(probes, fail_fast=("docker", "project"))
 
     def ensure_prerequisites(self) -> None:
         """Ensure Docker is running and image exists."""
-        if not self.docker_manager.check_docker_running():
+        with Tracer.span("probes"):
+            results = self._run_probes()
+
+        if isinstance(results.get("project"), DockerContainerError):
+            raise results["project"]
+
+        if not results.get("docker"):
             raise DockerContainerError(
                 "Docker is not running!\n"
                 "Please start Docker Desktop and try again."
             )
 
+        self.project_path = results.get("project")
+        members = results.get("pool")
+        if isinstance(members, list):
+            base = next((m for m in members if m.name == self.docker_manager.CONTAINER_NAME), None)
+            self.container_status = base.status if base else ContainerStatus.NOT_EXISTS
+            self.container_id = base.container_id if base else None
+            self.pool_size = max(len(members), 1)
+
+        found = [
+            f"{self.docker_manager.IMAGE_BASE}:{tag}" for tag in self.docker_manager.IMAGE_TAGS
+            if isinstance(results.get(f"{self.docker_manager.IMAGE_BASE}:{tag}"), tuple)
+        ]
+        if found:
+            self.image_name = found[0]
+            self.image_id, labels = results[found[0]]
+            LaunchStateCache.check(self.image_id, self.container_id)
+            logger.info(f"Using image: {self.image_name}")
+            ImageFreshness.check(self.image_name, labels)
+            return
+
         try:
-            # Try to find available image
+            # Not found by the probes - the regular lookup raises the user-facing error
             self.image_name = self.docker_manager.get_available_image()
             logger.info(f"Using image: {self.image_name}")
         except DockerContainerError:
@@ -273,47 +2573,88 @@ class ClaudeLauncher:
         setup_path = Path(__file__).parent / "setup.py"
         subprocess.run([sys.executable, str(setup_path)])
 
-    def launch_claude(self, args: List[str]) -> None:
-        """Launch Claude Code in isolated container using docker exec."""
-        # Validate current directory
-        try:
-            project_path = self.path_validator.validate_project_path(os.getcwd())
-        except DockerContainerError as e:
-            logger.error(str(e))
-            sys.exit(1)
+    def prepare_via_daemon(self) -> bool:
+        """Let a running launcher daemon do the Docker checks for us."""
+        response = LauncherClient.request({"op": "prepare"})
+        if response is None:
+            return False
 
-        # Generate unique session ID
-        session_id = self.path_validator.generate_session_id(project_path)
+        if not response.get("ok"):
+            # Anything interactive (e.g. running setup) happens in-process
+            logger.debug(f"Launcher daemon could not prepare: {response.get('error')}")
+            return False
 
-        # Convert project path for Docker - this will be used inside container
-        docker_project_path = self.docker_manager._convert_path_for_docker(str(project_path))
+        self.image_name = response["image"]
+        self.container_ref = response["container"]
+        logger.debug(f"Launcher daemon ready: {self.image_name} / {response['container']}")
+        return True
+
+    def launch_claude(
+        self,
+        args: List[str],
+        container_ready: bool = False,
+        save_state: bool = True
+    ) -> None:
+        """Launch Claude Code in isolated container using docker exec.
+
+        ``container_ready`` skips starting the container because a daemon or
+        the launch state cache says it is running; if docker exec then fails,
+        everything is re-checked and the launch retried once.
+        """
+        # Validate current directory (already done by the probe phase)
+        project_path = self.project_path
+        if project_path is None:
+            try:
+                project_path = self.path_validator.validate_project_path(os.getcwd())
+            except DockerContainerError as e:
+                logger.error(str(e))
+                sys.exit(1)
 
         # Ensure container is running
-        if not self.docker_manager.start_container(self.debug):
+        if not container_ready and not self.docker_manager.start_container(
+            self.debug, status=self.container_status
+        ):
             logger.error("Failed to start container")
             sys.exit(1)
 
-        # Build docker exec command - pass project path via environment
-        docker_cmd = [
-            "docker", "exec",
-            "-it",
-            "-e", f"PROJECT_PATH={docker_project_path}",
-            "-e", f"SESSION_ID={session_id}",
-            "-e", f"HOST_PROJECT_PATH={str(project_path)}",
-            self.docker_manager.CONTAINER_NAME,
-            "/usr/local/bin/claude-namespace-launcher"
-        ] + args
+        if not container_ready and save_state:
+            self._save_state()
+
+        if self.pool_size > 1:
+            self.container_ref = ContainerPool.place(self.container_ref)
 
+        # With CLAUDE_IDLE_PAUSE set, pauses the container once this and every
+        # other session is over - the pool member the session went to, or
+        # (cached by ID) the base one
+        if IdleManager.idle_after() > 0:
+            if ContainerPool.member_index(self.container_ref) is not None:
+                IdleManager.ensure_watcher(self.container_ref)
+            else:
+                IdleManager.ensure_watcher(self.docker_manager.CONTAINER_NAME)
+
+        docker_cmd = self.session_command(project_path, args)
         logger.info(f"Starting Claude session in: {project_path}")
-        if self.debug:
-            logger.debug(f"Session ID: {session_id}")
-            logger.debug(f"Docker project path: {docker_project_path}")
-            logger.debug(f"Docker command: {' '.join(docker_cmd)}")
+
+        # The session itself can run for hours - the trace ends at the handover
+        Tracer.instant("session exec", container=self.container_ref)
+        Tracer.finish()
 
         try:
             # Run Claude in isolated environment
+            started = time.monotonic()
             result = subprocess.run(docker_cmd, check=False)
 
+            # The container we skipped checking is gone, stopped or paused -
+            # check everything properly and retry once
+            if (result.returncode != 0 and container_ready
+                    and time.monotonic() - started < self.STALE_EXEC_WINDOW
+                    and self.docker_manager.container_status(self.container_ref) != ContainerStatus.RUNNING):
+                logger.info("Cached container state was stale, re-checking...")
+                LaunchStateCache.invalidate()
+                self.container_ref = self.docker_manager.CONTAINER_NAME
+                self.ensure_prerequisites()
+                return self.launch_claude(args, save_state=save_state)
+
             # Handle command not found
             if result.returncode in (126, 127):
                 self._handle_claude_not_found()
@@ -324,6 +2665,37 @@ class ClaudeLauncher:
             logger.error(f"Error: {e}")
             sys.exit(1)
 
+    def session_command(self, project_path: Path, args: List[str]) -> List[str]:
+        """The docker exec command starting a session in ``self.container_ref``."""
+        # Generate unique session ID
+        session_id = self.path_validator.generate_session_id(project_path)
+        fingerprint = self.path_validator.project_fingerprint(project_path)
+
+        # Convert project path for Docker - this will be used inside container
+        docker_project_path = self.docker_manager._convert_path_for_docker(str(project_path))
+
+        # Build docker exec command - pass project path via environment
+        docker_cmd = [
+            "docker", "exec",
+            "-it",
+            "-e", f"PROJECT_PATH={docker_project_path}",
+            "-e", f"SESSION_ID={session_id}",
+            "-e", f"PROJECT_FINGERPRINT={fingerprint}",
+            "-e", f"HOST_PROJECT_PATH={str(project_path)}",
+        ]
+        for var, value in self.session_limits.items():
+            docker_cmd += ["-e", f"{var}={value}"]
+        if self.detach:
+            docker_cmd += ["-e", f"{DetachedSessions.DETACH_ENV}=1"]
+        docker_cmd += [self.container_ref] + self.SESSION_ENTRYPOINT + args
+
+        if self.debug:
+            logger.debug(f"Session ID: {session_id}")
+            logger.debug(f"Project fingerprint: {fingerprint}")
+            logger.debug(f"Docker project path: {docker_project_path}")
+            logger.debug(f"Docker command: {' '.join(docker_cmd)}")
+        return docker_cmd
+
     def _handle_claude_not_found(self) -> None:
         """Handle case when Claude is not found."""
         logger.error("Claude command not found in container.")
@@ -333,26 +2705,309 @@ class ClaudeLauncher:
         logger.info(f"  docker run -it {self.image_name} npm list -g")
 
 
+class LauncherDaemon:
+    """Long-lived host process that keeps the Docker launch state warm.
+
+    Answers launch requests from claude.py and launcher_client.py over a
+    local Unix socket. Each request runs the prerequisite checks of a
+    probing launch over the daemon's warm Docker connection; whatever needs
+    the user's terminal (setup, a stale image warning or rebuild, errors)
+    is declined, so the client falls back to checking in-process.
+    """
+
+    SOCKET_PATH = STATE_DIR / "launcher.sock"
+
+    def __init__(self, debug: bool = False):
+        self.launcher = ClaudeLauncher(debug=debug)
+        self.docker_manager = self.launcher.docker_manager
+        self.lock = threading.Lock()
+        self.server: Optional[socketserver.UnixStreamServer] = None
+
+    def prepare(self) -> dict:
+        """Check Docker, the image and the container, and report what to exec into."""
+        with self.lock:
+            # An upgrade may have switched generations since the last request
+            DockerManager.CONTAINER_NAME = BlueGreen.active()
+            manager = self.docker_manager
+            for tag in manager.IMAGE_TAGS:
+                image_name = f"{manager.IMAGE_BASE}:{tag}"
+                found = manager.inspect_image(image_name)
+                if found is not None:
+                    break
+            else:
+                if not manager.check_docker_running():
+                    return {"ok": False, "error": "Docker is not running"}
+                return {"ok": False, "error": "No Claude Code image found"}
+
+            image_id, labels = found
+            if ImageFreshness.is_stale(labels):
+                return {"ok": False, "error": f"Image {image_name} is out of date"}
+            if image_name != self.launcher.image_name:
+                logger.info(f"Using image: {image_name}")
+                self.launcher.image_name = image_name
+
+            status, container_id = manager.inspect_container()
+            LaunchStateCache.check(image_id, container_id)
+            if status != ContainerStatus.RUNNING:
+                if not manager.start_container(self.launcher.debug, status=status):
+                    return {"ok": False, "error": "Failed to start container"}
+
+            return {
+                "ok": True,
+                "image": image_name,
+                "container": ContainerPool.place(manager.CONTAINER_NAME),
+            }
+
+    def session(self, request: dict) -> dict:
+        """Prepare and build the docker exec command for a launcher_client.py launch."""
+        own, rest = _split_args(request.get("argv") or [])
+        if any(arg.split("=", 1)[0] in LAUNCHER_FLAGS for arg in own):
+            return {"ok": False, "error": "Launcher flags are handled by claude.py"}
+        env = request.get("env") or {}
+        launcher = ClaudeLauncher(debug=self.launcher.debug)
+        try:
+            project_path = launcher.path_validator.validate_project_path(request.get("cwd", ""))
+            launcher.session_limits = SessionLimits.resolve({}, env)
+        except DockerContainerError as e:
+            return {"ok": False, "error": str(e)}
+        launcher.detach = DetachedSessions.requested(False, env)
+
+        prepared = self.prepare()
+        if not prepared["ok"]:
+            return prepared
+        launcher.container_ref = prepared["container"]
+        IdleManager.ensure_watcher(launcher.container_ref)
+        return {
+            "ok": True,
+            "project": str(project_path),
+            "container": launcher.container_ref,
+            "command": launcher.session_command(project_path, own + rest[1:]),
+        }
+
+    def handle(self, request: dict) -> dict:
+        """Dispatch one client request."""
+        op = request.get("op")
+        if op == "prepare":
+            return self.prepare()
+        if op == "session":
+            return self.session(request)
+        if op == "status":
+            status = self.docker_manager.container_status(request.get("container"))
+            return {"ok": True, "running": status == ContainerStatus.RUNNING}
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if op == "shutdown":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown op: {op}"}
+
+    def serve(self) -> None:
+        """Serve launch requests until shut down."""
+        if not hasattr(socket, "AF_UNIX"):
+            raise DockerContainerError("The launcher daemon needs Unix socket support")
+
+        if LauncherClient.request({"op": "ping"}) is not None:
+            raise DockerContainerError(f"Launcher daemon already running on {self.SOCKET_PATH}")
+
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        if self.SOCKET_PATH.exists():
+            self.SOCKET_PATH.unlink()
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                line = self.rfile.readline()
+                try:
+                    response = daemon.handle(json.loads(line))
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+
+        self.server = socketserver.ThreadingUnixStreamServer(str(self.SOCKET_PATH), Handler)
+        self.server.daemon_threads = True
+        os.chmod(self.SOCKET_PATH, 0o600)
+
+        # Warm everything up before the first client arrives
+        logger.info(f"Launcher daemon listening on {self.SOCKET_PATH}")
+        result = self.prepare()
+        if not result["ok"]:
+            logger.warning(f"Container not ready yet: {result['error']}")
+
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if self.SOCKET_PATH.exists():
+                self.SOCKET_PATH.unlink()
+            logger.info("Launcher daemon stopped")
+
+
+# Every flag main() takes; a daemon-served launch must not see any of them
+LAUNCHER_FLAGS = frozenset({
+    "--debug", "-v", "--verbose", "--trace", "--pool-size", "--pool-status", "--upgrade",
+    "--retire", "--daemon", "--daemon-stop", "--no-daemon", "--no-cache", "--usage", "--gc",
+    "--detach-session", "--sessions", "--attach-session", "--kill-session", "--gc-dry-run",
+    "--top", "--idle-watch", "--pause",
+}) | frozenset(SessionLimits.OPTIONS)
+
+
+def _split_args(args: List[str]) -> Tuple[List[str], List[str]]:
+    """Split arguments at ``--``: launcher flags before it, Claude's arguments after."""
+    end = args.index("--") if "--" in args else len(args)
+    return args[:end], args[end:]
+
+
+def _launcher_args() -> Tuple[List[str], List[str]]:
+    """Split sys.argv[1:] at ``--``."""
+    return _split_args(sys.argv[1:])
+
+
+def _pop_flag(*names: str) -> bool:
+    """Remove launcher flags from sys.argv, returning whether any was present."""
+    own, rest = _launcher_args()
+    present = any(arg in names for arg in own)
+    if present:
+        sys.argv = [sys.argv[0]] + [arg for arg in own if arg not in names] + rest
+    return present
+
+
+def _pop_option(name: str) -> Optional[str]:
+    """Remove a launcher option and its value (``NAME VALUE`` or ``NAME=VALUE``) from sys.argv."""
+    own, rest = _launcher_args()
+    for i, arg in enumerate(own):
+        if arg == name and i + 1 < len(own):
+            sys.argv = [sys.argv[0]] + own[:i] + own[i + 2:] + rest
+            return own[i + 1]
+        if arg.startswith(name + "="):
+            sys.argv = [sys.argv[0]] + own[:i] + own[i + 1:] + rest
+            return arg.split("=", 1)[1]
+    return None
+
+
 def main() -> None:
     """Main entry point."""
     # Check for debug flag
-    debug = "--debug" in sys.argv or "-v" in sys.argv or "--verbose" in sys.argv
+    debug = _pop_flag("--debug", "-v", "--verbose")
     if debug:
-        # Remove debug flag from args
-        sys.argv = [arg for arg in sys.argv if arg not in ["--debug", "-v", "--verbose"]]
         logging.getLogger().setLevel(logging.DEBUG)
 
-    launcher = ClaudeLauncher(debug=debug)
+    trace_file = _pop_option("--trace")
+    if trace_file:
+        Tracer.enable(trace_file)
+
+    pool_size = _pop_option("--pool-size")
+    show_pool = _pop_flag("--pool-status")
+    upgrade = _pop_flag("--upgrade")
+    retire = _pop_option("--retire")
+    run_daemon = _pop_flag("--daemon")
+    stop_daemon = _pop_flag("--daemon-stop")
+    use_daemon = not _pop_flag("--no-daemon")
+    use_cache = not _pop_flag("--no-cache")
+    show_usage = _pop_flag("--usage")
+    collect_garbage = _pop_flag("--gc")
+    detach = _pop_flag("--detach-session")
+    show_sessions = _pop_flag("--sessions")
+    attach = _pop_option("--attach-session")
+    kill = _pop_option("--kill-session")
+    dry_run = _pop_flag("--gc-dry-run")
+    show_top = _pop_flag("--top")
+    idle_watch = _pop_option("--idle-watch")
+    pause_now = _pop_flag("--pause")
+    limit_flags = {flag: _pop_option(flag) for flag in SessionLimits.OPTIONS}
+
+    # Blue or green - whichever generation the last upgrade switched to
+    DockerManager.CONTAINER_NAME = BlueGreen.active()
 
     try:
+        if run_daemon:
+            LauncherDaemon(debug=debug).serve()
+            return
+
+        if upgrade:
+            BlueGreen.upgrade()
+            return
+
+        if retire:
+            BlueGreen.retire(retire)
+            return
+
+        if pool_size is not None:
+            try:
+                ContainerPool.resize(int(pool_size))
+            except ValueError:
+                raise DockerContainerError(f"Invalid pool size: {pool_size}")
+            return
+
+        if show_pool:
+            ContainerPool.show()
+            return
+
+        if idle_watch:
+            IdleManager.watch(idle_watch)
+            return
+
+        if pause_now:
+            sessions = BlueGreen.sessions(DockerManager.CONTAINER_NAME)
+            if sessions:
+                raise DockerContainerError(f"{sessions} session(s) still running - not pausing")
+            IdleManager.pause(DockerManager.CONTAINER_NAME,
+                              IdleManager.cpu_cores_now(DockerManager.CONTAINER_NAME))
+            return
+
+        if show_top:
+            SessionMonitor(DockerManager.CONTAINER_NAME).run()
+            return
+
+        if show_usage:
+            SessionLimits.show_usage(DockerManager.CONTAINER_NAME)
+            return
+
+        if show_sessions:
+            DetachedSessions.show(DockerManager.CONTAINER_NAME)
+            return
+
+        if attach:
+            DetachedSessions.attach(DockerManager.CONTAINER_NAME, attach)
+            return
+
+        if kill:
+            DetachedSessions.kill(DockerManager.CONTAINER_NAME, kill)
+            return
+
+        if collect_garbage:
+            VolumeBudgets.collect_garbage(DockerManager.CONTAINER_NAME, dry_run)
+            return
+
+        if stop_daemon:
+            if LauncherClient.request({"op": "shutdown"}) is None:
+                logger.info("Launcher daemon is not running")
+            return
+
+        launcher = ClaudeLauncher(debug=debug)
+        launcher.session_limits = SessionLimits.resolve(limit_flags)
+        launcher.detach = DetachedSessions.requested(detach)
+
+        # Everything the launcher did not consume goes to Claude; a "--"
+        # keeps Claude flags that share a launcher flag's name
+        own, rest = _launcher_args()
+        args = own + rest[1:]
+
+        # Fast path: a running daemon has already done the Docker checks
+        if use_daemon and launcher.prepare_via_daemon():
+            launcher.launch_claude(args, container_ready=True, save_state=use_cache)
+            return
+
+        # Warm path: nothing to probe if the last launch was moments ago
+        if use_cache and launcher.load_cached_state():
+            launcher.launch_claude(args, container_ready=True)
+            return
+
         # Ensure prerequisites
         launcher.ensure_prerequisites()
 
-        # Get command line arguments
-        args = sys.argv[1:] if len(sys.argv) > 1 else []
-
         # Launch Claude
-        launcher.launch_claude(args)
+        launcher.launch_claude(args, save_state=use_cache)
 
     except DockerContainerError as e:
         logger.error(str(e))
@@ -363,6 +3018,9 @@ def main() -> None:
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         sys.exit(1)
+    finally:
+        # Launches that failed before the exec still get their trace
+        Tracer.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,1522 @@
+#!/usr/bin/python3 -IS
+# -*- coding: utf-8 -*-
+"""Pool of pre-created session workers inside the persistent container.
+
+Without the pool every session pays for the chain docker exec ->
+claude-namespace-launcher -> unshare -> bash -> mount x5 -> sudo -> bash
+-> claude. The pool server (the container's main process) keeps
+CLAUDE_POOL_SIZE workers that already sit in their own private mount
+namespace. A session claims one, hands it the terminal and the project
+path, and the worker binds the project, drops to the claude user and
+execs the CLI directly:
+
+    session-pool serve              # container command, runs as root
+    session-pool claim [ARGS...]    # what claude.py runs via docker exec
+    session-pool sessions           # list detached sessions (see DetachedSessions)
+    session-pool attach NAME        # attach to / end a detached session
+    session-pool kill NAME
+    session-pool gc [--dry-run]     # evict per-project state and shared tool
+                                    # volume contents over budget now
+    session-pool usage              # CPU / memory / I/O used per project
+    session-pool top [INTERVAL]     # stream live per-session stats as JSON lines
+
+Each session also gets its project's warm state area (see ProjectState),
+keyed by the PROJECT_FINGERPRINT claude.py passes in, its own cgroup with
+the limits claude.py passes in (see SessionCgroups), and the CLI's V8
+compile cache (see NodeCompileCache).
+
+``claim`` falls back to claude-namespace-launcher whenever the pool cannot
+serve the session (not running, no idle worker, no CAP_SYS_ADMIN).
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import pwd
+import ctypes
+import fcntl
+import shutil
+import signal
+import select
+import socket
+import termios
+import logging
+import threading
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+POOL_SIZE_ENV = "CLAUDE_POOL_SIZE"
+SOCKET_ENV = "CLAUDE_POOL_SOCKET"
+DEFAULT_POOL_SIZE = 2
+DEFAULT_SOCKET = "/run/claude-pool/pool.sock"
+
+# Regular launcher used when the pool cannot take the session (outside the
+# claude-usr-local volume, like this script)
+FALLBACK_LAUNCHER = "/usr/lib/claude-launcher/claude-namespace-launcher"
+
+SESSION_USER = "claude"
+SESSION_HOME = "/home/claude"
+PROJECT_MOUNT = "/project"
+EMPTY_DIR = "/tmp/empty"
+# Host mounts hidden from the session once the project is bound
+HOST_MOUNTS = ["/host", "/host_c", "/host_d"]
+
+# Per-project state volume and its total size budget
+STATE_ROOT = "/var/lib/claude-projects"
+STATE_BUDGET_ENV = "CLAUDE_PROJECT_STATE_BUDGET"
+DEFAULT_STATE_BUDGET = "20G"
+GC_INTERVAL = 600
+
+# Shared tool volumes kept within a size budget (session-pool gc), and how
+# often the pool server does it by itself
+VOLUME_BUDGETS = {
+    "/var/cache/apt": ("CLAUDE_APT_CACHE_BUDGET", "2G"),
+    "/opt/claude-shared": ("CLAUDE_SHARED_TOOLS_BUDGET", "10G"),
+    "/usr/local": ("CLAUDE_USR_LOCAL_BUDGET", "10G"),
+}
+VOLUME_GC_INTERVAL = 86400
+# Packages the image itself installed into those volumes, recorded by the
+# image build; never evicted
+IMAGE_MANIFEST = "/usr/lib/claude-launcher/image-manifest"
+
+# V8 compile cache of the CLI (claude-node-cache volume), per CLI version
+NODE_CACHE_ROOT = "/var/cache/node-compile"
+CLI_PACKAGE = "/usr/local/lib/node_modules/@anthropic-ai/claude-code/package.json"
+
+# Detached sessions: a tmux server of their own, one session per project
+DETACH_ENV = "CLAUDE_DETACH"
+TMUX_SOCKET = "claude-sessions"
+# Set per session by claude.py; everything else is the tmux server's own
+SESSION_VARS = ("PROJECT_PATH", "SESSION_ID", "PROJECT_FINGERPRINT", "HOST_PROJECT_PATH")
+
+# Per-session cgroups and the usage they recorded (kept with the project state)
+CGROUP_ROOT = "/sys/fs/cgroup"
+SESSIONS_CGROUP = "claude-sessions"
+CGROUP_CONTROLLERS = ["cpu", "cpuset", "io", "memory", "pids"]
+USAGE_LOG = os.path.join(STATE_ROOT, ".usage.jsonl")
+USAGE_LOG_MAX = 5 << 20
+
+MAX_MESSAGE = 1 << 20
+STDIO_FDS = [0, 1, 2]
+
+# <sched.h>, <sys/mount.h>
+CLONE_NEWNS = 0x20000
+MS_REMOUNT = 0x20
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] session-pool: %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+def socket_path() -> str:
+    return os.environ.get(SOCKET_ENV, DEFAULT_SOCKET)
+
+
+def pool_size() -> int:
+    try:
+        return max(int(os.environ.get(POOL_SIZE_ENV, DEFAULT_POOL_SIZE)), 0)
+    except ValueError:
+        return DEFAULT_POOL_SIZE
+
+
+def parse_size(value: str) -> int:
+    """Bytes in a size like 512M or 20G."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    value = value.strip().upper().rstrip("B")
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def state_budget() -> int:
+    try:
+        return parse_size(os.environ.get(STATE_BUDGET_ENV, DEFAULT_STATE_BUDGET))
+    except ValueError:
+        return parse_size(DEFAULT_STATE_BUDGET)
+
+
+def volume_budget(root: str) -> int:
+    env, default = VOLUME_BUDGETS[root]
+    try:
+        return parse_size(os.environ.get(env, default))
+    except ValueError:
+        return parse_size(default)
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}T"
+
+
+def format_duration(seconds: float) -> str:
+    seconds = max(int(seconds), 0)
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    if seconds < 86400:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 86400}d{seconds % 86400 // 3600:02d}h"
+
+
+def exit_code(status: int) -> int:
+    """Shell-style exit code for a waitpid status."""
+    code = os.waitstatus_to_exitcode(status)
+    return 128 - code if code < 0 else code
+
+
+class Syscalls:
+    """unshare(2)/mount(2) through libc - no unshare(8)/mount(8) processes."""
+
+    _libc = ctypes.CDLL(None, use_errno=True)
+
+    @classmethod
+    def _check(cls, result: int, what: str) -> None:
+        if result != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"{what}: {os.strerror(errno)}")
+
+    @classmethod
+    def unshare(cls, flags: int) -> None:
+        cls._check(cls._libc.unshare(flags), "unshare")
+
+    @classmethod
+    def mount(cls, source: Optional[str], target: str, flags: int) -> None:
+        src = source.encode() if source is not None else None
+        cls._check(cls._libc.mount(src, target.encode(), None, ctypes.c_ulong(flags), None),
+                   f"mount {source} -> {target}")
+
+
+class ProjectState:
+    """Warm per-project state area, kept between a project's sessions.
+
+    Lives in the claude-project-state volume under the project fingerprint
+    and holds the project's tool caches (XDG_CACHE_HOME), shell history and
+    the CLI's own per-project state. Every project is mounted at /project,
+    so without this they would all share ~/.claude/projects/-project.
+
+    A session holds a shared flock on the area's .lock for its whole
+    lifetime; eviction takes it exclusively, so areas in use are never
+    removed. Least recently used areas go first.
+    """
+
+    LOCK = ".lock"
+    LAST_USED = ".last-used"
+    CLI_STATE = f"{SESSION_HOME}/.claude/projects/-project"
+
+    def __init__(self, fingerprint: str, root: str = STATE_ROOT):
+        if not fingerprint.isalnum():
+            raise ValueError(f"Invalid project fingerprint: {fingerprint!r}")
+        self.path = os.path.join(root, fingerprint)
+
+    def _lock_shared(self) -> int:
+        """Lock the area for this session; the fd survives the exec."""
+        while True:
+            os.makedirs(self.path, exist_ok=True)
+            lock_path = os.path.join(self.path, self.LOCK)
+            fd = os.open(lock_path, os.O_RDONLY | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            try:
+                if os.fstat(fd).st_ino == os.stat(lock_path).st_ino:
+                    os.set_inheritable(fd, True)
+                    return fd
+            except FileNotFoundError:
+                pass
+            # Evicted while we waited for the lock - start over
+            os.close(fd)
+
+    def enter(self, user: pwd.struct_passwd) -> Dict[str, str]:
+        """Prepare the area for a session (as root); returns env additions."""
+        self._lock_shared()
+        with open(os.path.join(self.path, self.LAST_USED), 'w') as f:
+            f.write(f"{time.time():.0f}\n")
+
+        cache, cli = os.path.join(self.path, "cache"), os.path.join(self.path, "cli")
+        for path in (cache, cli):
+            os.makedirs(path, exist_ok=True)
+            os.chown(path, user.pw_uid, user.pw_gid)
+
+        # Bind the project's CLI state over the shared location
+        os.makedirs(self.CLI_STATE, exist_ok=True)
+        path = self.CLI_STATE
+        while path != SESSION_HOME:
+            os.chown(path, user.pw_uid, user.pw_gid)
+            path = os.path.dirname(path)
+        Syscalls.mount(cli, self.CLI_STATE, MS_BIND)
+
+        return {
+            "XDG_CACHE_HOME": cache,
+            "HISTFILE": os.path.join(self.path, "bash_history"),
+            "CLAUDE_PROJECT_STATE": self.path,
+        }
+
+    @staticmethod
+    def disk_usage(path: str) -> int:
+        total = 0
+        for dirpath, dirnames, filenames in os.walk(path):
+            for name in dirnames + filenames:
+                try:
+                    total += os.lstat(os.path.join(dirpath, name)).st_blocks * 512
+                except OSError:
+                    pass
+        return total
+
+    @classmethod
+    def collect_garbage(cls, budget: int, root: str = STATE_ROOT) -> List[str]:
+        """Evict least recently used areas until the total fits the budget."""
+        try:
+            names = os.listdir(root)
+        except FileNotFoundError:
+            return []
+
+        areas: List[Tuple[float, int, str]] = []
+        for name in names:
+            path = os.path.join(root, name)
+            if name.startswith(".evict-"):
+                # Left over from an interrupted eviction
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            if not os.path.isdir(path):
+                continue
+            try:
+                last_used = os.stat(os.path.join(path, cls.LAST_USED)).st_mtime
+            except OSError:
+                last_used = os.stat(path).st_mtime
+            areas.append((last_used, cls.disk_usage(path), name))
+
+        total = sum(size for _, size, _ in areas)
+        evicted = []
+        for _, size, name in sorted(areas):
+            if total <= budget:
+                break
+            path = os.path.join(root, name)
+            try:
+                fd = os.open(os.path.join(path, cls.LOCK), os.O_RDONLY | os.O_CREAT, 0o644)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue  # a session is using it
+            # Rename first so a session starting right now gets a fresh area
+            graveyard = os.path.join(root, f".evict-{name}")
+            os.rename(path, graveyard)
+            os.close(fd)
+            shutil.rmtree(graveyard, ignore_errors=True)
+            total -= size
+            evicted.append(name)
+        return evicted
+
+
+class VolumeGC:
+    """Keeps a shared tool volume within its size budget.
+
+    Only what comes back by itself is evicted: apt .deb archives, pip and
+    npm cache entries, and packages sessions installed (pip and npm -g),
+    which a session reinstalls when it needs them again. Packages listed
+    in the image manifest (IMAGE_MANIFEST, written by the image build) are
+    never touched, the CLI itself included; without a manifest only
+    archives and caches are evicted. Units that were not accessed for
+    longest go first, and none used within MIN_IDLE.
+
+    The scan is a single os.scandir walk with one lstat per entry. Files
+    read by the scan itself (pip RECORDs) are opened with O_NOATIME, so
+    scanning does not make everything look recently used.
+    """
+
+    MIN_IDLE = 86400
+    APT_ARCHIVES = "archives"
+    SITE_PACKAGES = os.path.join("lib", "python3", "site-packages")
+    NODE_MODULES = os.path.join("lib", "node_modules")
+    # Directories written by several pip packages; only their own files go
+    SHARED_DIRS = {"bin", "__pycache__"}
+    GRAVEYARD = ".gc-evicted"
+
+    def __init__(self, root: str, budget: int, manifest: str = IMAGE_MANIFEST):
+        self.root = root
+        self.budget = budget
+        self.image_paths = self._load_manifest(manifest)
+        self.total = 0
+        # unit -> [bytes, last access, paths]
+        self.units: Dict[Tuple[str, str], list] = {}
+        self.pip_files: Dict[Tuple[str, str], List[str]] = {}
+
+    @staticmethod
+    def _read_quietly(path: str) -> str:
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_NOATIME)
+        except PermissionError:
+            fd = os.open(path, os.O_RDONLY)
+        with open(fd, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    @staticmethod
+    def _load_manifest(manifest: str) -> Optional[set]:
+        """Package paths the image shipped; None if the image recorded none."""
+        try:
+            with open(manifest, 'r', encoding='utf-8') as f:
+                return {line.rstrip("\n") for line in f if line.strip()}
+        except OSError:
+            return None
+
+    def _pip_owners(self, site: str) -> Dict[str, Tuple[str, str]]:
+        """Top-level site-packages entries -> the distribution that installed them."""
+        owners: Dict[str, Tuple[str, str]] = {}
+        claimed: Dict[str, int] = {}
+        try:
+            names = [name for name in os.listdir(site) if name.endswith(".dist-info")]
+        except OSError:
+            return owners
+        for name in names:
+            unit = ("pip", name.split("-")[0])
+            owners[name] = unit
+            try:
+                record = self._read_quietly(os.path.join(site, name, "RECORD"))
+            except OSError:
+                continue
+            shared = self.pip_files.setdefault(unit, [])
+            for row in csv.reader(record.splitlines()):
+                if not row or row[0].startswith(".."):
+                    continue
+                top = row[0].split("/", 1)[0]
+                if top in self.SHARED_DIRS:
+                    shared.append(os.path.join(site, row[0]))
+                elif top != name and owners.get(top) != unit:
+                    owners[top] = unit
+                    claimed[top] = claimed.get(top, 0) + 1
+        # Claimed by several distributions: nobody's to evict
+        for top, count in claimed.items():
+            if count > 1:
+                del owners[top]
+        return owners
+
+    def scan(self) -> None:
+        """Size the volume and collect its evictable units.
+
+        Hot path: inside a unit (or outside of any) an entry costs one
+        lstat and two additions; units are settled once per directory.
+        """
+        site = os.path.join(self.root, self.SITE_PACKAGES)
+        node_modules = os.path.join(self.root, self.NODE_MODULES)
+        # Directories whose entries are units of their own
+        parents = {site: "pip", node_modules: "npm", os.path.join(self.root, self.APT_ARCHIVES): "apt"}
+        pip_owners = self._pip_owners(site)
+        self.total = 0
+        self.units = {}
+
+        # (directory, unit it belongs to; ("cache", "") - each cache directory is a unit)
+        stack: List[Tuple[str, Optional[Tuple[str, str]]]] = [(self.root, None)]
+        while stack:
+            path, unit = stack.pop()
+            kind = parents.get(path)
+            size = 0
+            last_access = 0.0
+            try:
+                entries = os.scandir(path)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if kind is not None:
+                        self._add_child(kind, entry, st, pip_owners, node_modules, parents, stack)
+                        continue
+                    size += st.st_blocks * 512
+                    if entry.is_dir(follow_symlinks=False):
+                        # Directory atimes change on every listing, this one included
+                        if unit is None and (entry.name == "_cacache" or
+                                             entry.name == "pip" and path.endswith("/.cache")):
+                            stack.append((entry.path, ("cache", "")))
+                        else:
+                            stack.append((entry.path, unit))
+                    elif st.st_atime > last_access or st.st_mtime > last_access:
+                        last_access = max(st.st_atime, st.st_mtime)
+            self.total += size
+            if unit is not None:
+                if unit[0] == "cache":
+                    if not last_access:
+                        continue  # no files of its own
+                    unit = ("cache", path)
+                found = self.units.setdefault(unit, [0, 0.0, [path] if unit[0] == "cache" else []])
+                found[0] += size
+                found[1] = max(found[1], last_access)
+
+        # A package the image shipped stays, even when a session upgraded
+        # part of it (a new dist-info next to the image's package directory)
+        if self.image_paths is None:
+            self.units = {key: unit for key, unit in self.units.items() if key[0] in ("apt", "cache")}
+        else:
+            self.units = {key: unit for key, unit in self.units.items()
+                          if key[0] == "cache" or not any(path in self.image_paths for path in unit[2])}
+
+    def _add_child(self, kind: str, entry: os.DirEntry, st: os.stat_result,
+                   pip_owners: Dict[str, Tuple[str, str]], node_modules: str,
+                   parents: Dict[str, str], stack: list) -> None:
+        """An entry of a directory whose entries are units."""
+        size = st.st_blocks * 512
+        self.total += size
+        is_dir = entry.is_dir(follow_symlinks=False)
+        unit: Optional[Tuple[str, str]] = None
+        if kind == "pip":
+            unit = pip_owners.get(entry.name)
+        elif kind == "npm" and entry.name.startswith("@") and is_dir:
+            parents[entry.path] = "npm"  # scoped packages one level down
+        elif kind == "npm" and not entry.name.startswith("."):
+            unit = ("npm", os.path.relpath(entry.path, node_modules))
+        elif kind == "apt" and entry.name.endswith(".deb"):
+            unit = ("apt", entry.name)
+        if unit is not None:
+            found = self.units.setdefault(unit, [0, 0.0, []])
+            found[0] += size
+            found[2].append(entry.path)
+            if not is_dir and not entry.name.endswith(".dist-info"):
+                found[1] = max(found[1], st.st_atime, st.st_mtime)
+        if is_dir:
+            stack.append((entry.path, unit))
+
+    def plan(self) -> List[Tuple[Tuple[str, str], list]]:
+        """Units to evict to get within the budget, least recently used first."""
+        idle_since = time.time() - self.MIN_IDLE
+        excess = self.total - self.budget
+        chosen = []
+        for key, unit in sorted(self.units.items(), key=lambda item: item[1][1]):
+            if excess <= 0 or unit[1] > idle_since:
+                break
+            chosen.append((key, unit))
+            excess -= unit[0]
+        return chosen
+
+    def _apt_busy(self) -> bool:
+        """apt-get holds archives/lock while it downloads and installs."""
+        try:
+            fd = os.open(os.path.join(self.root, self.APT_ARCHIVES, "lock"), os.O_RDWR)
+        except OSError:
+            return False
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except OSError:
+            return True
+        finally:
+            os.close(fd)
+
+    def evict(self, chosen: List[Tuple[Tuple[str, str], list]]) -> int:
+        """Remove the units; returns the bytes reclaimed."""
+        if any(key[0] == "apt" for key, _ in chosen) and self._apt_busy():
+            logger.info(f"{self.root}: apt is running, keeping its archives this time")
+            chosen = [(key, unit) for key, unit in chosen if key[0] != "apt"]
+        graveyard = os.path.join(self.root, self.GRAVEYARD)
+        # Left over from an interrupted run
+        shutil.rmtree(graveyard, ignore_errors=True)
+        os.makedirs(graveyard, exist_ok=True)
+        reclaimed = 0
+        for number, (key, unit) in enumerate(chosen):
+            if key[0] == "cache":
+                reclaimed += self._clear_files(key[1])
+                continue
+            # Rename first so nothing sees a half-removed package
+            for index, path in enumerate(unit[2]):
+                try:
+                    os.rename(path, os.path.join(graveyard, f"{number}-{index}"))
+                except OSError:
+                    pass
+            if key[0] == "npm" and "/" in key[1]:
+                try:
+                    os.rmdir(os.path.dirname(unit[2][0]))  # the @scope once empty
+                except OSError:
+                    pass
+            for path in self.pip_files.get(key, []):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            reclaimed += unit[0]
+        shutil.rmtree(graveyard, ignore_errors=True)
+        self._remove_dangling_links()
+        return reclaimed
+
+    @staticmethod
+    def _clear_files(path: str) -> int:
+        """Remove the files of one cache directory, not its subdirectories."""
+        removed = 0
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        removed += entry.stat(follow_symlinks=False).st_blocks * 512
+                        os.unlink(entry.path)
+        except OSError:
+            pass
+        return removed
+
+    def _remove_dangling_links(self) -> None:
+        """npm -g links its executables into bin/; drop the ones of evicted packages."""
+        bin_dir = os.path.join(self.root, "bin")
+        node_modules = os.path.join(self.root, self.NODE_MODULES)
+        try:
+            entries = list(os.scandir(bin_dir))
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.is_symlink() or os.path.exists(entry.path):
+                continue
+            target = os.path.join(bin_dir, os.readlink(entry.path))
+            if os.path.normpath(target).startswith(node_modules + os.sep):
+                os.unlink(entry.path)
+
+    def run(self, dry_run: bool = False) -> int:
+        """Scan, report and (unless dry_run) evict; returns the bytes (to be) reclaimed."""
+        started = time.monotonic()
+        self.scan()
+        chosen = self.plan()
+        planned = sum(unit[0] for _, unit in chosen)
+        status = (f"{self.root}: {format_size(self.total)} of {format_size(self.budget)} "
+                  f"({len(self.units)} evictable, scanned in {time.monotonic() - started:.1f}s)")
+        if self.total <= self.budget:
+            print(f"{status} - within budget")
+            return 0
+        if not chosen:
+            print(f"{status} - over budget, nothing idle to evict")
+            return 0
+
+        kinds: Dict[str, List[int]] = {}
+        for key, unit in chosen:
+            kind = kinds.setdefault(key[0], [0, 0])
+            kind[0] += 1
+            kind[1] += unit[0]
+        verb = "would reclaim" if dry_run else "reclaiming"
+        print(f"{status} - {verb} {format_size(planned)}:")
+        for kind, (count, size) in sorted(kinds.items(), key=lambda item: -item[1][1]):
+            print(f"  {format_size(size):>8}  {count} {kind}")
+        if dry_run:
+            now = time.time()
+            packages = [(key, unit) for key, unit in chosen if key[0] in ("pip", "npm")]
+            for key, unit in sorted(packages, key=lambda item: -item[1][0])[:10]:
+                print(f"  {format_size(unit[0]):>8}  {key[0]} {key[1]} "
+                      f"(last used {(now - unit[1]) / 86400:.0f} days ago)")
+            return planned
+        return self.evict(chosen)
+
+
+class NodeCompileCache:
+    """V8 compile cache of the CLI bundle, kept across sessions.
+
+    Node 22 caches the code it compiled for cli.js in NODE_COMPILE_CACHE
+    and skips most of the compilation on the next start. The cache lives in
+    the claude-node-cache volume, pre-warmed by the image build, with one
+    directory per CLI version: a new version starts a new directory and
+    removes the others.
+
+    node itself lives in the claude-usr-local volume, which keeps the node
+    of the image that created it; check_node() warns when that one is too
+    old for the cache.
+    """
+
+    MIN_NODE = (22, 1)
+    # Set by the pool server for its workers, which repeat the warning
+    STALE_ENV = "CLAUDE_STALE_NODE"
+
+    @classmethod
+    def check_node(cls) -> None:
+        """Warn when node is too old for the cache (a claude-usr-local volume of an older image)."""
+        try:
+            result = subprocess.run(["node", "--version"], capture_output=True, text=True, timeout=10)
+            version = result.stdout.strip()
+            major, minor = (int(part) for part in version.lstrip("v").split(".")[:2])
+        except (OSError, ValueError, subprocess.SubprocessError):
+            return
+        if (major, minor) >= cls.MIN_NODE:
+            return
+        message = (f"node {version} in the claude-usr-local volume is older than Node 22 of the image - "
+                   f"no CLI compile cache. Stop the container and run docker volume rm claude-usr-local "
+                   f"to refresh it (drops tools sessions installed there).")
+        logger.warning(message)
+        os.environ[cls.STALE_ENV] = message
+
+    @staticmethod
+    def version() -> Optional[str]:
+        try:
+            with open(CLI_PACKAGE, 'r') as f:
+                return str(json.load(f)["version"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @classmethod
+    def env(cls, user: pwd.struct_passwd) -> Dict[str, str]:
+        """NODE_COMPILE_CACHE for a session (as root); empty if unavailable."""
+        version = cls.version()
+        if version is None or not os.path.isdir(NODE_CACHE_ROOT):
+            return {}
+        name = f"claude-code-{version}"
+        path = os.path.join(NODE_CACHE_ROOT, name)
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            return {"NODE_COMPILE_CACHE": path}
+        except OSError:
+            return {}
+        os.chown(path, user.pw_uid, user.pw_gid)
+        for old in os.listdir(NODE_CACHE_ROOT):
+            if old != name:
+                shutil.rmtree(os.path.join(NODE_CACHE_ROOT, old), ignore_errors=True)
+        return {"NODE_COMPILE_CACHE": path}
+
+
+class SessionCgroups:
+    """One cgroup v2 child group per pooled session, with its own limits.
+
+    All sessions otherwise share the container-wide CPU and memory limits,
+    so one Gradle build or Chromium can starve the rest. The server puts a
+    claimed worker into claude-sessions/<name> before handing it the
+    session, applies the CLAUDE_SESSION_* limits from the claim's
+    environment, and records what the group used once the session exits.
+
+    The container's own cgroup may not both hold processes and delegate
+    controllers, so setup() first moves every process into an "init" leaf.
+    docker exec then lands in PID 1's cgroup, which runc falls back to.
+    """
+
+    # Claim environment -> cgroup interface file
+    LIMITS = {
+        "CLAUDE_SESSION_CPUS": "cpu.max",
+        "CLAUDE_SESSION_MEMORY": "memory.max",
+        "CLAUDE_SESSION_CPU_WEIGHT": "cpu.weight",
+        "CLAUDE_SESSION_IO_WEIGHT": "io.weight",
+        "CLAUDE_SESSION_CPUSET": "cpuset.cpus",
+    }
+
+    def __init__(self, root: str = CGROUP_ROOT):
+        self.root = root
+        self.parent = os.path.join(root, SESSIONS_CGROUP)
+        self.enabled = False
+
+    @staticmethod
+    def _write(path: str, value: str) -> None:
+        with open(path, 'w') as f:
+            f.write(value)
+
+    @staticmethod
+    def _read(path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read()
+
+    def setup(self) -> bool:
+        """Delegate controllers to claude-sessions (server start, as root)."""
+        if not os.path.exists(os.path.join(self.root, "cgroup.controllers")):
+            logger.info("No cgroup v2 hierarchy - per-session limits disabled")
+            return False
+        try:
+            if not os.access(self.root, os.W_OK):
+                # Docker mounts it read-only; CAP_SYS_ADMIN may lift that
+                Syscalls.mount(None, self.root, MS_REMOUNT | MS_BIND)
+            init = os.path.join(self.root, "init")
+            os.makedirs(init, exist_ok=True)
+            available = self._read(os.path.join(self.root, "cgroup.controllers")).split()
+            controllers = [c for c in CGROUP_CONTROLLERS if c in available]
+            # docker exec may add processes while we move them; retry
+            for attempt in range(5):
+                for pid in self._read(os.path.join(self.root, "cgroup.procs")).split():
+                    try:
+                        self._write(os.path.join(init, "cgroup.procs"), pid)
+                    except OSError:
+                        pass  # exited meanwhile
+                try:
+                    self._enable(self.root, controllers)
+                    break
+                except OSError:
+                    if attempt == 4:
+                        raise
+            os.makedirs(self.parent, exist_ok=True)
+            self._enable(self.parent, controllers)
+        except OSError as e:
+            logger.warning(f"Cannot set up per-session cgroups: {e}")
+            return False
+        self.enabled = True
+        logger.info(f"Per-session cgroups under {self.parent} ({' '.join(controllers)})")
+        return True
+
+    def _enable(self, path: str, controllers: List[str]) -> None:
+        self._write(os.path.join(path, "cgroup.subtree_control"),
+                    " ".join(f"+{c}" for c in controllers))
+
+    @staticmethod
+    def limit_value(name: str, value: str) -> str:
+        """cgroup file content for a CLAUDE_SESSION_* value."""
+        if name == "CLAUDE_SESSION_CPUS":
+            period = 100000
+            return f"{int(float(value) * period)} {period}"
+        if name == "CLAUDE_SESSION_MEMORY":
+            return str(parse_size(value))
+        if name in ("CLAUDE_SESSION_CPU_WEIGHT", "CLAUDE_SESSION_IO_WEIGHT"):
+            weight = int(value)
+            if not 1 <= weight <= 10000:
+                raise ValueError(f"weight must be 1-10000, got {weight}")
+            return f"default {weight}" if name == "CLAUDE_SESSION_IO_WEIGHT" else str(weight)
+        return value
+
+    def create(self, name: str, pid: int, env: Dict[str, str]) -> Optional[str]:
+        """Put ``pid`` into a new session group with the requested limits."""
+        if not self.enabled:
+            return None
+        path = os.path.join(self.parent, name)
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Cannot create session cgroup {name}: {e}")
+            return None
+        for var, filename in self.LIMITS.items():
+            value = env.get(var, "").strip()
+            if not value:
+                continue
+            try:
+                self._write(os.path.join(path, filename), self.limit_value(var, value))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring {var}={value}: {e}")
+        try:
+            self._write(os.path.join(path, "cgroup.procs"), str(pid))
+        except OSError as e:
+            logger.warning(f"Cannot move worker {pid} into {name}: {e}")
+            self.remove(path)
+            return None
+        return path
+
+    def usage(self, path: str) -> Dict[str, int]:
+        """CPU time, peak memory and I/O bytes of a session group so far."""
+        usage = {"cpu_usec": 0, "user_usec": 0, "system_usec": 0,
+                 "memory_peak": 0, "io_read": 0, "io_write": 0}
+        try:
+            for line in self._read(os.path.join(path, "cpu.stat")).splitlines():
+                key, _, value = line.partition(" ")
+                if key in ("usage_usec", "user_usec", "system_usec"):
+                    usage["cpu_usec" if key == "usage_usec" else key] = int(value)
+        except OSError:
+            pass
+        try:
+            # memory.peak needs Linux 5.19
+            usage["memory_peak"] = int(self._read(os.path.join(path, "memory.peak")))
+        except (OSError, ValueError):
+            pass
+        try:
+            for line in self._read(os.path.join(path, "io.stat")).splitlines():
+                for field in line.split()[1:]:
+                    key, _, value = field.partition("=")
+                    if key == "rbytes":
+                        usage["io_read"] += int(value)
+                    elif key == "wbytes":
+                        usage["io_write"] += int(value)
+        except (OSError, ValueError):
+            pass
+        return usage
+
+    @staticmethod
+    def remove(path: str) -> bool:
+        """Drop a session group; fails while leftover processes still run in it."""
+        try:
+            os.rmdir(path)
+            return True
+        except OSError:
+            return False
+
+    def remove_finished(self) -> None:
+        """Drop groups whose leftover background processes have exited since.
+
+        Groups of running sessions are not empty, so rmdir leaves them alone.
+        """
+        if not self.enabled:
+            return
+        try:
+            names = os.listdir(self.parent)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.parent, name)
+            if os.path.isdir(path):
+                self.remove(path)
+
+
+class UsageLog:
+    """Resource usage of finished sessions, one JSON line per session."""
+
+    def __init__(self, path: str = USAGE_LOG):
+        self.path = path
+
+    def append(self, record: dict) -> None:
+        try:
+            if os.path.getsize(self.path) > USAGE_LOG_MAX:
+                os.replace(self.path, self.path + ".1")
+        except OSError:
+            pass
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.warning(f"Cannot record session usage: {e}")
+
+    def records(self) -> List[dict]:
+        records = []
+        for path in (self.path + ".1", self.path):
+            try:
+                with open(path, 'r') as f:
+                    for line in f:
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError:
+                            pass
+            except OSError:
+                pass
+        return records
+
+    def show(self) -> None:
+        """Per-project totals, heaviest CPU users first."""
+        projects: Dict[str, dict] = {}
+        for record in self.records():
+            total = projects.setdefault(record.get("project") or "?", {
+                "sessions": 0, "cpu_usec": 0, "memory_peak": 0, "io_read": 0, "io_write": 0,
+            })
+            total["sessions"] += 1
+            total["memory_peak"] = max(total["memory_peak"], record.get("memory_peak", 0))
+            for key in ("cpu_usec", "io_read", "io_write"):
+                total[key] += record.get(key, 0)
+        if not projects:
+            print("No finished sessions recorded yet")
+            return
+
+        print(f"{'sessions':>8} {'cpu time':>10} {'peak mem':>9} {'read':>9} {'written':>9}  project")
+        for project, total in sorted(projects.items(), key=lambda item: -item[1]["cpu_usec"]):
+            print(f"{total['sessions']:>8} {total['cpu_usec'] / 1e6:>9.1f}s "
+                  f"{format_size(total['memory_peak']):>9} {format_size(total['io_read']):>9} "
+                  f"{format_size(total['io_write']):>9}  {project}")
+
+
+class SessionTop:
+    """Live per-session process trees with CPU, RSS and I/O, from /proc.
+
+    Sessions are told apart by the SESSION_ID and HOST_PROJECT_PATH every
+    session process gets in its environment; a process without them
+    belongs to the session of its nearest ancestor that has them. Each
+    sample is one JSON line on stdout. Environments are read once per
+    process, so a sample costs a few small /proc reads per process.
+
+    Streams until stdin closes, i.e. until the docker exec client is gone.
+    """
+
+    TICKS = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+    # Processes listed per session, busiest first
+    MAX_PROCESSES = 8
+
+    def __init__(self):
+        # (pid, start time) -> (SESSION_ID, HOST_PROJECT_PATH) or None
+        self._environ: Dict[Tuple[int, int], Optional[Tuple[str, str]]] = {}
+        # (pid, start time) -> (cpu ticks, read bytes, written bytes)
+        self._previous: Dict[Tuple[int, int], Tuple[int, int, int]] = {}
+        self._sampled_at = 0.0
+
+    @staticmethod
+    def _stat(pid: int) -> Optional[dict]:
+        try:
+            with open(f"/proc/{pid}/stat", 'r') as f:
+                data = f.read()
+        except OSError:
+            return None
+        name = data[data.index("(") + 1:data.rindex(")")]
+        fields = data[data.rindex(")") + 2:].split()
+        return {
+            "pid": pid, "name": name, "ppid": int(fields[1]),
+            "ticks": int(fields[11]) + int(fields[12]),
+            "start": int(fields[19]), "rss": int(fields[21]) * SessionTop.PAGE_SIZE,
+        }
+
+    @staticmethod
+    def _io(pid: int) -> Tuple[int, int]:
+        read = written = 0
+        try:
+            with open(f"/proc/{pid}/io", 'r') as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key == "read_bytes":
+                        read = int(value)
+                    elif key == "write_bytes":
+                        written = int(value)
+        except (OSError, ValueError):
+            pass
+        return read, written
+
+    def _session_of(self, proc: dict) -> Optional[Tuple[str, str]]:
+        key = (proc["pid"], proc["start"])
+        if key not in self._environ:
+            session = None
+            try:
+                with open(f"/proc/{proc['pid']}/environ", 'rb') as f:
+                    env = dict(
+                        item.split(b"=", 1) for item in f.read().split(b"\0") if b"=" in item
+                    )
+                if b"SESSION_ID" in env:
+                    session = (env[b"SESSION_ID"].decode(errors="replace"),
+                               env.get(b"HOST_PROJECT_PATH", env.get(b"PROJECT_PATH", b"")).decode(errors="replace"))
+            except OSError:
+                pass
+            self._environ[key] = session
+        return self._environ[key]
+
+    def sample(self) -> dict:
+        now = time.monotonic()
+        elapsed = now - self._sampled_at if self._sampled_at else 0.0
+        self._sampled_at = now
+
+        procs = {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                proc = self._stat(int(entry))
+                if proc is not None:
+                    procs[proc["pid"]] = proc
+
+        # Attribute every process to its own or its nearest ancestor's session
+        owner: Dict[int, Optional[Tuple[str, str]]] = {}
+        for pid in procs:
+            chain = []
+            while pid in procs and pid not in owner:
+                chain.append(pid)
+                session = self._session_of(procs[pid])
+                if session is not None:
+                    owner[pid] = session
+                    break
+                pid = procs[pid]["ppid"]
+            session = owner.get(pid)
+            for link in chain:
+                owner.setdefault(link, session)
+
+        sessions: Dict[Tuple[str, str], dict] = {}
+        previous, self._previous = self._previous, {}
+        for pid, proc in procs.items():
+            session = owner.get(pid)
+            if session is None:
+                continue
+            read, written = self._io(pid)
+            key = (pid, proc["start"])
+            self._previous[key] = (proc["ticks"], read, written)
+            before = previous.get(key)
+            if before is not None and elapsed:
+                proc["cpu"] = (proc["ticks"] - before[0]) / self.TICKS / elapsed * 100
+                proc["read_rate"] = (read - before[1]) / elapsed
+                proc["write_rate"] = (written - before[2]) / elapsed
+            else:
+                proc["cpu"] = proc["read_rate"] = proc["write_rate"] = 0.0
+
+            entry = sessions.setdefault(session, {
+                "session": session[0], "project": session[1], "processes": 0,
+                "cpu": 0.0, "rss": 0, "read_rate": 0.0, "write_rate": 0.0, "tree": [],
+            })
+            entry["processes"] += 1
+            for field in ("cpu", "rss", "read_rate", "write_rate"):
+                entry[field] += proc[field]
+            entry["tree"].append(proc)
+
+        # Drop environments of processes that are gone
+        self._environ = {key: value for key, value in self._environ.items() if key[0] in procs}
+
+        for entry in sessions.values():
+            entry["tree"] = self._tree(entry["tree"])
+        return {"time": time.time(), "sessions": sorted(sessions.values(), key=lambda e: -e["cpu"])}
+
+    def _tree(self, procs: List[dict]) -> List[dict]:
+        """The session's busiest processes in tree order, with their depth."""
+        busiest = {p["pid"] for p in sorted(procs, key=lambda p: (-p["cpu"], -p["rss"]))[:self.MAX_PROCESSES]}
+        by_pid = {p["pid"]: p for p in procs}
+        children: Dict[int, List[dict]] = {}
+        for proc in procs:
+            if proc["ppid"] in by_pid:
+                children.setdefault(proc["ppid"], []).append(proc)
+
+        tree = []
+        stack = [(p, 0) for p in procs if p["ppid"] not in by_pid]
+        while stack:
+            proc, depth = stack.pop()
+            if proc["pid"] in busiest:
+                tree.append({"pid": proc["pid"], "depth": depth, "name": proc["name"],
+                             "cpu": round(proc["cpu"], 1), "rss": proc["rss"],
+                             "read_rate": proc["read_rate"], "write_rate": proc["write_rate"]})
+            stack.extend((child, depth + 1) for child in reversed(children.get(proc["pid"], [])))
+        return tree
+
+    def run(self, interval: float) -> None:
+        while True:
+            sample = self.sample()
+            try:
+                sys.stdout.write(json.dumps(sample) + "\n")
+                sys.stdout.flush()
+            except BrokenPipeError:
+                return
+            # Wait out the interval on stdin, so a closed client ends us
+            readable, _, _ = select.select([sys.stdin], [], [], interval)
+            if readable and not os.read(sys.stdin.fileno(), 4096):
+                return
+
+
+class Worker:
+    """One pre-created session process waiting to be claimed (runs as root).
+
+    Everything that does not depend on the session - the new mount
+    namespace, private propagation, the mount points - is done up front;
+    after the claim only the project bind and the exec remain.
+    """
+
+    def __init__(self, channel: socket.socket):
+        self.channel = channel
+
+    def prepare(self) -> None:
+        Syscalls.unshare(CLONE_NEWNS)
+        # Keep our mounts out of the container's namespace and vice versa
+        Syscalls.mount(None, "/", MS_REC | MS_PRIVATE)
+        os.makedirs(PROJECT_MOUNT, exist_ok=True)
+        os.makedirs(EMPTY_DIR, exist_ok=True)
+
+    def run(self) -> None:
+        """Prepare, report ready, then turn into the session once claimed."""
+        try:
+            self.prepare()
+        except OSError as e:
+            self.channel.send(json.dumps({"error": str(e)}).encode())
+            sys.exit(1)
+        self.channel.send(b'{"ready": true}')
+
+        try:
+            data, fds, _, _ = socket.recv_fds(self.channel, MAX_MESSAGE, len(STDIO_FDS))
+        except OSError:
+            sys.exit(0)
+        if not data or len(fds) != len(STDIO_FDS):
+            # The server went away without claiming us
+            sys.exit(0)
+
+        request = json.loads(data)
+        for fd, target in zip(fds, STDIO_FDS):
+            os.dup2(fd, target)
+            os.close(fd)
+        self.channel.close()
+
+        try:
+            self.enter_session(request)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    def enter_session(self, request: dict) -> None:
+        env = dict(os.environ)
+        env.pop(POOL_SIZE_ENV, None)
+        env.update(request.get("env", {}))
+
+        project_path = env.get("PROJECT_PATH", "")
+        if not project_path:
+            raise RuntimeError("No project path provided")
+        source = self.project_source(project_path)
+
+        Syscalls.mount(source, PROJECT_MOUNT, MS_BIND)
+        # The host mounts are read-only; the project itself is not
+        Syscalls.mount(None, PROJECT_MOUNT, MS_REMOUNT | MS_BIND)
+        for host_mount in HOST_MOUNTS:
+            try:
+                Syscalls.mount(EMPTY_DIR, host_mount, MS_BIND)
+            except OSError:
+                pass
+
+        # Own session with the terminal as controlling tty, so job control
+        # and Ctrl-C reach the CLI rather than the claim client
+        os.setsid()
+        if os.isatty(0):
+            fcntl.ioctl(0, termios.TIOCSCTTY, 1)
+
+        user = pwd.getpwnam(SESSION_USER)
+        fingerprint = env.get("PROJECT_FINGERPRINT", "")
+        if fingerprint:
+            try:
+                env.update(ProjectState(fingerprint).enter(user))
+            except (OSError, ValueError) as e:
+                print(f"Warning: per-project state unavailable: {e}", file=sys.stderr)
+
+        env.update(NodeCompileCache.env(user))
+        stale_node = env.pop(NodeCompileCache.STALE_ENV, None)
+        if stale_node:
+            print(f"Warning: {stale_node}", file=sys.stderr)
+
+        os.setgroups(os.getgrouplist(SESSION_USER, user.pw_gid))
+        os.setgid(user.pw_gid)
+        os.setuid(user.pw_uid)
+
+        env.update(HOME=SESSION_HOME, USER=SESSION_USER, LOGNAME=SESSION_USER)
+        os.chdir(PROJECT_MOUNT)
+        os.execvpe("claude", ["claude"] + request.get("args", []), env)
+
+    @staticmethod
+    def project_source(project_path: str) -> str:
+        """Find the host mount holding the project (same rules as the launcher)."""
+        candidates = [f"/host{project_path}"]
+        for drive in ("c", "d"):
+            if project_path.startswith(f"/{drive}/"):
+                candidates.append(f"/host_{drive}{project_path[2:]}")
+        for candidate in candidates:
+            if os.path.isdir(candidate):
+                return candidate
+        raise RuntimeError(
+            f"Cannot find project at any expected mount point\n"
+            f"Looking for: {project_path}\nTried: {', '.join(candidates)}"
+        )
+
+
+class IdleWorker:
+    """Server-side handle of a ready worker."""
+
+    def __init__(self, process: subprocess.Popen, channel: socket.socket):
+        self.process = process
+        self.channel = channel
+
+
+class PoolServer:
+    """Keeps the pool full and hands workers to claim requests.
+
+    Also the container's PID 1, so it reaps every child - workers included -
+    from one reaper thread and routes the workers' exit status to the claim
+    waiting for it.
+    """
+
+    # Back off respawning when workers cannot be created at all
+    MAX_BACKOFF = 30.0
+
+    def __init__(self, size: int, path: str):
+        self.size = size
+        self.path = path
+        self._idle: List[IdleWorker] = []
+        # Live workers, idle or claimed, and exit codes of claimed ones
+        self._workers: Dict[int, IdleWorker] = {}
+        self._exits: Dict[int, int] = {}
+        self._lock = threading.Condition()
+        self.cgroups = SessionCgroups()
+        self.usage_log = UsageLog()
+
+    def serve(self) -> None:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: sys.exit(0))
+        threading.Thread(target=self._reap, daemon=True).start()
+        self.cgroups.setup()
+        threading.Thread(target=self._collect_garbage, daemon=True).start()
+        NodeCompileCache.check_node()
+
+        if self.size == 0:
+            logger.info("Pool disabled (CLAUDE_POOL_SIZE=0)")
+            signal.pause()
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        listener.bind(self.path)
+        os.chmod(self.path, 0o600)
+        listener.listen(16)
+
+        threading.Thread(target=self._refill, daemon=True).start()
+        logger.info(f"Serving {self.size} session worker(s) on {self.path}")
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=self._handle_claim, args=(conn,), daemon=True).start()
+
+    def _spawn(self) -> Optional[IdleWorker]:
+        """Start one worker and wait until it is ready."""
+        ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        process = subprocess.Popen(
+            [sys.executable, "-IS", os.path.abspath(__file__), "worker", str(theirs.fileno())],
+            pass_fds=[theirs.fileno()],
+        )
+        theirs.close()
+        worker = IdleWorker(process, ours)
+        with self._lock:
+            self._workers[process.pid] = worker
+        ours.settimeout(10)
+        try:
+            reply = json.loads(ours.recv(MAX_MESSAGE) or b"{}")
+        except (OSError, ValueError):
+            reply = {}
+        ours.settimeout(None)
+        if not reply.get("ready"):
+            logger.warning(f"Worker failed to start: {reply.get('error', 'no reply')}")
+            process.kill()
+            ours.close()
+            return None
+        return worker
+
+    def _refill(self) -> None:
+        backoff = 0.5
+        while True:
+            with self._lock:
+                while len(self._idle) >= self.size:
+                    self._lock.wait()
+            worker = self._spawn()
+            if worker is None:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+                continue
+            backoff = 0.5
+            with self._lock:
+                self._idle.append(worker)
+
+    def _claim_worker(self) -> Optional[IdleWorker]:
+        with self._lock:
+            if not self._idle:
+                return None
+            self._lock.notify_all()  # wake the refill thread
+            return self._idle.pop(0)
+
+    def _handle_claim(self, conn: socket.socket) -> None:
+        fds: List[int] = []
+        try:
+            data, fds, _, _ = socket.recv_fds(conn, MAX_MESSAGE, len(STDIO_FDS))
+            worker = self._claim_worker() if len(fds) == len(STDIO_FDS) else None
+            if worker is None:
+                conn.send(b'{"error": "no idle worker"}')
+                return
+
+            pid = worker.process.pid
+            env = json.loads(data).get("env", {})
+            started = time.time()
+            cgroup = self.cgroups.create(f"session-{pid}", pid, env)
+
+            socket.send_fds(worker.channel, [data], fds)
+            worker.channel.close()
+            with self._lock:
+                while pid not in self._exits:
+                    self._lock.wait()
+                code = self._exits.pop(pid)
+            conn.send(json.dumps({"exit": code}).encode())
+            if cgroup:
+                self._finish_session(cgroup, env, started, code)
+        except OSError as e:
+            logger.warning(f"Claim failed: {e}")
+        finally:
+            for fd in fds:
+                os.close(fd)
+            conn.close()
+
+    def _finish_session(self, cgroup: str, env: Dict[str, str], started: float, code: int) -> None:
+        record = {
+            "session": env.get("SESSION_ID", ""),
+            "project": env.get("HOST_PROJECT_PATH") or env.get("PROJECT_PATH", ""),
+            "fingerprint": env.get("PROJECT_FINGERPRINT", ""),
+            "started": round(started),
+            "seconds": round(time.time() - started, 1),
+            "exit": code,
+            "limits": {var: env[var] for var in SessionCgroups.LIMITS if env.get(var)},
+        }
+        record.update(self.cgroups.usage(cgroup))
+        self.usage_log.append(record)
+        # Background processes the session left behind keep it until they exit
+        self.cgroups.remove(cgroup)
+
+    def _collect_garbage(self) -> None:
+        budget = state_budget()
+        volumes_collected = time.monotonic()
+        while True:
+            self.cgroups.remove_finished()
+            try:
+                for name in ProjectState.collect_garbage(budget):
+                    logger.info(f"Evicted per-project state {name}")
+            except OSError as e:
+                logger.warning(f"Per-project state GC failed: {e}")
+            if time.monotonic() - volumes_collected > VOLUME_GC_INTERVAL:
+                volumes_collected = time.monotonic()
+                for root in VOLUME_BUDGETS:
+                    try:
+                        if os.path.isdir(root):
+                            VolumeGC(root, volume_budget(root)).run()
+                    except OSError as e:
+                        logger.warning(f"GC of {root} failed: {e}")
+            time.sleep(GC_INTERVAL)
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                time.sleep(0.5)
+                continue
+            with self._lock:
+                # Anything else is an orphan re-parented to PID 1
+                worker = self._workers.pop(pid, None)
+                if worker is None:
+                    continue
+                # Already reaped - keep Popen from polling a recycled pid
+                worker.process.returncode = exit_code(status)
+                if worker in self._idle:
+                    self._idle.remove(worker)
+                    worker.channel.close()
+                else:
+                    self._exits[pid] = worker.process.returncode
+                self._lock.notify_all()
+
+
+class DetachedSessions:
+    """Sessions that outlive their terminal (``claude.py --detach-session``).
+
+    A detached session runs its claim inside a tmux server of our own, one
+    tmux session per project fingerprint. Closing the terminal only detaches
+    its client; the next claim for the same project attaches to the running
+    session instead of starting another, so any number of terminals share
+    one warm CLI process.
+
+    The tmux server keeps the environment it was started with, so it gets
+    one without the per-session variables and each session gets its own
+    with ``new-session -e``.
+    """
+
+    TMUX = ["tmux", "-L", TMUX_SOCKET]
+
+    @staticmethod
+    def available() -> bool:
+        # Inside a detached session already - the claim runs for real
+        return "TMUX" not in os.environ and shutil.which("tmux") is not None
+
+    @staticmethod
+    def _session_var(name: str) -> bool:
+        return name in SESSION_VARS or name.startswith("CLAUDE_SESSION_") or name == DETACH_ENV
+
+    @staticmethod
+    def server_running() -> bool:
+        tmpdir = os.environ.get("TMUX_TMPDIR", "/tmp")
+        return os.path.exists(os.path.join(tmpdir, f"tmux-{os.getuid()}", TMUX_SOCKET))
+
+    @classmethod
+    def exists(cls, name: str) -> bool:
+        if not cls.server_running():
+            return False
+        return subprocess.run(cls.TMUX + ["has-session", "-t", f"={name}"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+
+    @classmethod
+    def attach(cls, name: str) -> None:
+        os.execvp("tmux", cls.TMUX + ["attach-session", "-t", f"={name}"])
+
+    @classmethod
+    def start(cls, name: str, args: List[str]) -> None:
+        """Run the claim in a new detached session and attach to it."""
+        cmd = cls.TMUX + ["new-session", "-A", "-s", name]
+        for var, value in os.environ.items():
+            if cls._session_var(var) and var != DETACH_ENV:
+                cmd += ["-e", f"{var}={value}"]
+        cmd += ["--", sys.executable, "-IS", os.path.abspath(__file__), "claim"] + args
+        cmd += [";", "set-option", "-t", f"={name}:", "@project",
+                os.environ.get("HOST_PROJECT_PATH") or os.environ.get("PROJECT_PATH", "")]
+        # Look like a plain terminal: no status line, no Escape delay for the TUI
+        cmd += [";", "set-option", "-t", f"={name}:", "status", "off"]
+        cmd += [";", "set-option", "-s", "escape-time", "0"]
+        cmd += [";", "set-window-option", "-t", f"={name}:", "aggressive-resize", "on"]
+        env = {var: value for var, value in os.environ.items() if not cls._session_var(var)}
+        os.execvpe("tmux", cmd, env)
+
+    @classmethod
+    def show(cls) -> None:
+        fields = ["#{session_name}", "#{session_attached}", "#{session_created}", "#{session_activity}",
+                  "#{@project}"]
+        result = None
+        if cls.server_running():
+            result = subprocess.run(cls.TMUX + ["list-sessions", "-F", "\t".join(fields)],
+                                    capture_output=True, text=True)
+        if result is None or result.returncode != 0 or not result.stdout.strip():
+            print("No detached sessions")
+            return
+        now = time.time()
+        print(f"{'session':<16} {'clients':>7} {'started':>8} {'idle':>8}  project")
+        for line in result.stdout.splitlines():
+            name, clients, created, activity, project = line.split("\t")
+            print(f"{name:<16} {clients:>7} {format_duration(now - int(created)):>8} "
+                  f"{format_duration(now - int(activity)):>8}  {project}")
+
+    @classmethod
+    def kill(cls, name: str) -> bool:
+        if not cls.exists(name):
+            print(f"No detached session {name}", file=sys.stderr)
+            return False
+        return subprocess.run(cls.TMUX + ["kill-session", "-t", f"={name}"]).returncode == 0
+
+
+def claim(args: List[str]) -> None:
+    """Run a session in a pooled worker, or fall back to the namespace launcher.
+
+    With a detached session of the project running, attaches to it instead;
+    with CLAUDE_DETACH=1, starts one.
+    """
+    name = os.environ.get("PROJECT_FINGERPRINT", "")
+    if name and DetachedSessions.available():
+        if DetachedSessions.exists(name):
+            if args:
+                print("Attaching to the running session - arguments ignored", file=sys.stderr)
+            DetachedSessions.attach(name)
+        if os.environ.get(DETACH_ENV) == "1":
+            DetachedSessions.start(name, args)
+    try:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        conn.connect(socket_path())
+        request = {"env": dict(os.environ), "args": args}
+        socket.send_fds(conn, [json.dumps(request).encode()], STDIO_FDS)
+        # The worker owns the terminal from here; just wait for its exit
+        for sig in (signal.SIGINT, signal.SIGQUIT, signal.SIGHUP, signal.SIGTSTP):
+            signal.signal(sig, signal.SIG_IGN)
+        reply = json.loads(conn.recv(MAX_MESSAGE) or b"{}")
+    except (OSError, ValueError):
+        reply = {}
+
+    if "exit" in reply:
+        sys.exit(reply["exit"])
+    os.execv(FALLBACK_LAUNCHER, [FALLBACK_LAUNCHER] + args)
+
+
+def main() -> None:
+    """Main entry point."""
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "serve":
+        PoolServer(pool_size(), socket_path()).serve()
+    elif command == "worker":
+        Worker(socket.socket(fileno=int(sys.argv[2]))).run()
+    elif command == "claim":
+        claim(sys.argv[2:])
+    elif command == "sessions":
+        DetachedSessions.show()
+    elif command == "attach" and len(sys.argv) > 2:
+        if not DetachedSessions.exists(sys.argv[2]):
+            print(f"No detached session {sys.argv[2]}", file=sys.stderr)
+            sys.exit(1)
+        DetachedSessions.attach(sys.argv[2])
+    elif command == "kill" and len(sys.argv) > 2:
+        sys.exit(0 if DetachedSessions.kill(sys.argv[2]) else 1)
+    elif command == "gc":
+        dry_run = "--dry-run" in sys.argv[2:]
+        if not dry_run:
+            for name in ProjectState.collect_garbage(state_budget()):
+                print(f"Evicted per-project state {name}")
+        for root in VOLUME_BUDGETS:
+            if os.path.isdir(root):
+                VolumeGC(root, volume_budget(root)).run(dry_run)
+    elif command == "usage":
+        UsageLog().show()
+    elif command == "top":
+        SessionTop().run(float(sys.argv[2]) if len(sys.argv) > 2 else 2.0)
+    else:
+        print(f"Usage: {os.path.basename(sys.argv[0])} "
+              f"serve | claim [ARGS...] | sessions | attach NAME | kill NAME | "
+              f"gc [--dry-run] | usage | top [INTERVAL]", file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
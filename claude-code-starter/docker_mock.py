@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Local mock of the Docker Engine API served over a Unix socket.
+
+Used to exercise and time the DockerManager backends without a real daemon:
+
+    python docker_mock.py --serve /tmp/docker.sock
+    python docker_mock.py --compare
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import socketserver
+import urllib.parse
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Set
+
+API_VERSION = "1.41"
+
+
+def fake_id(name: str) -> str:
+    """Stable 64-hex-digit ID for an image or container name."""
+    return hashlib.sha256(name.encode('utf-8')).hexdigest()
+
+
+class MockState:
+    """Images and containers known to the mock daemon."""
+
+    def __init__(
+        self,
+        images: Optional[Set[str]] = None,
+        containers: Optional[Dict[str, str]] = None,
+        start_delay: float = 0.0,
+        probe_delay: float = 0.0,
+        loads: Optional[Dict[str, float]] = None
+    ):
+        self.images = set(images or ())
+        # container name -> "running" | "paused" | "exited"
+        self.containers = dict(containers or {})
+        # Simulated slow starts: how long "start" takes, and how long after
+        # starting the healthcheck command keeps failing
+        self.start_delay = start_delay
+        self.probe_delay = probe_delay
+        # Simulated load per running container: CPU cores in use; memory
+        # use follows as a tenth of the limit per core
+        self.loads = dict(loads or {})
+        self.started_at: Dict[str, float] = {}
+        self.execs: Dict[str, str] = {}
+        # Create requests of containers made through the API, by name
+        self.created: Dict[str, dict] = {}
+        self.events: List[dict] = []
+        self.lock = threading.Condition()
+        self.requests = 0
+
+    def emit(self, name: str, action: str) -> None:
+        """Record a container event; caller holds the lock."""
+        self.events.append({
+            "Type": "container",
+            "Action": action,
+            "status": action,
+            "id": fake_id(name),
+            "Actor": {"ID": fake_id(name), "Attributes": {"name": name}},
+            "time": int(time.time()),
+            "timeNano": time.time_ns(),
+        })
+        self.lock.notify_all()
+
+    def set_running(self, name: str) -> None:
+        """Mark a container running and emit its start event; caller holds the lock."""
+        self.containers[name] = "running"
+        self.started_at[name] = time.monotonic()
+        self.emit(name, "start")
+
+
+class MockDockerHandler(BaseHTTPRequestHandler):
+    """Handles the subset of Engine API endpoints the launcher uses."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "MockDocker"
+
+    def log_message(self, format: str, *args) -> None:
+        """Silence per-request logging."""
+        pass
+
+    @property
+    def state(self) -> MockState:
+        return self.server.state
+
+    def _send(self, status: int, body=None) -> None:
+        payload = b""
+        content_type = "text/plain; charset=utf-8"
+        if isinstance(body, (dict, list)):
+            payload = json.dumps(body).encode('utf-8')
+            content_type = "application/json"
+        elif body is not None:
+            payload = str(body).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header("Api-Version", API_VERSION)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _route(self) -> None:
+        parsed = urllib.parse.urlsplit(self.path)
+        parts = [urllib.parse.unquote(p) for p in parsed.path.split("/") if p]
+        # Strip the optional /v1.xx version prefix
+        if parts and parts[0].startswith("v1."):
+            parts = parts[1:]
+        query = urllib.parse.parse_qs(parsed.query)
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+
+        if parts == ["events"]:
+            return self._stream_events(query)
+
+        if len(parts) == 3 and parts[0] == "containers" and parts[2] == "start" \
+                and self.state.start_delay:
+            # Slow start: the container comes up in the background
+            name = parts[1]
+            def delayed_start() -> None:
+                time.sleep(self.state.start_delay)
+                with self.state.lock:
+                    self.state.set_running(name)
+            if self.state.containers.get(name) == "exited":
+                threading.Thread(target=delayed_start, daemon=True).start()
+                return self._send(204)
+
+        with self.state.lock:
+            self.state.requests += 1
+            self._dispatch(parts, query, body)
+
+    def _stream_events(self, query: Dict[str, List[str]]) -> None:
+        """Stream matching events as chunked JSON lines until the client leaves."""
+        filters = json.loads(query.get("filters", ["{}"])[0])
+        names = set(filters.get("container", []))
+        actions = set(filters.get("event", []))
+        since = float(query.get("since", ["0"])[0])
+
+        self.send_response(200)
+        self.send_header("Api-Version", API_VERSION)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        sent = 0
+        try:
+            while True:
+                with self.state.lock:
+                    while sent == len(self.state.events):
+                        self.state.lock.wait()
+                    pending = self.state.events[sent:]
+                    sent = len(self.state.events)
+                for event in pending:
+                    if event["time"] < since:
+                        continue
+                    if names and event["Actor"]["Attributes"]["name"] not in names:
+                        continue
+                    if actions and event["Action"].split(":")[0] not in actions:
+                        continue
+                    data = json.dumps(event).encode('utf-8') + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+        except OSError:
+            pass
+
+    def _dispatch(self, parts: List[str], query: Dict[str, List[str]], body: dict) -> None:
+        method = self.command
+        state = self.state
+
+        if parts == ["_ping"]:
+            return self._send(200, "OK")
+
+        if parts == ["version"]:
+            return self._send(200, {
+                "Version": "mock",
+                "ApiVersion": API_VERSION,
+                "MinAPIVersion": "1.24",
+                "Os": "linux",
+                "Arch": "amd64",
+            })
+
+        if parts == ["images", "json"]:
+            # docker images -q <ref> filters by reference
+            refs = []
+            for raw in query.get("filters", []):
+                refs.extend(json.loads(raw).get("reference", {}).keys())
+            matching = [i for i in sorted(state.images) if not refs or i in refs]
+            return self._send(200, [
+                {"Id": f"sha256:{fake_id(i)}", "RepoTags": [i]} for i in matching
+            ])
+
+        if len(parts) == 3 and parts[0] == "images" and parts[2] == "json":
+            name = parts[1]
+            if name not in state.images:
+                return self._send(404, {"message": f"No such image: {name}"})
+            return self._send(200, {"Id": f"sha256:{fake_id(name)}", "RepoTags": [name]})
+
+        if parts == ["containers", "json"]:
+            filters = json.loads(query.get("filters", ["{}"])[0])
+            names = filters.get("name", [])
+            return self._send(200, [
+                {"Id": fake_id(name), "Names": [f"/{name}"], "State": status}
+                for name, status in sorted(state.containers.items())
+                if not names or any(n in name for n in names)
+            ])
+
+        if parts == ["containers", "create"] and method == "POST":
+            name = query.get("name", [""])[0]
+            if name in state.containers:
+                return self._send(409, {"message": f"Conflict. The container name \"/{name}\" is already in use"})
+            if body.get("Image") not in state.images:
+                return self._send(404, {"message": f"No such image: {body.get('Image')}"})
+            state.containers[name] = "exited"
+            state.created[name] = body
+            state.emit(name, "create")
+            return self._send(201, {"Id": fake_id(name), "Warnings": []})
+
+        if len(parts) >= 3 and parts[0] == "containers":
+            name, action = parts[1], parts[2]
+            # Containers can be referred to by ID as well
+            name = next((known for known in state.containers if fake_id(known) == name), name)
+            if name not in state.containers:
+                return self._send(404, {"message": f"No such container: {name}"})
+
+            if action == "json" and method == "GET":
+                running = state.containers[name] in ("running", "paused")
+                image = state.created.get(name, {}).get("Image") or min(state.images, default="")
+                return self._send(200, {
+                    "Id": fake_id(name),
+                    "Name": f"/{name}",
+                    "Image": f"sha256:{fake_id(image)}",
+                    "State": {
+                        "Status": state.containers[name],
+                        "Running": running,
+                        "Paused": state.containers[name] == "paused",
+                    },
+                    "Config": {
+                        "Healthcheck": {"Test": ["CMD", "test", "-f", "/usr/local/bin/claude-session"]},
+                    },
+                })
+
+            if action == "stats" and method == "GET":
+                cores = state.loads.get(name, 0.0) if state.containers[name] == "running" else 0.0
+                limit = 8 * 1024 ** 3
+                return self._send(200, {
+                    "cpu_stats": {"cpu_usage": {"total_usage": int(time.monotonic() * cores * 1e9)}},
+                    "memory_stats": {"usage": int(limit * cores / 10), "limit": limit, "stats": {}},
+                })
+
+            if action == "start" and method == "POST":
+                if state.containers[name] == "running":
+                    return self._send(304)
+                state.set_running(name)
+                return self._send(204)
+
+            if action in ("pause", "unpause") and method == "POST":
+                expected = "running" if action == "pause" else "paused"
+                if state.containers[name] != expected:
+                    return self._send(409, {"message": f"Container {name} is not {expected}"})
+                state.containers[name] = "paused" if action == "pause" else "running"
+                state.emit(name, action)
+                return self._send(204)
+
+            if action == "stop" and method == "POST":
+                state.containers[name] = "exited"
+                state.emit(name, "die")
+                return self._send(204)
+
+            if action == "exec" and method == "POST":
+                if state.containers[name] != "running":
+                    return self._send(409, {"message": f"Container {name} is not running"})
+                exec_id = fake_id(f"{name}:{time.time_ns()}")
+                state.execs[exec_id] = name
+                return self._send(201, {"Id": exec_id})
+
+        if len(parts) == 3 and parts[0] == "exec" and parts[1] in state.execs:
+            name = state.execs[parts[1]]
+            if parts[2] == "start" and method == "POST":
+                return self._send(200)
+            if parts[2] == "json" and method == "GET":
+                up_for = time.monotonic() - state.started_at.get(name, 0.0)
+                healthy = state.containers[name] == "running" and up_for >= state.probe_delay
+                return self._send(200, {"Running": False, "ExitCode": 0 if healthy else 1})
+
+        self._send(404, {"message": f"page not found: {self.path}"})
+
+    do_GET = _route
+    do_HEAD = _route
+    do_POST = _route
+
+
+class MockDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded HTTP server bound to a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, state: MockState):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.state = state
+        super().__init__(socket_path, MockDockerHandler)
+
+    def get_request(self):
+        # Unix sockets have no peer address; BaseHTTPRequestHandler expects one
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+    def start(self) -> threading.Thread:
+        """Serve in a background thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        """Stop serving and remove the socket file."""
+        self.shutdown()
+        self.server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def _probe_sequence(manager) -> None:
+    """The docker probes a launch performs before the exec."""
+    manager.check_docker_running()
+    manager.get_available_image()
+    manager.container_status()
+
+
+def compare_backends(iterations: int) -> None:
+    """Time the Engine API and CLI backends against the same mock daemon."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from claude import DockerManager
+
+    tmp_dir = tempfile.mkdtemp(prefix="docker-mock-")
+    socket_path = os.path.join(tmp_dir, "docker.sock")
+    state = MockState(
+        images={"claude-code-container:slim"},
+        containers={DockerManager.CONTAINER_NAME: "running"},
+    )
+    server = MockDockerServer(socket_path, state)
+    server.start()
+
+    os.environ["DOCKER_HOST"] = f"unix://{socket_path}"
+    backends = ["api"]
+    if shutil.which("docker"):
+        backends.append("cli")
+    else:
+        print("docker CLI not found on PATH - timing the Engine API backend only")
+
+    try:
+        for backend in backends:
+            os.environ[DockerManager.BACKEND_ENV] = backend
+            DockerManager._api = None
+            DockerManager._api_resolved = False
+
+            _probe_sequence(DockerManager)  # warm-up
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                _probe_sequence(DockerManager)
+                samples.append((time.perf_counter() - start) * 1000)
+
+            samples.sort()
+            median = samples[len(samples) // 2]
+            print(f"{backend:>4}: median {median:8.2f} ms   "
+                  f"min {samples[0]:8.2f} ms   max {samples[-1]:8.2f} ms   "
+                  f"({iterations} launches)")
+    finally:
+        server.stop()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--serve", metavar="SOCKET", help="serve the mock API on SOCKET until interrupted")
+    parser.add_argument("--image", action="append", default=[], help="image reference to expose (repeatable)")
+    parser.add_argument("--container", action="append", default=[],
+                        help="NAME=running|exited container to expose (repeatable)")
+    parser.add_argument("--start-delay", type=float, default=0.0,
+                        help="seconds a container takes to come up after start")
+    parser.add_argument("--probe-delay", type=float, default=0.0,
+                        help="seconds after start before the healthcheck passes")
+    parser.add_argument("--load", action="append", default=[],
+                        help="NAME=CORES simulated CPU load of a container (repeatable)")
+    parser.add_argument("--compare", action="store_true", help="time the API and CLI backends side by side")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_backends(args.iterations)
+        return
+
+    if not args.serve:
+        parser.error("one of --serve or --compare is required")
+
+    containers = dict(c.split("=", 1) for c in args.container)
+    loads = {name: float(cores) for name, cores in (l.split("=", 1) for l in args.load)}
+    state = MockState(set(args.image), containers, args.start_delay, args.probe_delay, loads)
+    server = MockDockerServer(args.serve, state)
+    print(f"Mock Docker Engine API listening on unix://{args.serve}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.serve)
+
+
+if __name__ == "__main__":
+    main()
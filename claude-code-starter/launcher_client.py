@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Thin client for the launcher daemon (``claude.py --daemon``).
+
+Run it instead of claude.py once the daemon is up: it imports only the
+standard library, asks the daemon for the ready-made docker exec command
+and runs it. Whenever the daemon cannot serve the launch - not running,
+launcher flags, anything needing the terminal - it hands over to
+claude.py's main, which does everything in-process.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LauncherClient:
+    """Thin client for the launcher daemon."""
+
+    CONNECT_TIMEOUT = 0.5
+    # Creating the container on a cold daemon can take minutes
+    RESPONSE_TIMEOUT = 300
+    # Host variables the daemon needs to build the session (limits, detach)
+    ENV_PREFIX = "CLAUDE_"
+    # docker exec failing this soon may mean the container went away
+    STALE_EXEC_WINDOW = 5.0
+
+    @staticmethod
+    def socket_path() -> Path:
+        """The daemon socket in claude.py's STATE_DIR."""
+        state_dir = Path(os.environ.get("CLAUDE_LAUNCHER_HOME", Path.home() / ".claude-launcher"))
+        return state_dir / "launcher.sock"
+
+    @classmethod
+    def request(cls, payload: dict) -> Optional[dict]:
+        """Send one request; None when no daemon is listening."""
+        path = cls.socket_path()
+        if not hasattr(socket, "AF_UNIX") or not path.exists():
+            return None
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(cls.CONNECT_TIMEOUT)
+                sock.connect(str(path))
+                sock.settimeout(cls.RESPONSE_TIMEOUT)
+                sock.sendall(json.dumps(payload).encode('utf-8') + b"\n")
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+            return json.loads(line) if line else None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Launcher daemon unavailable: {e}")
+            return None
+
+    @classmethod
+    def run_session(cls, argv: List[str]) -> Optional[bool]:
+        """Run a session the daemon prepared.
+
+        Returns None when the daemon did not serve the launch, False when
+        it did but the container turned out to be gone, True otherwise.
+        """
+        response = cls.request({
+            "op": "session",
+            "cwd": os.getcwd(),
+            "argv": argv,
+            "env": {var: value for var, value in os.environ.items() if var.startswith(cls.ENV_PREFIX)},
+        })
+        if response is None or not response.get("ok"):
+            return None
+
+        logger.info(f"Starting Claude session in: {response['project']}")
+        started = time.monotonic()
+        try:
+            result = subprocess.run(response["command"], check=False)
+        except KeyboardInterrupt:
+            return True
+        if result.returncode != 0 and time.monotonic() - started < cls.STALE_EXEC_WINDOW:
+            status = cls.request({"op": "status", "container": response["container"]})
+            if status is not None and not status.get("running"):
+                return False
+        if result.returncode in (126, 127):
+            logger.error("Claude command not found in container - rebuild the image: python setup.py")
+        return True
+
+
+def main() -> None:
+    """Launch through the daemon, or fall back to claude.py."""
+    # Same format as claude.py, which keeps it if we fall back
+    logging.basicConfig(
+        level=logging.INFO,
+        format='[%(asctime)s] %(levelname)s: %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    served = LauncherClient.run_session(sys.argv[1:])
+    if served:
+        return
+
+    # claude.py re-checks everything itself; the daemon already said no
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import claude
+    sys.argv.insert(1, "--no-daemon")
+    if served is False:
+        sys.argv.insert(1, "--no-cache")
+    claude.main()
+
+
+if __name__ == "__main__":
+    main()
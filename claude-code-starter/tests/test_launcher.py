@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for claude.py against the fake docker of launcher-benchmark (run with python -m pytest)."""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+import unittest
+import importlib.util
+from pathlib import Path
+
+STARTER_DIR = Path(__file__).resolve().parent.parent
+FAKE_DOCKER = STARTER_DIR.parent / "launcher-benchmark" / "fake_docker.py"
+
+
+@unittest.skipIf(sys.platform == "win32", "the fake docker shims are shell scripts")
+class FakeDockerTestCase(unittest.TestCase):
+    """Loads claude.py with the fake docker on PATH and a private state dir."""
+
+    IMAGE = "claude-code-container:full"
+    CONTAINERS: dict = {}
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp(prefix="claude-launcher-test-"))
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        saved_env, saved_cwd = dict(os.environ), os.getcwd()
+        self.addCleanup(os.chdir, saved_cwd)
+        self.addCleanup(lambda: (os.environ.clear(), os.environ.update(saved_env)))
+
+        bin_dir = self.root / "bin"
+        bin_dir.mkdir()
+        for name, prefix in (("docker", ""), ("docker-compose", "compose ")):
+            shim = bin_dir / name
+            shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_DOCKER}" {prefix}"$@"\n',
+                            encoding='utf-8')
+            shim.chmod(0o755)
+        self.state_file = self.root / "docker-state.json"
+        self.state_file.write_text(json.dumps({
+            "images": [self.IMAGE],
+            "containers": self.CONTAINERS,
+            "compose_container": "claude-persistent",
+        }), encoding='utf-8')
+
+        os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+        os.environ["FAKE_DOCKER_STATE"] = str(self.state_file)
+        os.environ["CLAUDE_LAUNCHER_HOME"] = str(self.root / "state")
+        os.environ["CLAUDE_DOCKER_BACKEND"] = "cli"
+        os.environ.pop("DOCKER_HOST", None)
+        # Auto-pause is opt-in: no idle watcher may be left behind
+        os.environ.pop("CLAUDE_IDLE_PAUSE", None)
+
+        spec = importlib.util.spec_from_file_location("claude_under_test", STARTER_DIR / "claude.py")
+        self.claude = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.claude)
+        # No docker compose config to read - compose creates the container
+        self.claude.ComposeSpec.up = classmethod(lambda cls, env, project: None)
+
+    def docker_state(self) -> dict:
+        return json.loads(self.state_file.read_text(encoding='utf-8'))
+
+
+class StaleLaunchCacheTest(FakeDockerTestCase):
+    """A cached launch whose container is gone re-checks and recreates it."""
+
+    # The cached container has been removed since
+    CONTAINERS = {}
+
+    def test_stale_cache_is_invalidated_and_retried(self):
+        claude = self.claude
+        claude.LaunchStateCache.save(claude.LaunchState(
+            image_name=self.IMAGE,
+            image_id="sha256:old",
+            container_id="removed-container-id",
+            container_state=claude.ContainerStatus.RUNNING.value,
+            checked_at=time.time(),
+        ))
+
+        launcher = claude.ClaudeLauncher()
+        self.assertTrue(launcher.load_cached_state())
+        os.chdir(self.root)
+        launcher.launch_claude([], container_ready=True)
+
+        state = self.docker_state()
+        self.assertIn("compose-up claude-persistent", state.get("log", []))
+        cached = claude.LaunchStateCache.load()
+        self.assertIsNotNone(cached)
+        self.assertEqual(cached.container_id, state["containers"]["claude-persistent"]["id"])
+        self.assertFalse((self.root / "state" / "idle.log").exists())
+
+
+class BlueGreenUpgradeTest(FakeDockerTestCase):
+    """An upgrade starts the other generation without touching the caller's state."""
+
+    CONTAINERS = {
+        "claude-persistent": {"id": "blue-id", "state": "running", "image": "claude-code-container:old"},
+    }
+
+    def test_upgrade_passes_name_and_target_explicitly(self):
+        claude = self.claude
+        os.environ.pop("DOCKER_TARGET", None)
+        spawned = []
+        real_popen = claude.subprocess.Popen
+
+        def popen(cmd, *args, **kwargs):
+            if "--retire" in cmd:
+                spawned.append(cmd)
+                return None
+            return real_popen(cmd, *args, **kwargs)
+
+        claude.subprocess.Popen = popen
+        self.addCleanup(setattr, claude.subprocess, "Popen", real_popen)
+
+        claude.BlueGreen.upgrade()
+
+        green = self.docker_state()["containers"].get(claude.BlueGreen.GREEN)
+        self.assertIsNotNone(green)
+        self.assertEqual(green["target"], "full")
+        self.assertEqual(claude.BlueGreen.active(), claude.BlueGreen.GREEN)
+        self.assertEqual(spawned[0][-1], claude.BlueGreen.BLUE)
+        # Nothing leaks into a process (such as the daemon) that runs it
+        self.assertEqual(claude.DockerManager.CONTAINER_NAME, claude.BlueGreen.BLUE)
+        self.assertNotIn("DOCKER_TARGET", os.environ)
+
+
+class LauncherDaemonTest(FakeDockerTestCase):
+    """The daemon runs a probing launch's checks and builds the session command."""
+
+    CONTAINERS = {
+        "claude-persistent": {"id": "blue-id", "state": "running", "image": FakeDockerTestCase.IMAGE},
+    }
+
+    def session(self, argv, env=None):
+        daemon = self.claude.LauncherDaemon()
+        return daemon.handle({"op": "session", "cwd": str(self.root), "argv": argv, "env": env or {}})
+
+    def test_session_command(self):
+        response = self.session(["--resume", "--", "--debug"], {"CLAUDE_SESSION_MEMORY": "1G"})
+        self.assertTrue(response["ok"], response)
+        command = response["command"]
+        self.assertEqual(response["container"], "claude-persistent")
+        self.assertIn("CLAUDE_SESSION_MEMORY=1G", command)
+        self.assertEqual(command[-2:], ["--resume", "--debug"])
+
+    def test_launcher_flags_are_declined(self):
+        self.assertFalse(self.session(["--session-memory", "1G"])["ok"])
+        self.assertFalse(self.session(["--no-cache"])["ok"])
+
+    def test_changed_container_drops_the_launch_cache(self):
+        claude = self.claude
+        claude.LaunchStateCache.save(claude.LaunchState(
+            image_name=self.IMAGE,
+            image_id=f"sha256:{claude.hashlib.sha256(self.IMAGE.encode()).hexdigest()}",
+            container_id="recreated-since",
+            container_state=claude.ContainerStatus.RUNNING.value,
+            checked_at=time.time(),
+        ))
+        self.assertTrue(claude.LauncherDaemon().prepare()["ok"])
+        self.assertIsNone(claude.LaunchStateCache.load())
+
+
+class LauncherClientTest(unittest.TestCase):
+    """launcher_client.py talks to the daemon without loading claude.py."""
+
+    def test_imports_only_the_standard_library(self):
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, launcher_client; print('claude' in sys.modules)"],
+            cwd=STARTER_DIR, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+class LauncherArgsTest(unittest.TestCase):
+    """Launcher flags are only taken from before ``--``; Claude gets the rest."""
+
+    def setUp(self):
+        spec = importlib.util.spec_from_file_location("claude_args_under_test", STARTER_DIR / "claude.py")
+        self.claude = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.claude)
+        saved_argv = sys.argv
+        self.addCleanup(setattr, sys, "argv", saved_argv)
+
+    def test_flags_after_separator_reach_claude(self):
+        claude = self.claude
+        sys.argv = ["claude.py", "--session-memory=4G", "--no-cache", "--", "--no-cache", "--memory", "1G"]
+        self.assertEqual(claude._pop_option("--session-memory"), "4G")
+        self.assertTrue(claude._pop_flag("--no-cache"))
+        self.assertFalse(claude._pop_flag("--no-cache"))
+        self.assertIsNone(claude._pop_option("--memory"))
+        own, rest = claude._launcher_args()
+        self.assertEqual(own + rest[1:], ["--no-cache", "--memory", "1G"])
+
+
+if __name__ == "__main__":
+    unittest.main()
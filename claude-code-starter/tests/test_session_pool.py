@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for container/session_pool.py (run with python -m pytest)."""
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import importlib.util
+from pathlib import Path
+
+SESSION_POOL = Path(__file__).resolve().parent.parent / "container" / "session_pool.py"
+spec = importlib.util.spec_from_loader(
+    "session_pool", importlib.machinery.SourceFileLoader("session_pool", str(SESSION_POOL))
+)
+session_pool = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(session_pool)
+
+
+class VolumeGCTest(unittest.TestCase):
+    """Image packages in /usr/local survive gc, session-installed ones do not."""
+
+    IMAGE_PACKAGES = ["@anthropic-ai/claude-code", "typescript", "npm"]
+    SESSION_PACKAGES = ["left-pad", "@someone/tool"]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="volume-gc-")
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.node_modules = os.path.join(self.root, "lib", "node_modules")
+        # Everything older than MIN_IDLE, the image's packages oldest of all
+        self.package_age = {name: 40 * 86400 for name in self.IMAGE_PACKAGES}
+        self.package_age.update({name: 10 * 86400 for name in self.SESSION_PACKAGES})
+        for name, age in self.package_age.items():
+            self._package(name, age)
+        self.manifest = os.path.join(self.root, "image-manifest")
+        with open(self.manifest, 'w', encoding='utf-8') as f:
+            for name in self.IMAGE_PACKAGES:
+                f.write(os.path.join(self.node_modules, name) + "\n")
+
+    def _package(self, name: str, age: int) -> None:
+        path = os.path.join(self.node_modules, name)
+        os.makedirs(path)
+        data = os.path.join(path, "index.js")
+        with open(data, 'wb') as f:
+            f.write(os.urandom(64 << 10))
+        then = time.time() - age
+        os.utime(data, (then, then))
+
+    def _installed(self):
+        return {name for name in self.package_age
+                if os.path.isdir(os.path.join(self.node_modules, name))}
+
+    def test_image_packages_survive(self):
+        gc = session_pool.VolumeGC(self.root, budget=0, manifest=self.manifest)
+        gc.run(dry_run=False)
+        self.assertEqual(self._installed(), set(self.IMAGE_PACKAGES))
+
+    def test_without_manifest_no_packages_evicted(self):
+        gc = session_pool.VolumeGC(self.root, budget=0, manifest=os.path.join(self.root, "missing"))
+        gc.run(dry_run=False)
+        self.assertEqual(self._installed(), set(self.package_age))
+
+
+if __name__ == "__main__":
+    unittest.main()
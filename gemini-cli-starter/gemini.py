@@ -4,12 +4,23 @@
 
 import subprocess
 import os
+import re
 import sys
 import time
+import json
+import shutil
+import tempfile
+import socket
 import logging
 import hashlib
+import queue
+import threading
+import http.client
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Any, Callable, Dict
 from dataclasses import dataclass
 from enum import Enum
 
@@ -25,6 +36,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Launcher state (the cached compose model, the start lock)
+STATE_DIR = Path(os.environ.get("GEMINI_LAUNCHER_HOME", Path.home() / ".gemini-launcher"))
+
 
 class ContainerStatus(Enum):
     """Container status enumeration."""
@@ -41,17 +55,546 @@ class ContainerInfo:
     message: str
 
 
+@dataclass
+class ReadinessResult:
+    """Outcome of waiting for the container to become usable."""
+    ready: bool
+    waited: float
+    signal: str
+
+
 class DockerContainerError(Exception):
     """Custom exception for Docker container errors."""
     pass
 
 
+class Tracer:
+    """Records timed spans of a launch as Chrome trace events.
+
+    Off by default; ``span`` then hands out one shared no-op context
+    manager, so instrumented code pays a single attribute check.
+    """
+
+    SUMMARY_TOP = 3
+
+    _events: Optional[List[dict]] = None
+    _path: Optional[str] = None
+    _origin = 0.0
+    _off = nullcontext()
+
+    @classmethod
+    def enable(cls, path: str) -> None:
+        """Start recording; the trace is written to ``path`` by ``finish``."""
+        cls._events = []
+        cls._path = path
+        cls._origin = time.perf_counter()
+
+    @classmethod
+    def span(cls, name: str, cat: str = "launcher", **args: Any):
+        """Context manager timing one phase."""
+        if cls._events is None:
+            return cls._off
+        return cls._record(name, cat, args)
+
+    @classmethod
+    @contextmanager
+    def _record(cls, name: str, cat: str, args: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            cls._events.append({
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - cls._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    @classmethod
+    def instant(cls, name: str, **args: Any) -> None:
+        """Mark a point in time, e.g. handing over to the interactive session."""
+        if cls._events is None:
+            return
+        cls._events.append({
+            "name": name,
+            "cat": "launcher",
+            "ph": "i",
+            "s": "p",
+            "ts": (time.perf_counter() - cls._origin) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+
+    @classmethod
+    def summary(cls) -> str:
+        """One line naming the slowest phases (longest single span of each)."""
+        longest: Dict[str, float] = {}
+        for event in cls._events or ():
+            if event["ph"] == "X":
+                longest[event["name"]] = max(longest.get(event["name"], 0.0), event["dur"] / 1e6)
+        slowest = sorted(longest.items(), key=lambda item: item[1], reverse=True)[:cls.SUMMARY_TOP]
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest) or "no spans"
+
+    @classmethod
+    def finish(cls) -> None:
+        """Write the trace file and log the summary; later calls do nothing."""
+        if cls._events is None or cls._path is None:
+            return
+        path, cls._path = cls._path, None
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"traceEvents": cls._events, "displayTimeUnit": "ms"}, f)
+        except OSError as e:
+            logger.warning(f"Could not write trace to {path}: {e}")
+            return
+        logger.info(f"Trace written to {path} - slowest: {cls.summary()}")
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: float = 5):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        """Connect to the Unix socket instead of a TCP host."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerEngineAPI:
+    """Minimal Docker Engine API client reusing keep-alive connections.
+
+    Each thread gets its own connection so concurrent probes do not
+    interleave requests on the same socket.
+    """
+
+    API_VERSION = "v1.41"
+    DEFAULT_SOCKET = "/var/run/docker.sock"
+
+    # Transport failures that should make the caller fall back to the CLI
+    ERRORS = (OSError, http.client.HTTPException, ValueError)
+
+    def __init__(self, socket_path: str, timeout: float = 5):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def _conn(self) -> Optional[UnixHTTPConnection]:
+        return getattr(self._local, "conn", None)
+
+    @_conn.setter
+    def _conn(self, conn: Optional[UnixHTTPConnection]) -> None:
+        self._local.conn = conn
+
+    @classmethod
+    def socket_path_from_env(cls) -> Optional[str]:
+        """Resolve the daemon socket from DOCKER_HOST, or None if not a Unix socket."""
+        if not hasattr(socket, "AF_UNIX"):
+            return None
+
+        host = os.environ.get("DOCKER_HOST", "")
+        if host:
+            if not host.startswith("unix://"):
+                # tcp://, ssh://, npipe:// - leave those to the docker CLI
+                return None
+            path = host[len("unix://"):]
+        else:
+            path = cls.DEFAULT_SOCKET
+
+        return path if os.path.exists(path) else None
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        query: Optional[dict] = None,
+        body: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        versioned: bool = True
+    ) -> Tuple[int, Any]:
+        """Send a request and return (status, decoded body)."""
+        url = f"/{self.API_VERSION}{path}" if versioned else path
+        if query:
+            url += "?" + urllib.parse.urlencode(query)
+
+        headers = {}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers["Content-Type"] = "application/json"
+
+        with Tracer.span(f"{method} {path}", cat="api"):
+            # A keep-alive connection may have been closed by the daemon in the
+            # meantime, so retry once on a fresh connection.
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = UnixHTTPConnection(self.socket_path, self.timeout)
+                conn = self._conn
+                conn.timeout = timeout or self.timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(conn.timeout)
+                try:
+                    conn.request(method, url, body=payload, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    self.close()
+                    if attempt:
+                        raise
+                    continue
+                except self.ERRORS:
+                    self.close()
+                    raise
+
+                if response.will_close:
+                    self.close()
+
+                content_type = response.getheader("Content-Type", "")
+                if data and content_type.startswith("application/json"):
+                    return response.status, json.loads(data.decode('utf-8'))
+                return response.status, data.decode('utf-8', errors='replace')
+
+            raise ConnectionError("Docker Engine API request failed")
+
+    def open_stream(
+        self,
+        path: str,
+        query: Optional[dict] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[http.client.HTTPResponse, Callable[[], None]]:
+        """Open a streaming GET (events, stats) on a dedicated connection.
+
+        Returns the response and a callable that tears the stream down, also
+        unblocking any thread still reading from it.
+        """
+        url = f"/{self.API_VERSION}{path}"
+        if query:
+            url += "?" + urllib.parse.urlencode(query)
+
+        conn = UnixHTTPConnection(self.socket_path, timeout or self.timeout)
+        try:
+            conn.connect()
+            sock = conn.sock
+            conn.request("GET", url)
+            response = conn.getresponse()
+        except self.ERRORS:
+            conn.close()
+            raise
+
+        def close() -> None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+            conn.close()
+
+        if response.status != 200:
+            close()
+            raise ConnectionError(f"Docker Engine API returned {response.status} for {path}")
+        return response, close
+
+    @staticmethod
+    def quote(name: str) -> str:
+        """Quote an image or container reference for use in a URL path."""
+        return urllib.parse.quote(name, safe=":@")
+
+
+class ContainerReadiness:
+    """Waits for the persistent container to become usable.
+
+    Subscribes to the Docker events stream for the container before it is
+    started, then runs the container's own healthcheck command the moment
+    it is up, instead of polling the status once a second.
+    """
+
+    # Used when the container has no healthcheck (or on the CLI backend)
+    DEFAULT_PROBE = ["which", "gemini"]
+    DEADLINE_ENV = "GEMINI_READY_TIMEOUT"
+    DEFAULT_DEADLINE = 30.0
+
+    def __init__(self, manager: "DockerManager", deadline: Optional[float] = None):
+        self.manager = manager
+        self.deadline = deadline if deadline is not None else float(
+            os.environ.get(self.DEADLINE_ENV, self.DEFAULT_DEADLINE)
+        )
+        self.started_at = 0.0
+        self._events: "queue.Queue[dict]" = queue.Queue()
+        self._closers = []
+
+    def __enter__(self) -> "ContainerReadiness":
+        self.started_at = time.monotonic()
+        self._subscribe()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for close in self._closers:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def _remaining(self) -> float:
+        return self.deadline - (time.monotonic() - self.started_at)
+
+    def _subscribe(self) -> None:
+        """Start collecting start/health/die events for the container."""
+        filters = json.dumps({
+            "type": ["container"],
+            "container": [self.manager.CONTAINER_NAME],
+            "event": ["start", "health_status", "die"],
+        })
+        since = str(int(time.time()) - 1)
+
+        api = self.manager._engine_api()
+        if api is not None:
+            try:
+                response, close = api.open_stream(
+                    "/events", {"since": since, "filters": filters}, timeout=self.deadline
+                )
+                self._closers.append(close)
+                self._start_reader(response.readline)
+                return
+            except DockerEngineAPI.ERRORS as e:
+                self.manager._api_failed(e)
+
+        try:
+            process = subprocess.Popen(
+                ["docker", "events", "--since", since,
+                 "--filter", f"container={self.manager.CONTAINER_NAME}",
+                 "--filter", "event=start", "--filter", "event=health_status",
+                 "--filter", "event=die",
+                 "--format", "{{json .}}"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.debug(f"Cannot subscribe to Docker events: {e}")
+            return
+        self._closers.append(process.kill)
+        self._start_reader(process.stdout.readline)
+
+    def _start_reader(self, readline) -> None:
+        """Feed decoded events into the queue from a background thread."""
+        def reader() -> None:
+            try:
+                for line in iter(readline, b""):
+                    line = line.strip()
+                    if line:
+                        self._events.put(json.loads(line))
+            except Exception:
+                # Stream torn down (deadline, close, daemon gone) - stop reading
+                pass
+
+        threading.Thread(target=reader, daemon=True).start()
+
+    def _probe_command(self) -> List[str]:
+        """The container's healthcheck command, as exec arguments."""
+        api = self.manager._engine_api()
+        if api is not None:
+            try:
+                status, info = api.request(
+                    "GET", f"/containers/{self.manager.CONTAINER_NAME}/json"
+                )
+                test = ((info.get("Config") or {}).get("Healthcheck") or {}).get("Test") \
+                    if status == 200 else None
+                if test and test[0] == "CMD":
+                    return test[1:]
+                if test and test[0] == "CMD-SHELL":
+                    return ["/bin/sh", "-c", test[1]]
+            except DockerEngineAPI.ERRORS as e:
+                self.manager._api_failed(e)
+        return self.DEFAULT_PROBE
+
+    def wait(self) -> ReadinessResult:
+        """Block until the container is usable or the deadline passes."""
+        # The container may already have started before we subscribed
+        running = self.manager.container_status() == ContainerStatus.RUNNING
+
+        while not running:
+            remaining = self._remaining()
+            if remaining <= 0:
+                return self._result(False, "timeout")
+            try:
+                event = self._events.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            action = event.get("Action") or event.get("status", "")
+            if action == "die":
+                return self._result(False, "died")
+            if action == "health_status: healthy":
+                return self._result(True, "healthcheck")
+            running = action == "start"
+
+        # Running - now wait on the healthcheck command itself
+        probe = self._probe_command()
+        delay = 0.02
+        while True:
+            if self.manager.exec_probe(probe, timeout=max(self._remaining(), 0.5)):
+                return self._result(True, "probe")
+            if self._remaining() <= 0:
+                return self._result(False, "timeout")
+            try:
+                event = self._events.get(timeout=min(delay, self._remaining()))
+                action = event.get("Action") or event.get("status", "")
+                if action == "die":
+                    return self._result(False, "died")
+                if action == "health_status: healthy":
+                    return self._result(True, "healthcheck")
+            except queue.Empty:
+                pass
+            delay = min(delay * 2, 0.1)
+
+    def _result(self, ready: bool, signal: str) -> ReadinessResult:
+        return ReadinessResult(ready, time.monotonic() - self.started_at, signal)
+
+
+class StartLock:
+    """Host-wide lock around creating or starting one container.
+
+    Launchers opened together (IDE tabs, tmux panes) would otherwise all
+    see the container missing and race docker-compose against each other.
+    The first one to take the lock does the work and publishes its outcome
+    next to the lock file; the others block on the lock and reuse that
+    outcome instead of starting the container again. The OS releases the
+    lock if its holder dies, so a crashed launcher never wedges the rest.
+    """
+
+    def __init__(self, container_name: str):
+        self.lock_path = STATE_DIR / f"start-{container_name}.lock"
+        self.outcome_path = STATE_DIR / f"start-{container_name}.json"
+        self.contended = False
+        # Outcomes published after this point answer our request
+        self.requested_at = time.time()
+        self._file = None
+
+    def acquire(self) -> None:
+        """Take the lock, blocking while another launcher holds it."""
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.lock_path, 'a+')
+        try:
+            self._lock()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def release(self) -> None:
+        try:
+            self._unlock()
+        finally:
+            self._file.close()
+
+    def _lock(self) -> None:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            # msvcrt has no blocking lock without a 10s timeout; poll instead
+            self._file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                    return
+                except OSError:
+                    self.contended = True
+                    time.sleep(0.05)
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.contended = True
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+
+    def _unlock(self) -> None:
+        try:
+            import fcntl
+        except ImportError:
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def shared_outcome(self) -> Optional[bool]:
+        """Outcome published by a holder that finished since we were created."""
+        try:
+            with open(self.outcome_path, 'r', encoding='utf-8') as f:
+                outcome = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if outcome.get("finished_at", 0) < self.requested_at:
+            return None
+        return bool(outcome.get("ready"))
+
+    def publish(self, ready: bool) -> None:
+        """Record the outcome for launchers blocked on the lock."""
+        try:
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=STATE_DIR, prefix=".start-", delete=False
+            ) as f:
+                json.dump({"ready": ready, "finished_at": time.time(), "pid": os.getpid()}, f)
+            os.replace(f.name, self.outcome_path)
+        except OSError as e:
+            logger.debug(f"Could not publish start outcome: {e}")
+
+
 class DockerManager:
     """Manages Docker container operations."""
 
     CONTAINER_NAME = "gemini-persistent"
     DEFAULT_TIMEOUT = 5
 
+    # "auto" uses the Engine API socket when present, "cli" forces the docker binary
+    BACKEND_ENV = "GEMINI_DOCKER_BACKEND"
+
+    IMAGE_BASE = "gemini-cli-container"
+    # Preferred order when several tags are present
+    IMAGE_TAGS = ["full", "slim"]
+
+    _api: Optional[DockerEngineAPI] = None
+    _api_resolved = False
+    _api_lock = threading.Lock()
+
+    @classmethod
+    def _engine_api(cls) -> Optional[DockerEngineAPI]:
+        """Return the Engine API client, or None to use the docker CLI."""
+        with cls._api_lock:
+            if not cls._api_resolved:
+                cls._api_resolved = True
+                backend = os.environ.get(cls.BACKEND_ENV, "auto").lower()
+                socket_path = DockerEngineAPI.socket_path_from_env()
+                if backend != "cli" and socket_path:
+                    cls._api = DockerEngineAPI(socket_path, cls.DEFAULT_TIMEOUT)
+                    logger.debug(f"Using Docker Engine API at {socket_path}")
+            return cls._api
+
+    @classmethod
+    def _api_failed(cls, error: Exception) -> None:
+        """Drop the Engine API backend and fall back to the docker CLI."""
+        logger.debug(f"Docker Engine API unavailable, falling back to CLI: {error}")
+        if cls._api is not None:
+            cls._api.close()
+        cls._api = None
+        # Re-resolve on the next call so a long-lived process picks the
+        # socket up again once the daemon is back
+        cls._api_resolved = False
+
     @staticmethod
     def _run_command(
         cmd: List[str],
@@ -62,20 +605,31 @@ class DockerManager:
         env = os.environ.copy()
         env['PYTHONIOENCODING'] = 'utf-8'
 
-        return subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            env=env,
-            timeout=timeout,
-            check=check
-        )
+        # "docker inspect", "docker image inspect", ...
+        name = " ".join(cmd[:3] if cmd[1:2] in (["image"], ["container"]) else cmd[:2])
+        with Tracer.span(name, cat="docker", cmd=" ".join(cmd)):
+            return subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                env=env,
+                timeout=timeout,
+                check=check
+            )
 
     @classmethod
     def check_image_exists(cls, image_name: str) -> bool:
         """Check if the Docker image exists."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, _ = api.request("GET", f"/images/{api.quote(image_name)}/json")
+                return status == 200
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
         try:
             result = cls._run_command(
                 ["docker", "images", "-q", image_name],
@@ -88,11 +642,9 @@ class DockerManager:
     @classmethod
     def get_available_image(cls) -> str:
         """Find available image tag (full or slim)."""
-        base_name = "gemini-cli-container"
-
         # Check in preferred order
-        for tag in ["full", "slim"]:
-            image_name = f"{base_name}:{tag}"
+        for tag in cls.IMAGE_TAGS:
+            image_name = f"{cls.IMAGE_BASE}:{tag}"
             if cls.check_image_exists(image_name):
                 logger.debug(f"Found image: {image_name}")
                 return image_name
@@ -107,6 +659,14 @@ class DockerManager:
     @classmethod
     def check_docker_running(cls) -> bool:
         """Check if Docker daemon is running."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, _ = api.request("GET", "/_ping", timeout=2, versioned=False)
+                return status == 200
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
         try:
             result = cls._run_command(
                 ["docker", "version"],
@@ -120,6 +680,19 @@ class DockerManager:
     @classmethod
     def container_status(cls) -> ContainerStatus:
         """Check container status."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, info = api.request("GET", f"/containers/{cls.CONTAINER_NAME}/json")
+                if status == 404:
+                    return ContainerStatus.NOT_EXISTS
+                if status != 200:
+                    return ContainerStatus.ERROR
+                is_running = info.get("State", {}).get("Running", False)
+                return ContainerStatus.RUNNING if is_running else ContainerStatus.STOPPED
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
         try:
             result = cls._run_command(
                 ["docker", "inspect", "-f", "{{.State.Running}}", cls.CONTAINER_NAME],
@@ -134,45 +707,137 @@ class DockerManager:
             return ContainerStatus.ERROR
 
     @classmethod
-    def start_container(cls, debug: bool = False) -> bool:
-        """Start the persistent container."""
-        status = cls.container_status()
+    def start_container(
+        cls,
+        debug: bool = False,
+        deadline: Optional[float] = None,
+        status: Optional[ContainerStatus] = None
+    ) -> bool:
+        """Start the persistent container and wait until it is usable.
+
+        ``status`` may carry a container status probed moments ago to skip
+        checking it again. Concurrent launchers are serialized by
+        ``StartLock``: one creates or starts the container and the others
+        return its readiness result.
+        """
+        lock = StartLock(cls.CONTAINER_NAME)
+        if status is None or status == ContainerStatus.ERROR:
+            status = cls.container_status()
 
         if status == ContainerStatus.RUNNING:
             logger.info("Container already running")
             return True
 
-        if status == ContainerStatus.NOT_EXISTS:
-            logger.info("Creating persistent container...")
-            logger.info("First container creation may take 2-3 minutes...")
-            setup_dir = Path(__file__).parent
-            result = subprocess.run(
-                ["docker-compose", "-f", str(setup_dir / "docker-compose.yml"), "up", "-d"],
-                check=False,
-                capture_output=False
-            )
-            if result.returncode != 0:
-                logger.error("Failed to create container")
+        with Tracer.span("start lock wait"):
+            lock.acquire()
+        try:
+            shared = lock.shared_outcome()
+            if shared is not None:
+                logger.info("Container was started by another launcher")
+                return shared
+            if lock.contended:
+                # The holder gave up before finishing; look again ourselves
+                status = cls.container_status()
+                if status == ContainerStatus.RUNNING:
+                    logger.info("Container already running")
+                    return True
+
+            ready = cls._start_and_wait(status, deadline)
+            lock.publish(ready)
+            return ready
+        finally:
+            lock.release()
+
+    @classmethod
+    def _start_and_wait(cls, status: ContainerStatus, deadline: Optional[float]) -> bool:
+        """Create or start the container; the caller holds the start lock."""
+        # Subscribe before starting so the start event cannot be missed
+        with ContainerReadiness(cls, deadline) as readiness:
+            if status == ContainerStatus.NOT_EXISTS:
+                logger.info("Creating persistent container...")
+                logger.info("First container creation may take 2-3 minutes...")
+                with Tracer.span("docker-compose up", cat="docker"):
+                    created = ComposeSpec.up(dict(os.environ), ComposeSpec.default_project())
+                    if created is None:
+                        created = subprocess.run(
+                            ComposeSpec.compose_command() + ["-f", str(ComposeSpec.COMPOSE_FILE), "up", "-d"],
+                            check=False
+                        ).returncode == 0
+                if not created:
+                    logger.error("Failed to create container")
+                    return False
+                # Creation time should not eat into the readiness deadline
+                readiness.started_at = time.monotonic()
+
+            elif status == ContainerStatus.STOPPED:
+                logger.info("Starting existing container...")
+                if not cls._start_existing():
+                    logger.error("Failed to start container")
+                    return False
+
+            with Tracer.span("readiness wait"):
+                result = readiness.wait()
+
+        if result.ready:
+            logger.info(f"Container is ready (waited {result.waited:.2f}s, {result.signal})")
+        else:
+            logger.error(f"Container not ready after {result.waited:.1f}s ({result.signal})")
+        return result.ready
+
+    @classmethod
+    def exec_probe(cls, cmd: List[str], timeout: float = DEFAULT_TIMEOUT) -> bool:
+        """Run a short command in the container and report whether it succeeded."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                status, created = api.request(
+                    "POST", f"/containers/{cls.CONTAINER_NAME}/exec",
+                    body={"Cmd": cmd, "AttachStdout": False, "AttachStderr": False}
+                )
+                if status != 201:
+                    return False
+                exec_id = created["Id"]
+                status, _ = api.request("POST", f"/exec/{exec_id}/start", body={"Detach": True})
+                if status != 200:
+                    return False
+
+                give_up = time.monotonic() + timeout
+                while time.monotonic() < give_up:
+                    _, info = api.request("GET", f"/exec/{exec_id}/json")
+                    if not info.get("Running"):
+                        return info.get("ExitCode") == 0
+                    time.sleep(0.01)
                 return False
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
 
-        elif status == ContainerStatus.STOPPED:
-            logger.info("Starting existing container...")
+        try:
             result = cls._run_command(
-                ["docker", "start", cls.CONTAINER_NAME],
+                ["docker", "exec", cls.CONTAINER_NAME] + cmd,
+                timeout=timeout,
                 check=False
             )
-            if result.returncode != 0:
-                logger.error("Failed to start container")
-                return False
-
-        # Wait for container to be ready
-        for _ in range(10):
-            if cls.container_status() == ContainerStatus.RUNNING:
-                logger.info("Container is ready")
-                return True
-            time.sleep(1)
+            return result.returncode == 0
+        except Exception:
+            return False
 
-        return False
+    @classmethod
+    def _start_existing(cls) -> bool:
+        """Start a stopped container."""
+        api = cls._engine_api()
+        if api is not None:
+            try:
+                # 204 = started, 304 = already running
+                status, _ = api.request("POST", f"/containers/{cls.CONTAINER_NAME}/start")
+                return status in (204, 304)
+            except DockerEngineAPI.ERRORS as e:
+                cls._api_failed(e)
+
+        result = cls._run_command(
+            ["docker", "start", cls.CONTAINER_NAME],
+            check=False
+        )
+        return result.returncode == 0
 
     @classmethod
     def _convert_path_for_docker(cls, path: str) -> str:
@@ -189,6 +854,284 @@ class DockerManager:
         return path
 
 
+class ComposeSpec:
+    """Creates the service container without running docker-compose.
+
+    ``docker compose config`` turns docker-compose.yml into JSON once,
+    uninterpolated, and the result is cached until the file changes. Each
+    creation substitutes ${VAR} from the environment, builds the Engine API
+    create request (mounts, capabilities, limits, healthcheck, logging) and
+    creates and starts the container directly. Whenever this path cannot be
+    used - CLI backend, no compose to read the file with, an unsupported
+    key - ``up`` returns None and the caller runs compose (the standalone
+    docker-compose or the docker compose plugin) instead.
+    """
+
+    COMPOSE_FILE = Path(__file__).parent / "docker-compose.yml"
+    CACHE_PATH = STATE_DIR / "create-spec.json"
+    SERVICE = "gemini-cli"
+    VAR_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?:(:?-)([^}]*))?\}")
+    # Service keys the create request covers; anything else goes to compose
+    SUPPORTED = {
+        "build", "image", "container_name", "hostname", "stdin_open", "tty", "user",
+        "cap_add", "security_opt", "volumes", "working_dir", "restart", "command",
+        "environment", "deploy", "healthcheck", "logging", "networks",
+    }
+
+    @staticmethod
+    def compose_command() -> List[str]:
+        """The standalone docker-compose if installed, else the docker compose plugin."""
+        return ["docker-compose"] if shutil.which("docker-compose") else ["docker", "compose"]
+
+    @classmethod
+    def default_project(cls) -> str:
+        """Compose's project name for the directory of the compose file."""
+        return re.sub(r"[^a-z0-9_-]", "", cls.COMPOSE_FILE.parent.name.lower())
+
+    @classmethod
+    def load(cls) -> Optional[dict]:
+        """The normalized compose model, cached per compose file content."""
+        try:
+            digest = hashlib.sha256(cls.COMPOSE_FILE.read_bytes()).hexdigest()
+        except OSError:
+            return None
+        try:
+            with open(cls.CACHE_PATH, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("compose_sha256") == digest:
+                return cached["model"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+        with Tracer.span("compose config", cat="docker"):
+            try:
+                result = subprocess.run(
+                    cls.compose_command() + ["-f", str(cls.COMPOSE_FILE), "config",
+                                             "--format", "json", "--no-interpolate"],
+                    capture_output=True, text=True, encoding='utf-8', errors='replace',
+                    timeout=30, check=False
+                )
+                model = json.loads(result.stdout) if result.returncode == 0 else None
+            except (OSError, subprocess.TimeoutExpired, ValueError):
+                model = None
+        if not isinstance(model, dict):
+            logger.debug("Could not read docker-compose.yml through compose config")
+            return None
+
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=STATE_DIR, prefix=".create-spec-", delete=False
+            ) as f:
+                json.dump({"compose_sha256": digest, "model": model}, f)
+            os.replace(f.name, cls.CACHE_PATH)
+        except OSError as e:
+            logger.debug(f"Could not cache the create spec: {e}")
+        return model
+
+    @classmethod
+    def interpolate(cls, value: Any, env: Dict[str, str]) -> Any:
+        """Substitute ${VAR}, ${VAR:-default} and ${VAR-default} like compose."""
+        if isinstance(value, dict):
+            return {key: cls.interpolate(item, env) for key, item in value.items()}
+        if isinstance(value, list):
+            return [cls.interpolate(item, env) for item in value]
+        if not isinstance(value, str):
+            return value
+
+        def substitute(match: "re.Match") -> str:
+            name, operator, default = match.groups()
+            current = env.get(name)
+            if operator == ":-" and not current:
+                return default
+            if operator == "-" and current is None:
+                return default
+            return current or ""
+        return cls.VAR_RE.sub(substitute, value).replace("$$", "$")
+
+    @staticmethod
+    def duration_ns(value: Any) -> int:
+        """Compose duration ("1m30s", "40s", "500ms") in nanoseconds."""
+        if isinstance(value, (int, float)):
+            return int(value)
+        units = {"h": 3600e9, "m": 60e9, "s": 1e9, "ms": 1e6, "us": 1e3, "ns": 1}
+        parts = re.findall(r"(\d+(?:\.\d+)?)(h|ms|m|s|us|ns)", str(value))
+        if not parts:
+            raise ValueError(f"Invalid duration: {value}")
+        return int(sum(float(number) * units[unit] for number, unit in parts))
+
+    @staticmethod
+    def size_bytes(value: Any) -> int:
+        """Compose size ("8G", "512m", "1gb") in bytes."""
+        if isinstance(value, (int, float)):
+            return int(value)
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)b?\s*", str(value).lower())
+        if not match:
+            raise ValueError(f"Invalid size: {value}")
+        return int(float(match.group(1)) * 1024 ** " kmgt".index(match.group(2) or " "))
+
+    @classmethod
+    def create_request(cls, model: dict, env: Dict[str, str], project: str) -> Tuple[str, dict]:
+        """Container name and Engine API create body for the service."""
+        service = cls.interpolate(model["services"][cls.SERVICE], env)
+        unsupported = set(service) - cls.SUPPORTED
+        if unsupported:
+            raise ValueError(f"Unsupported compose keys: {', '.join(sorted(unsupported))}")
+        volumes = cls.interpolate(model.get("volumes") or {}, env)
+
+        mounts = []
+        for volume in service.get("volumes") or []:
+            mount = {"Target": volume["target"], "ReadOnly": bool(volume.get("read_only"))}
+            if volume["type"] == "bind":
+                mount.update(Type="bind", Source=volume["source"])
+            elif volume["type"] == "volume":
+                declared = volumes.get(volume["source"]) or {}
+                mount.update(Type="volume", Source=declared.get("name") or f"{project}_{volume['source']}")
+            else:
+                raise ValueError(f"Unsupported volume type: {volume['type']}")
+            mounts.append(mount)
+
+        environment = service.get("environment") or {}
+        if isinstance(environment, list):
+            environment = dict(item.split("=", 1) if "=" in item else (item, None) for item in environment)
+        env_list = []
+        for key, value in environment.items():
+            # A bare key takes the value from the launching environment
+            value = env.get(key) if value is None else value
+            if value is not None:
+                env_list.append(f"{key}={value}")
+
+        host_config: Dict[str, Any] = {
+            "Mounts": mounts,
+            "CapAdd": service.get("cap_add") or [],
+            "SecurityOpt": service.get("security_opt") or [],
+        }
+        if service.get("restart"):
+            host_config["RestartPolicy"] = {"Name": service["restart"]}
+        resources = (service.get("deploy") or {}).get("resources") or {}
+        limits, reservations = resources.get("limits") or {}, resources.get("reservations") or {}
+        if limits.get("cpus"):
+            host_config["NanoCpus"] = int(float(limits["cpus"]) * 1e9)
+        if limits.get("memory"):
+            host_config["Memory"] = cls.size_bytes(limits["memory"])
+        if reservations.get("memory"):
+            host_config["MemoryReservation"] = cls.size_bytes(reservations["memory"])
+        logging_config = service.get("logging") or {}
+        if logging_config.get("driver"):
+            host_config["LogConfig"] = {
+                "Type": logging_config["driver"],
+                "Config": {key: str(value) for key, value in (logging_config.get("options") or {}).items()},
+            }
+
+        name = service.get("container_name") or f"{project}-{cls.SERVICE}-1"
+        body: Dict[str, Any] = {
+            "Image": service["image"],
+            "Hostname": service.get("hostname", ""),
+            "User": service.get("user", ""),
+            "WorkingDir": service.get("working_dir", ""),
+            "Env": env_list,
+            "Tty": bool(service.get("tty")),
+            "OpenStdin": bool(service.get("stdin_open")),
+            # compose down and ps find the container by these labels
+            "Labels": {
+                "com.docker.compose.project": project,
+                "com.docker.compose.service": cls.SERVICE,
+                "com.docker.compose.container-number": "1",
+                "com.docker.compose.oneoff": "False",
+                "com.docker.compose.project.config_files": str(cls.COMPOSE_FILE),
+                "com.docker.compose.project.working_dir": str(cls.COMPOSE_FILE.parent),
+            },
+            "HostConfig": host_config,
+        }
+        if service.get("command"):
+            command = service["command"]
+            body["Cmd"] = command if isinstance(command, list) else ["/bin/sh", "-c", command]
+        healthcheck = service.get("healthcheck")
+        if healthcheck and not healthcheck.get("disable"):
+            body["Healthcheck"] = {
+                "Test": healthcheck.get("test"),
+                "Interval": cls.duration_ns(healthcheck.get("interval", "30s")),
+                "Timeout": cls.duration_ns(healthcheck.get("timeout", "30s")),
+                "Retries": int(healthcheck.get("retries", 3)),
+                "StartPeriod": cls.duration_ns(healthcheck.get("start_period", "0s")),
+            }
+        return name, body
+
+    @classmethod
+    def up(cls, env: Dict[str, str], project: str) -> Optional[bool]:
+        """Create and start the container natively; None to fall back to compose."""
+        api = DockerManager._engine_api()
+        if api is None:
+            return None
+        model = cls.load()
+        if model is None or cls.SERVICE not in (model.get("services") or {}):
+            return None
+        try:
+            name, body = cls.create_request(model, env, project)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug(f"Native container creation not possible: {e}")
+            return None
+
+        try:
+            with Tracer.span("container create", cat="docker"):
+                status, created = api.request("POST", "/containers/create", query={"name": name}, body=body)
+            if status == 409:
+                # Created by someone else in the meantime - just make sure it runs
+                logger.debug(f"{name} already exists")
+            elif status != 201:
+                message = created.get("message") if isinstance(created, dict) else created
+                logger.error(f"Could not create {name}: {message}")
+                return False
+            status, _ = api.request("POST", f"/containers/{api.quote(name)}/start")
+            return status in (204, 304)
+        except DockerEngineAPI.ERRORS as e:
+            DockerManager._api_failed(e)
+            return None
+
+
+class ProbeRunner:
+    """Runs independent prerequisite probes concurrently.
+
+    Wall-clock time is that of the slowest probe instead of the sum. A
+    failing probe listed in ``fail_fast`` returns immediately without
+    waiting for the others; their results are simply missing.
+    """
+
+    MAX_WORKERS = 8
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+
+    def run(
+        self,
+        probes: Dict[str, Callable[[], Any]],
+        fail_fast: Tuple[str, ...] = ()
+    ) -> Dict[str, Any]:
+        """Run all probes; an exception is stored as that probe's result."""
+        results: Dict[str, Any] = {}
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(probes)),
+            thread_name_prefix="probe"
+        )
+        futures = {executor.submit(probe): name for name, probe in probes.items()}
+        try:
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = e
+
+                failed = isinstance(results[name], Exception) or not results[name]
+                if name in fail_fast and failed:
+                    logger.debug(f"Probe '{name}' failed, skipping the rest")
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
+
+
 class PathValidator:
     """Handles path validation."""
 
@@ -233,22 +1176,77 @@ class PathValidator:
 class GeminiLauncher:
     """Main launcher for Gemini CLI sessions."""
 
+    # The namespace launcher lives outside the gemini-usr-local volume;
+    # containers from older images only have it in /usr/local/bin
+    SESSION_ENTRYPOINT = [
+        "sh", "-c",
+        'if [ -x "$0" ]; then exec "$0" "$@"; fi; '
+        'exec /usr/local/bin/gemini-namespace-launcher "$@"',
+        "/usr/lib/gemini-launcher/gemini-namespace-launcher",
+    ]
+
     def __init__(self, debug: bool = False):
         self.docker_manager = DockerManager()
         self.path_validator = PathValidator()
         self.image_name = None  # Will be set dynamically
         self.debug = debug
+        # Filled in by the probe phase, reused by launch_gemini
+        self.project_path: Optional[Path] = None
+        self.container_status: Optional[ContainerStatus] = None
+        self.api_key: Optional[str] = None
+
+    def _run_probes(self) -> Dict[str, Any]:
+        """Probe Docker, images, container, project path and API key concurrently."""
+        manager = self.docker_manager
+        probes: Dict[str, Callable[[], Any]] = {
+            "docker": manager.check_docker_running,
+            "container": manager.container_status,
+            "project": lambda: self.path_validator.validate_project_path(os.getcwd()),
+            "api_key": self._read_api_key,
+        }
+        for tag in manager.IMAGE_TAGS:
+            image_name = f"{manager.IMAGE_BASE}:{tag}"
+            probes[image_name] = lambda image_name=image_name: manager.check_image_exists(image_name)
+
+        return ProbeRunner().run(probes, fail_fast=("docker", "project"))
 
     def ensure_prerequisites(self) -> None:
         """Ensure Docker is running and image exists."""
-        if not self.docker_manager.check_docker_running():
+        with Tracer.span("probes"):
+            results = self._run_probes()
+
+        if isinstance(results.get("project"), DockerContainerError):
+            raise results["project"]
+
+        if not results.get("docker"):
             raise DockerContainerError(
                 "Docker is not running!\n"
                 "Please start Docker Desktop and try again."
             )
 
+        self.project_path = results.get("project")
+        status = results.get("container")
+        self.container_status = status if isinstance(status, ContainerStatus) else None
+        api_key = results.get("api_key")
+        self.api_key = api_key if isinstance(api_key, str) else None
+
+        found = [
+            f"{self.docker_manager.IMAGE_BASE}:{tag}" for tag in self.docker_manager.IMAGE_TAGS
+            if results.get(f"{self.docker_manager.IMAGE_BASE}:{tag}") is True
+        ]
+        if found:
+            self.image_name = found[0]
+            logger.info(f"Using image: {self.image_name}")
+        else:
+            self._ensure_image()
+
+        # Check for API key configuration
+        self._check_api_key_setup()
+
+    def _ensure_image(self) -> None:
+        """Offer to run setup when no image was found."""
         try:
-            # Try to find available image
+            # Not found by the probes - the regular lookup raises the user-facing error
             self.image_name = self.docker_manager.get_available_image()
             logger.info(f"Using image: {self.image_name}")
         except DockerContainerError:
@@ -268,22 +1266,24 @@ class GeminiLauncher:
             else:
                 raise
 
-        # Check for API key configuration
-        self._check_api_key_setup()
+    def _read_api_key(self) -> Optional[str]:
+        """Read GEMINI_API_KEY from the .env file, if set."""
+        env_file = Path(__file__).parent / ".env"
+        if not env_file.exists():
+            return None
+
+        with open(env_file, 'r') as f:
+            for line in f:
+                if line.startswith('GEMINI_API_KEY='):
+                    return line.strip().split('=', 1)[1] or None
+        return None
 
     def _check_api_key_setup(self) -> None:
         """Check if GEMINI_API_KEY is configured."""
         env_file = Path(__file__).parent / ".env"
-        
-        # Check if .env exists and contains GEMINI_API_KEY
-        api_key_exists = False
-        if env_file.exists():
-            with open(env_file, 'r') as f:
-                content = f.read()
-                if 'GEMINI_API_KEY=' in content and not content.strip().endswith('GEMINI_API_KEY='):
-                    api_key_exists = True
-        
-        if not api_key_exists:
+
+        # The .env file was already read by the probe phase
+        if not self.api_key:
             logger.warning("\n⚠️  GEMINI_API_KEY not found in .env file!")
             logger.info("\nTo use Gemini CLI with API Key authentication:")
             logger.info("1. Go to: https://aistudio.google.com/apikey")
@@ -311,7 +1311,8 @@ class GeminiLauncher:
                     
                     with open(env_file, 'w') as f:
                         f.write(env_content)
-                    
+                    self.api_key = api_key
+
                     logger.info("✅ API key saved to .env file!")
                     logger.info("You can now use Gemini CLI without browser authentication.")
                 else:
@@ -327,12 +1328,14 @@ class GeminiLauncher:
 
     def launch_gemini(self, args: List[str]) -> None:
         """Launch Gemini CLI in isolated container using docker exec."""
-        # Validate current directory
-        try:
-            project_path = self.path_validator.validate_project_path(os.getcwd())
-        except DockerContainerError as e:
-            logger.error(str(e))
-            sys.exit(1)
+        # Validate current directory (already done by the probe phase)
+        project_path = self.project_path
+        if project_path is None:
+            try:
+                project_path = self.path_validator.validate_project_path(os.getcwd())
+            except DockerContainerError as e:
+                logger.error(str(e))
+                sys.exit(1)
 
         # Generate unique session ID
         session_id = self.path_validator.generate_session_id(project_path)
@@ -341,7 +1344,7 @@ class GeminiLauncher:
         docker_project_path = self.docker_manager._convert_path_for_docker(str(project_path))
 
         # Ensure container is running
-        if not self.docker_manager.start_container(self.debug):
+        if not self.docker_manager.start_container(self.debug, status=self.container_status):
             logger.error("Failed to start container")
             sys.exit(1)
 
@@ -355,20 +1358,12 @@ class GeminiLauncher:
         ]
         
         # Pass GEMINI_API_KEY from .env file if exists
-        env_file = Path(__file__).parent / ".env"
-        if env_file.exists():
-            with open(env_file, 'r') as f:
-                for line in f:
-                    if line.startswith('GEMINI_API_KEY='):
-                        api_key = line.strip().split('=', 1)[1]
-                        if api_key:
-                            docker_cmd.extend(["-e", f"GEMINI_API_KEY={api_key}"])
-                        break
+        api_key = self.api_key or self._read_api_key()
+        if api_key:
+            docker_cmd.extend(["-e", f"GEMINI_API_KEY={api_key}"])
         
-        docker_cmd.extend([
-            self.docker_manager.CONTAINER_NAME,
-            "/usr/local/bin/gemini-namespace-launcher"
-        ])
+        docker_cmd.append(self.docker_manager.CONTAINER_NAME)
+        docker_cmd.extend(self.SESSION_ENTRYPOINT)
 
         # Add gemini command if no args provided
         if not args:
@@ -383,6 +1378,10 @@ class GeminiLauncher:
             logger.debug(f"Docker project path: {docker_project_path}")
             logger.debug(f"Docker command: {' '.join(docker_cmd)}")
 
+        # The session itself can run for hours - the trace ends at the handover
+        Tracer.instant("session exec", container=self.docker_manager.CONTAINER_NAME)
+        Tracer.finish()
+
         try:
             # Run Gemini in isolated environment
             result = subprocess.run(docker_cmd, check=False)
@@ -415,6 +1414,26 @@ def display_welcome() -> None:
     print("Powered by Gemini 2.5 Pro\n")
 
 
+def _launcher_args() -> Tuple[List[str], List[str]]:
+    """Split sys.argv[1:] at ``--``: launcher flags before it, Gemini's arguments after."""
+    args = sys.argv[1:]
+    end = args.index("--") if "--" in args else len(args)
+    return args[:end], args[end:]
+
+
+def _pop_option(name: str) -> Optional[str]:
+    """Remove a launcher option and its value (``NAME VALUE`` or ``NAME=VALUE``) from sys.argv."""
+    own, rest = _launcher_args()
+    for i, arg in enumerate(own):
+        if arg == name and i + 1 < len(own):
+            sys.argv = [sys.argv[0]] + own[:i] + own[i + 2:] + rest
+            return own[i + 1]
+        if arg.startswith(name + "="):
+            sys.argv = [sys.argv[0]] + own[:i] + own[i + 1:] + rest
+            return arg.split("=", 1)[1]
+    return None
+
+
 def main() -> None:
     """Main entry point."""
     # Check for debug flag
@@ -424,6 +1443,10 @@ def main() -> None:
         sys.argv = [arg for arg in sys.argv if arg not in ["--debug", "-v", "--verbose"]]
         logging.getLogger().setLevel(logging.DEBUG)
 
+    trace_file = _pop_option("--trace")
+    if trace_file:
+        Tracer.enable(trace_file)
+
     # Display welcome
     display_welcome()
 
@@ -433,8 +1456,10 @@ def main() -> None:
         # Ensure prerequisites
         launcher.ensure_prerequisites()
 
-        # Get command line arguments
-        args = sys.argv[1:] if len(sys.argv) > 1 else []
+        # Everything the launcher did not consume goes to Gemini; a "--"
+        # keeps Gemini flags that share a launcher flag's name
+        own, rest = _launcher_args()
+        args = own + rest[1:]
 
         # Launch Gemini
         launcher.launch_gemini(args)
@@ -448,6 +1473,9 @@ def main() -> None:
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         sys.exit(1)
+    finally:
+        # Launches that failed before the exec still get their trace
+        Tracer.finish()
 
 
 if __name__ == "__main__":
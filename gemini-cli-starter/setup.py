@@ -5,12 +5,26 @@
 import subprocess
 import sys
 import os
+import re
 import time
+import json
+import base64
+import hashlib
+import shutil
 import logging
+import tarfile
+import argparse
+import tempfile
+import struct
+import threading
+import collections
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
+from datetime import datetime
 
 # Enable BuildKit globally
 os.environ['DOCKER_BUILDKIT'] = '1'
@@ -30,6 +44,543 @@ class BuildTarget(Enum):
     FULL = "full"
 
 
+def ordered_map(pool: ThreadPoolExecutor, work, items, window: int):
+    """Run ``work`` over ``items`` in the pool, yielding results in order.
+
+    At most ``window`` items are in flight, which bounds memory.
+    """
+    pending: "collections.deque" = collections.deque()
+    for item in items:
+        pending.append(pool.submit(work, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class Zstd:
+    """zstd for single chunks, from whatever is available.
+
+    The stdlib module (Python 3.14+), the zstandard package, or the zstd
+    executable, in that order. All of them release the GIL or run in
+    another process, so chunks compress in parallel from a thread pool.
+    """
+
+    @staticmethod
+    def backend() -> Optional[str]:
+        for module in ("compression.zstd", "zstandard"):
+            try:
+                __import__(module)
+                return module
+            except ImportError:
+                pass
+        return "cli" if shutil.which("zstd") else None
+
+    def __init__(self, level: int = 3):
+        self.level = level
+        self.name = self.backend()
+        if self.name is None:
+            raise RuntimeError("zstd is not available: pip install zstandard, or install the zstd tool")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "compression.zstd":
+            from compression import zstd
+            return zstd.compress(data, level=self.level)
+        if self.name == "zstandard":
+            import zstandard
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return subprocess.run(["zstd", f"-{self.level}", "-q", "-c"], input=data,
+                              capture_output=True, check=True).stdout
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.name == "compression.zstd":
+            from compression import zstd
+            return zstd.decompress(data)
+        if self.name == "zstandard":
+            import zstandard
+            return zstandard.ZstdDecompressor().decompress(data)
+        return subprocess.run(["zstd", "-d", "-q", "-c"], input=data,
+                              capture_output=True, check=True).stdout
+
+
+class ImageArchive:
+    """Built image as a chunked, zstd-compressed archive for offline installs.
+
+    Export streams ``docker save`` through a thread pool that compresses
+    fixed-size chunks in parallel; import streams the chunks back into
+    ``docker load``, so the uncompressed tar never touches the disk on
+    either side. Every chunk carries the SHA-256 of its compressed bytes
+    and the trailer the SHA-256 of the whole tar; a mismatch aborts the
+    load before docker tags anything. Layout:
+
+        MAGIC, header JSON line
+        per chunk: compressed size, raw size (u64 big-endian), sha256, data
+        a zero-size chunk, trailer JSON line
+    """
+
+    MAGIC = b"CONTAINER-IMAGE-ZSTD 1\n"
+    FRAME = struct.Struct(">QQ32s")
+    CHUNK_SIZE = 16 << 20
+
+    def __init__(self, path: str, workers: Optional[int] = None):
+        self.path = path
+        self.workers = workers or os.cpu_count() or 2
+
+    @staticmethod
+    def _report(action: str, raw: int, packed: int, elapsed: float) -> None:
+        elapsed = max(elapsed, 1e-6)
+        logger.info(f"{action} {BuildProfile.format_size(raw)} image "
+                    f"as {BuildProfile.format_size(packed)} ({packed / max(raw, 1):.0%}) "
+                    f"in {elapsed:.1f}s - {BuildProfile.format_size(raw / elapsed)}/s")
+
+    def export(self, references: List[str]) -> bool:
+        """Write the images (all tags given) to the archive."""
+        codec = Zstd()
+        header = {
+            "images": references,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "chunk_size": self.CHUNK_SIZE,
+            "codec": "zstd",
+            "level": codec.level,
+        }
+        logger.info(f"Exporting {', '.join(references)} ({self.workers} threads, zstd via {codec.name})...")
+        started = time.monotonic()
+        process = subprocess.Popen(["docker", "save"] + references, stdout=subprocess.PIPE)
+        target = Path(self.path)
+        tmp = target.with_name(f".{target.name}.partial")
+        digest = hashlib.sha256()
+        raw_total = packed_total = chunks = 0
+
+        def chunks_of_tar():
+            while True:
+                chunk = process.stdout.read(self.CHUNK_SIZE)
+                if not chunk:
+                    return
+                digest.update(chunk)
+                yield chunk
+
+        def pack(chunk: bytes) -> Tuple[int, bytes]:
+            return len(chunk), codec.compress(chunk)
+
+        try:
+            with open(tmp, 'wb') as out, ThreadPoolExecutor(self.workers) as pool:
+                out.write(self.MAGIC + json.dumps(header).encode('utf-8') + b"\n")
+                for raw_size, packed in ordered_map(pool, pack, chunks_of_tar(), self.workers * 2):
+                    out.write(self.FRAME.pack(len(packed), raw_size, hashlib.sha256(packed).digest()))
+                    out.write(packed)
+                    raw_total += raw_size
+                    packed_total += len(packed)
+                    chunks += 1
+                out.write(self.FRAME.pack(0, 0, bytes(32)))
+                trailer = {"chunks": chunks, "raw_bytes": raw_total, "sha256": digest.hexdigest()}
+                out.write(json.dumps(trailer).encode('utf-8') + b"\n")
+            if process.wait() != 0:
+                logger.error("docker save failed")
+                tmp.unlink()
+                return False
+            os.replace(tmp, target)
+        except (OSError, subprocess.CalledProcessError) as e:
+            process.kill()
+            logger.error(f"Export failed: {e}")
+            tmp.unlink(missing_ok=True)
+            return False
+
+        self._report("Exported", raw_total, packed_total, time.monotonic() - started)
+        logger.info(f"Archive: {target} ({chunks} chunks)")
+        return True
+
+    def load(self) -> bool:
+        """Verify and load the archive into Docker, streaming."""
+        started = time.monotonic()
+        with open(self.path, 'rb') as archive:
+            if archive.read(len(self.MAGIC)) != self.MAGIC:
+                logger.error(f"{self.path} is not an image archive")
+                return False
+            header = json.loads(archive.readline())
+            codec = Zstd()
+            logger.info(f"Importing {', '.join(header.get('images', []))} "
+                        f"(exported {header.get('created')}, {self.workers} threads)...")
+
+            def frames():
+                index = 0
+                while True:
+                    packed_size, raw_size, checksum = self.FRAME.unpack(archive.read(self.FRAME.size))
+                    if packed_size == 0:
+                        return
+                    packed = archive.read(packed_size)
+                    if len(packed) != packed_size:
+                        raise ValueError(f"chunk {index} is truncated")
+                    yield index, raw_size, checksum, packed
+                    index += 1
+
+            def unpack(frame) -> bytes:
+                index, raw_size, checksum, packed = frame
+                if hashlib.sha256(packed).digest() != checksum:
+                    raise ValueError(f"chunk {index} is corrupt (checksum mismatch)")
+                data = codec.decompress(packed)
+                if len(data) != raw_size:
+                    raise ValueError(f"chunk {index} decompressed to the wrong size")
+                return data
+
+            process = subprocess.Popen(["docker", "load"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       text=False)
+            digest = hashlib.sha256()
+            raw_total = chunks = 0
+            try:
+                with ThreadPoolExecutor(self.workers) as pool:
+                    for data in ordered_map(pool, unpack, frames(), self.workers * 2):
+                        digest.update(data)
+                        process.stdin.write(data)
+                        raw_total += len(data)
+                        chunks += 1
+                trailer = json.loads(archive.readline())
+                if trailer.get("chunks") != chunks or trailer.get("sha256") != digest.hexdigest():
+                    raise ValueError("archive checksum mismatch")
+            except (OSError, ValueError, struct.error, subprocess.CalledProcessError) as e:
+                # Killing docker load before the end of the tar leaves nothing tagged
+                process.kill()
+                process.wait()
+                logger.error(f"Import failed: {e}")
+                return False
+            process.stdin.close()
+            output = process.stdout.read().decode('utf-8', errors='replace')
+            if process.wait() != 0:
+                logger.error("docker load failed")
+                return False
+
+        for line in output.splitlines():
+            logger.info(line)
+        self._report("Imported", raw_total, os.path.getsize(self.path), time.monotonic() - started)
+        return True
+
+
+class VolumeSnapshots:
+    """Deduplicated snapshots of the shared tool volumes.
+
+    A snapshot store is a directory. Every regular file in a volume is cut
+    into blocks of at most BLOCK_SIZE, and each block is stored once, keyed
+    by its SHA-256. New blocks are grouped into zstd-compressed bundles
+    appended to one pack per snapshot, so a second snapshot only writes the
+    blocks that changed. Layout:
+
+        packs/<id>.pack   concatenated zstd bundles
+        packs/<id>.idx    JSON: bundle offsets, block -> (bundle, offset, length)
+        snapshots/<id>.json.zst   per volume: tar entries and their block hashes
+
+    Volumes are read and written with tar in a throwaway container of the
+    image, streamed, so nothing is staged on the host.
+    """
+
+    VOLUMES = ["gemini-shared-tools", "gemini-usr-local", "gemini-apt-lib", "gemini-apt-cache",
+               "gemini-node-modules"]
+    BLOCK_SIZE = 1 << 20
+    BUNDLE_SIZE = 8 << 20
+    CACHED_BUNDLES = 8
+    # Header fields rebuilt from the entry itself when restoring
+    PAX_DERIVED = {"path", "linkpath", "size", "uid", "gid", "uname", "gname", "mtime", "atime", "ctime"}
+
+    def __init__(self, store: str, workers: Optional[int] = None):
+        self.store = Path(store)
+        self.workers = workers or os.cpu_count() or 2
+        self.packs = self.store / "packs"
+        self.snapshots = self.store / "snapshots"
+
+    @staticmethod
+    def tar_image() -> Optional[str]:
+        """A local image to run tar in."""
+        for target in BuildTarget:
+            image = f"{SetupConfig.image_name}:{target.value}"
+            if DockerChecker.image_exists(image):
+                return image
+        return None
+
+    @staticmethod
+    def volume_exists(name: str) -> bool:
+        return subprocess.run(["docker", "volume", "inspect", name], capture_output=True).returncode == 0
+
+    @staticmethod
+    def _tar_command(image: str, volume: str, *args: str, read_only: bool = False) -> List[str]:
+        mount = f"{volume}:/volume" + (":ro" if read_only else "")
+        return ["docker", "run", "--rm", "-i", "--user", "root", "--network", "none",
+                "-v", mount, "--entrypoint", "tar", image, "--numeric-owner", "-C", "/volume", *args]
+
+    def _load_index(self) -> Dict[str, Tuple[str, int, int, int]]:
+        """Every stored block: hash -> (pack, bundle, offset in bundle, length)."""
+        blocks: Dict[str, Tuple[str, int, int, int]] = {}
+        for idx in sorted(self.packs.glob("*.idx")):
+            data = json.loads(idx.read_text(encoding='utf-8'))
+            for digest, (bundle, offset, length) in data["blocks"].items():
+                blocks[digest] = (idx.stem, bundle, offset, length)
+        return blocks
+
+    def ids(self) -> List[str]:
+        return sorted(path.name[:-len(".json.zst")] for path in self.snapshots.glob("*.json.zst"))
+
+    @classmethod
+    def _entry(cls, member: tarfile.TarInfo) -> Dict[str, Any]:
+        entry = {
+            "name": member.name, "type": member.type.decode('ascii'), "mode": member.mode,
+            "uid": member.uid, "gid": member.gid, "mtime": member.mtime,
+        }
+        if member.linkname:
+            entry["linkname"] = member.linkname
+        if member.ischr() or member.isblk():
+            entry["dev"] = [member.devmajor, member.devminor]
+        pax = {k: v for k, v in member.pax_headers.items() if k not in cls.PAX_DERIVED}
+        if pax:
+            entry["pax"] = pax
+        return entry
+
+    def snapshot(self, volumes: List[str]) -> bool:
+        """Store the volumes as a new snapshot."""
+        image = self.tar_image()
+        if image is None:
+            logger.error(f"No {SetupConfig.image_name} image to run tar in - build it first")
+            return False
+        codec = Zstd()
+        self.packs.mkdir(parents=True, exist_ok=True)
+        self.snapshots.mkdir(parents=True, exist_ok=True)
+        known = self._load_index()
+        snapshot_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        while (self.snapshots / f"{snapshot_id}.json.zst").exists():
+            time.sleep(1)
+            snapshot_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        manifest: Dict[str, Any] = {"created": datetime.now().isoformat(timespec="seconds"),
+                                    "block_size": self.BLOCK_SIZE, "volumes": {}}
+        pack_path = self.packs / f"{snapshot_id}.pack"
+        tmp = pack_path.with_name(f".{pack_path.name}.partial")
+        index: Dict[str, Any] = {"bundles": [], "blocks": {}}
+        stats = collections.Counter()
+        started = time.monotonic()
+        logger.info(f"Snapshotting {', '.join(volumes)} into {self.store} "
+                    f"({self.workers} threads, zstd via {codec.name})...")
+
+        def new_bundles(volume: str, process: subprocess.Popen):
+            """Walk the volume's tar stream, yielding bundles of blocks not stored yet."""
+            entries = manifest["volumes"][volume] = []
+            bundle: List[Tuple[str, bytes]] = []
+            size = 0
+            with tarfile.open(fileobj=process.stdout, mode="r|") as tar:
+                for member in tar:
+                    entry = self._entry(member)
+                    entries.append(entry)
+                    stats["entries"] += 1
+                    if member.isreg():
+                        entry["blocks"] = hashes = []
+                        source = tar.extractfile(member)
+                        while True:
+                            block = source.read(self.BLOCK_SIZE)
+                            if not block:
+                                break
+                            digest = hashlib.sha256(block).hexdigest()
+                            hashes.append(digest)
+                            stats["raw"] += len(block)
+                            if digest in known:
+                                continue
+                            known[digest] = (snapshot_id, -1, 0, 0)
+                            bundle.append((digest, block))
+                            size += len(block)
+                            stats["new"] += len(block)
+                            if size >= self.BUNDLE_SIZE:
+                                yield bundle
+                                bundle, size = [], 0
+                    # Stream mode keeps every member otherwise
+                    tar.members = []
+            if bundle:
+                yield bundle
+
+        def pack(bundle: List[Tuple[str, bytes]]) -> Tuple[List[Tuple[str, int]], bytes]:
+            return [(digest, len(block)) for digest, block in bundle], codec.compress(b"".join(b for _, b in bundle))
+
+        try:
+            with open(tmp, 'wb') as out, ThreadPoolExecutor(self.workers) as pool:
+                for volume in volumes:
+                    process = subprocess.Popen(self._tar_command(image, volume, "-cf", "-", ".", read_only=True),
+                                               stdout=subprocess.PIPE)
+                    try:
+                        for blocks, packed in ordered_map(pool, pack, new_bundles(volume, process),
+                                                          self.workers * 2):
+                            bundle_no = len(index["bundles"])
+                            index["bundles"].append([out.tell(), len(packed)])
+                            offset = 0
+                            for digest, length in blocks:
+                                index["blocks"][digest] = [bundle_no, offset, length]
+                                offset += length
+                            out.write(packed)
+                            stats["packed"] += len(packed)
+                    finally:
+                        process.stdout.close()
+                    if process.wait() != 0:
+                        raise RuntimeError(f"reading volume {volume} failed")
+            if index["blocks"]:
+                os.replace(tmp, pack_path)
+                pack_path.with_suffix(".idx").write_text(json.dumps(index), encoding='utf-8')
+            else:
+                tmp.unlink()
+            # The manifest goes last: a snapshot exists only once its blocks do
+            manifest_path = self.snapshots / f"{snapshot_id}.json.zst"
+            manifest_path.write_bytes(codec.compress(json.dumps(manifest).encode('utf-8')))
+        except (OSError, RuntimeError, tarfile.TarError, subprocess.CalledProcessError) as e:
+            logger.error(f"Snapshot failed: {e}")
+            tmp.unlink(missing_ok=True)
+            return False
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        size = BuildProfile.format_size
+        logger.info(f"Snapshot {snapshot_id}: {stats['entries']} entries, {size(stats['raw'])} of file data "
+                    f"in {elapsed:.1f}s - {size(stats['raw'] / elapsed)}/s")
+        logger.info(f"  {size(stats['new'])} new, stored as {size(stats['packed'])}; "
+                    f"{size(stats['raw'] - stats['new'])} already in the store")
+        return True
+
+    def restore(self, snapshot_id: Optional[str], volumes: Optional[List[str]]) -> bool:
+        """Recreate the volumes of a snapshot (default: the latest) as fresh volumes."""
+        available = self.ids()
+        if not available:
+            logger.error(f"No snapshots in {self.store}")
+            return False
+        snapshot_id = snapshot_id or available[-1]
+        if snapshot_id not in available:
+            logger.error(f"No snapshot {snapshot_id} - available: {', '.join(available)}")
+            return False
+        image = self.tar_image()
+        if image is None:
+            logger.error(f"No {SetupConfig.image_name} image to run tar in - build it first")
+            return False
+        codec = Zstd()
+        manifest = json.loads(codec.decompress((self.snapshots / f"{snapshot_id}.json.zst").read_bytes()))
+        volumes = volumes or list(manifest["volumes"])
+        missing = [v for v in volumes if v not in manifest["volumes"]]
+        if missing:
+            logger.error(f"Snapshot {snapshot_id} has no {', '.join(missing)}")
+            return False
+        existing = [v for v in volumes if self.volume_exists(v)]
+        if existing:
+            logger.error(f"Volumes already exist: {', '.join(existing)}")
+            logger.info("Restores go into fresh volumes - stop the container and remove them first:")
+            logger.info(f"  docker volume rm {' '.join(existing)}")
+            return False
+
+        index = self._load_index()
+        bundles = {pack.stem: json.loads(pack.read_text(encoding='utf-8'))["bundles"]
+                   for pack in self.packs.glob("*.idx")}
+        started = time.monotonic()
+        raw_total = 0
+        logger.info(f"Restoring {', '.join(volumes)} from snapshot {snapshot_id} ({self.workers} threads)...")
+
+        def loads(entries: List[Dict[str, Any]]):
+            """Bundles in the order the entries need them.
+
+            Replays the accesses against an LRU of the same size as the one
+            ``block`` keeps, and yields only the misses, so duplicate blocks
+            pointing back at a recent bundle do not decompress it again.
+            """
+            cached: "collections.OrderedDict" = collections.OrderedDict()
+            for entry in entries:
+                for digest in entry.get("blocks", ()):
+                    if digest not in index:
+                        raise ValueError(f"block {digest[:12]} of {entry['name']} is missing from the store")
+                    key = index[digest][:2]
+                    if key in cached:
+                        cached.move_to_end(key)
+                        continue
+                    cached[key] = True
+                    if len(cached) > self.CACHED_BUNDLES:
+                        cached.popitem(last=False)
+                    yield key
+
+        def unpack(key: Tuple[str, int]) -> Tuple[Tuple[str, int], bytes]:
+            pack_id, bundle_no = key
+            offset, length = bundles[pack_id][bundle_no]
+            with open(self.packs / f"{pack_id}.pack", 'rb') as pack_file:
+                pack_file.seek(offset)
+                packed = pack_file.read(length)
+            try:
+                return key, codec.decompress(packed)
+            except Exception as e:  # each zstd backend raises its own error type
+                raise ValueError(f"bundle {bundle_no} of pack {pack_id} is corrupt: {e}") from e
+
+        cached: "collections.OrderedDict" = collections.OrderedDict()
+        bundle_stream = iter(())
+
+        def block(digest: str) -> bytes:
+            pack_id, bundle_no, offset, length = index[digest]
+            key = (pack_id, bundle_no)
+            if key in cached:
+                cached.move_to_end(key)
+            else:
+                # loads() yields exactly the misses, in this order
+                _, cached[key] = next(bundle_stream)
+                if len(cached) > self.CACHED_BUNDLES:
+                    cached.popitem(last=False)
+            data = cached[key][offset:offset + length]
+            if hashlib.sha256(data).hexdigest() != digest:
+                raise ValueError(f"block {digest[:12]} is corrupt (checksum mismatch)")
+            return data
+
+        class Contents:
+            """A file's contents as a stream, block by block from the bundles."""
+
+            def __init__(self, digests: List[str]):
+                self.digests = iter(digests)
+                self.data = b""
+                self.position = 0
+
+            def read(self, size: int) -> bytes:
+                parts = []
+                while size > 0:
+                    if self.position == len(self.data):
+                        digest = next(self.digests, None)
+                        if digest is None:
+                            break
+                        self.data, self.position = block(digest), 0
+                    part = self.data[self.position:self.position + size]
+                    self.position += len(part)
+                    size -= len(part)
+                    parts.append(part)
+                return b"".join(parts)
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            for volume in volumes:
+                entries = manifest["volumes"][volume]
+                subprocess.run(["docker", "volume", "create", volume], capture_output=True, check=True)
+                process = subprocess.Popen(self._tar_command(image, volume, "-xpf", "-"), stdin=subprocess.PIPE)
+                cached.clear()
+                bundle_stream = ordered_map(pool, unpack, loads(entries), self.workers * 2)
+                try:
+                    with tarfile.open(fileobj=process.stdin, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                        for entry in entries:
+                            member = tarfile.TarInfo(entry["name"])
+                            member.type = entry["type"].encode('ascii')
+                            member.mode, member.uid, member.gid = entry["mode"], entry["uid"], entry["gid"]
+                            member.mtime = entry["mtime"]
+                            member.linkname = entry.get("linkname", "")
+                            member.devmajor, member.devminor = entry.get("dev", (0, 0))
+                            member.pax_headers = entry.get("pax", {})
+                            if member.isreg():
+                                member.size = sum(index[digest][3] for digest in entry["blocks"])
+                                tar.addfile(member, Contents(entry["blocks"]))
+                                raw_total += member.size
+                            else:
+                                tar.addfile(member)
+                    process.stdin.close()
+                    if process.wait() != 0:
+                        raise RuntimeError(f"writing volume {volume} failed")
+                except (OSError, ValueError, RuntimeError, tarfile.TarError, subprocess.CalledProcessError) as e:
+                    process.kill()
+                    process.wait()
+                    # Do not leave a half-restored volume behind to be mistaken for a good one
+                    subprocess.run(["docker", "volume", "rm", "-f", volume], capture_output=True)
+                    logger.error(f"Restoring {volume} failed: {e}")
+                    return False
+                logger.info(f"  {volume}: {len(entries)} entries")
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        logger.info(f"Restored {BuildProfile.format_size(raw_total)} of file data in {elapsed:.1f}s "
+                    f"- {BuildProfile.format_size(raw_total / elapsed)}/s")
+        return True
+
+
 @dataclass
 class SetupConfig:
     """Configuration for setup process."""
@@ -37,6 +588,350 @@ class SetupConfig:
     no_cache: bool = False
     image_name: str = "gemini-cli-container"
     container_name: str = "gemini-persistent"
+    # Cache build mode (buildx bake): see CacheBuilder
+    cache_dir: Optional[str] = None
+    cache_archive: Optional[str] = None
+    build_both: bool = False
+
+    @property
+    def cache_build(self) -> bool:
+        return bool(self.cache_dir or self.cache_archive or self.build_both)
+
+
+@dataclass
+class CacheStats:
+    """BuildKit cache hits of one build, per target."""
+    steps: Dict[str, int]
+    cached: Dict[str, int]
+
+    def summary(self) -> str:
+        parts = [
+            f"{target} {self.cached.get(target, 0)}/{total} ({self.cached.get(target, 0) / total:.0%})"
+            for target, total in sorted(self.steps.items()) if total
+        ]
+        total, cached = sum(self.steps.values()), sum(self.cached.values())
+        if total:
+            parts.append(f"total {cached}/{total} ({cached / total:.0%})")
+        return ", ".join(parts) or "no build steps reported"
+
+    @classmethod
+    def from_profile(cls, profile: 'BuildProfile') -> 'CacheStats':
+        stats = cls({}, {})
+        for step in profile.steps:
+            if BuildProfile.STEP_RE.match(step.name):
+                stats.steps[step.target] = stats.steps.get(step.target, 0) + 1
+                if step.cached:
+                    stats.cached[step.target] = stats.cached.get(step.target, 0) + 1
+        return stats
+
+
+@dataclass
+class BuildStep:
+    """One BuildKit vertex of a profiled build."""
+    target: str
+    name: str
+    seconds: float
+    cached: bool
+    size: Optional[int] = None
+
+
+class BuildProfile:
+    """Per-step durations, cache hits and layer sizes of one build.
+
+    Fed with BuildKit's rawjson progress (one solve status per line), which
+    it echoes in the plain progress form so the build stays readable.
+    Profiles are appended to HISTORY for --compare.
+    """
+
+    HISTORY = Path(os.environ.get("GEMINI_LAUNCHER_HOME", Path.home() / ".gemini-launcher")) / "build-history.jsonl"
+
+    # Dockerfile steps ("[stage 3/7] RUN ..."); bake adds the target in front
+    STEP_RE = re.compile(r"^\[(?:(\S+) )?[^\]]*\d+/\d+\] ")
+    TIME_RE = re.compile(r"^(.*T\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)$")
+
+    def __init__(self, targets: List[str]):
+        self.targets = targets
+        self.started = time.time()
+        self.seconds = 0.0
+        self.steps: List[BuildStep] = []
+        self._vertexes: Dict[str, dict] = {}
+        self._numbers: Dict[str, int] = {}
+
+    def feed(self, line: str) -> None:
+        """Consume one line of rawjson progress."""
+        try:
+            status = json.loads(line)
+        except ValueError:
+            # Errors from the CLI itself are not JSON
+            sys.stdout.write(line)
+            return
+
+        for vertex in status.get("vertexes") or []:
+            digest = vertex.get("digest")
+            known = self._vertexes.setdefault(digest, {})
+            if digest not in self._numbers:
+                self._numbers[digest] = len(self._numbers) + 1
+                print(f"#{self._numbers[digest]} {vertex.get('name', '')}")
+            if vertex.get("completed") and not known.get("completed"):
+                number = self._numbers[digest]
+                if vertex.get("error"):
+                    print(f"#{number} ERROR: {vertex['error']}")
+                elif vertex.get("cached"):
+                    print(f"#{number} CACHED")
+                elif vertex.get("started"):
+                    print(f"#{number} DONE {self._duration(vertex):.1f}s")
+            known.update(vertex)
+
+        for log in status.get("logs") or []:
+            number = self._numbers.get(log.get("vertex"), 0)
+            data = base64.b64decode(log.get("data") or "").decode("utf-8", errors="replace")
+            for text in data.splitlines():
+                print(f"#{number} {text}")
+
+    def follow(self, cmd: List[str]) -> int:
+        """Run a build emitting rawjson progress and feed its output."""
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding='utf-8', errors='replace'
+        )
+        for line in process.stdout:
+            self.feed(line)
+        returncode = process.wait()
+        self.finish()
+        return returncode
+
+    def finish(self) -> None:
+        """Turn the collected vertexes into steps."""
+        self.seconds = time.time() - self.started
+        for vertex in self._vertexes.values():
+            name = vertex.get("name", "")
+            if not vertex.get("completed") or name.startswith("[internal]"):
+                continue
+            step = self.STEP_RE.match(name)
+            if len(self.targets) > 1 and step and step.group(1):
+                target = step.group(1)
+            else:
+                target = self.targets[0]
+            seconds = 0.0 if vertex.get("cached") or not vertex.get("started") else self._duration(vertex)
+            self.steps.append(BuildStep(target, name, round(seconds, 3), bool(vertex.get("cached"))))
+
+    def attach_sizes(self, image: str, target: str) -> None:
+        """Take layer sizes of the target's final stage from docker history."""
+        result = CommandRunner.run_list(
+            ["docker", "history", "--no-trunc", "--human=false",
+             "--format", "{{.CreatedBy}}\t{{.Size}}", image],
+            check=False
+        )
+        sizes = {}
+        for line in result.stdout.splitlines():
+            created_by, _, size = line.rpartition("\t")
+            if size.isdigit():
+                sizes[self.instruction(created_by)] = int(size)
+        for step in self.steps:
+            if step.target == target:
+                step.size = sizes.get(self.instruction(step.name), step.size)
+
+    @classmethod
+    def instruction(cls, text: str) -> str:
+        """Normalize a step name or history entry to the bare instruction."""
+        text = re.sub(r"^\[[^\]]*\] ", "", text)
+        text = re.sub(r"\s*# buildkit$", "", text)
+        # History RUN entries carry the build args: "RUN |1 BUILD_VERSION=full /bin/sh -c ..."
+        args = re.match(r"^RUN \|(\d+) ", text)
+        if args:
+            text = "RUN " + text[args.end():].split(" ", int(args.group(1)))[-1]
+        text = text.replace("/bin/sh -c ", "", 1)
+        return " ".join(text.split())
+
+    def _duration(self, vertex: dict) -> float:
+        return self._timestamp(vertex["completed"]) - self._timestamp(vertex["started"])
+
+    @classmethod
+    def _timestamp(cls, value: str) -> float:
+        # BuildKit reports nanoseconds, which fromisoformat does not take
+        match = cls.TIME_RE.match(value)
+        if not match:
+            return 0.0
+        zone = "+00:00" if match.group(3) == "Z" else match.group(3)
+        return datetime.fromisoformat(match.group(1) + zone).timestamp() + float("0." + (match.group(2) or "0"))
+
+    def report(self, limit: int = 10) -> None:
+        """Print the most expensive steps."""
+        ranked = sorted(self.steps, key=lambda step: step.seconds, reverse=True)[:limit]
+        if not ranked:
+            return
+        logger.info("\nMost expensive build steps:")
+        logger.info(f"  {'Time':>8}  {'Size':>9}  Step")
+        for step in ranked:
+            cached = "CACHED" if step.cached else f"{step.seconds:.1f}s"
+            logger.info(f"  {cached:>8}  {self.format_size(step.size):>9}  {self._short(step.name)}")
+
+    def save(self) -> None:
+        """Append the profile to the build history."""
+        entry = {
+            "time": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "targets": self.targets,
+            "seconds": round(self.seconds, 1),
+            "steps": [asdict(step) for step in self.steps],
+        }
+        try:
+            self.HISTORY.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.HISTORY, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not save build profile: {e}")
+
+    @classmethod
+    def history(cls) -> List[dict]:
+        try:
+            with open(cls.HISTORY, encoding='utf-8') as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except (OSError, ValueError):
+            return []
+
+    @classmethod
+    def compare(cls, builds: List[int]) -> bool:
+        """Show step regressions between two builds of the history.
+
+        Builds are 1-based history positions (negative count from the end);
+        without any, the last build is compared with the previous build of
+        the same targets.
+        """
+        history = cls.history()
+        if len(history) < 2:
+            logger.error(f"Need at least two profiled builds in {cls.HISTORY}")
+            return False
+        try:
+            if builds:
+                old, new = (history[b - 1 if b > 0 else b] for b in builds)
+            else:
+                new = history[-1]
+                old = next(h for h in reversed(history[:-1]) if h["targets"] == new["targets"])
+        except (IndexError, StopIteration):
+            logger.error(f"No such builds to compare ({len(history)} in history)")
+            return False
+
+        logger.info(f"Comparing build {old['time']} ({'+'.join(old['targets'])}, {old['seconds']:.0f}s)")
+        logger.info(f"     with build {new['time']} ({'+'.join(new['targets'])}, {new['seconds']:.0f}s)\n")
+
+        def key(step: dict) -> tuple:
+            return step["target"], cls.instruction(step["name"])
+
+        before = {key(step): step for step in old["steps"]}
+        rows = []
+        for step in new["steps"]:
+            prev = before.pop(key(step), None)
+            if prev is None:
+                rows.append((step["seconds"], "new", step, None))
+                continue
+            delta = step["seconds"] - prev["seconds"]
+            grown = (step.get("size") or 0) - (prev.get("size") or 0)
+            slower = delta >= 5 and delta >= 0.2 * prev["seconds"]
+            bigger = grown >= 50 * 1024 ** 2 and grown >= 0.2 * (prev.get("size") or 0)
+            rows.append((delta, "REGRESSION" if slower or bigger else "", step, prev))
+        for step in before.values():
+            rows.append((-step["seconds"], "removed", step, None))
+
+        logger.info(f"  {'Before':>8}  {'After':>8}  {'Delta':>8}  {'Size':>9}  Step")
+        for delta, flag, step, prev in sorted(rows, key=lambda row: row[0], reverse=True):
+            if not flag and abs(delta) < 1:
+                continue
+            old_time = f"{prev['seconds']:.1f}s" if prev else "-"
+            new_time = f"{step['seconds']:.1f}s" if flag != "removed" else "-"
+            logger.info(
+                f"  {old_time:>8}  {new_time:>8}  {delta:>+7.1f}s  {cls.format_size(step.get('size')):>9}  "
+                f"{cls._short(step['name'])}{'  ' + flag if flag else ''}"
+            )
+        regressions = sum(1 for row in rows if row[1] == "REGRESSION")
+        logger.info(f"\nTotal: {old['seconds']:.0f}s -> {new['seconds']:.0f}s, {regressions} regressed step(s)")
+        return True
+
+    @staticmethod
+    def format_size(size: Optional[int]) -> str:
+        if size is None:
+            return "-"
+        for unit in ("B", "KB", "MB"):
+            if size < 1024:
+                return f"{size:.0f}{unit}"
+            size /= 1024
+        return f"{size:.1f}GB"
+
+    @staticmethod
+    def _short(name: str, width: int = 70) -> str:
+        name = " ".join(name.split())
+        return name if len(name) <= width else name[:width - 3] + "..."
+
+
+class Tracer:
+    """Records timed spans of the setup as Chrome trace events.
+
+    Off by default; ``span`` then hands out one shared no-op context
+    manager, so instrumented code pays a single attribute check.
+    """
+
+    SUMMARY_TOP = 3
+
+    _events: Optional[List[dict]] = None
+    _path: Optional[str] = None
+    _origin = 0.0
+    _off = nullcontext()
+
+    @classmethod
+    def enable(cls, path: str) -> None:
+        """Start recording; the trace is written to ``path`` by ``finish``."""
+        cls._events = []
+        cls._path = path
+        cls._origin = time.perf_counter()
+
+    @classmethod
+    def span(cls, name: str, cat: str = "setup", **args: Any):
+        """Context manager timing one phase."""
+        if cls._events is None:
+            return cls._off
+        return cls._record(name, cat, args)
+
+    @classmethod
+    @contextmanager
+    def _record(cls, name: str, cat: str, args: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            cls._events.append({
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - cls._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    @classmethod
+    def summary(cls) -> str:
+        """One line naming the slowest phases (longest single span of each)."""
+        longest: Dict[str, float] = {}
+        for event in cls._events or ():
+            if event["ph"] == "X":
+                longest[event["name"]] = max(longest.get(event["name"], 0.0), event["dur"] / 1e6)
+        slowest = sorted(longest.items(), key=lambda item: item[1], reverse=True)[:cls.SUMMARY_TOP]
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in slowest) or "no spans"
+
+    @classmethod
+    def finish(cls) -> None:
+        """Write the trace file and log the summary; later calls do nothing."""
+        if cls._events is None or cls._path is None:
+            return
+        path, cls._path = cls._path, None
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({"traceEvents": cls._events, "displayTimeUnit": "ms"}, f)
+        except OSError as e:
+            logger.warning(f"Could not write trace to {path}: {e}")
+            return
+        logger.info(f"Trace written to {path} - slowest: {cls.summary()}")
 
 
 class CommandRunner:
@@ -45,6 +940,11 @@ class CommandRunner:
     @staticmethod
     def run(cmd: str, check: bool = True, show_output: bool = False) -> bool:
         """Execute command with optional output display."""
+        with Tracer.span(cmd if isinstance(cmd, str) else " ".join(cmd), cat="command"):
+            return CommandRunner._run(cmd, check, show_output)
+
+    @staticmethod
+    def _run(cmd: str, check: bool, show_output: bool) -> bool:
         try:
             # Force UTF-8 encoding
             env = os.environ.copy()
@@ -93,15 +993,118 @@ class CommandRunner:
         env = os.environ.copy()
         env['PYTHONIOENCODING'] = 'utf-8'
 
-        return subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            env=env,
-            check=check
+        with Tracer.span(" ".join(cmd), cat="command"):
+            return subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                env=env,
+                check=check
+            )
+
+
+class CacheBuilder:
+    """Builds images with docker buildx bake and a portable BuildKit cache.
+
+    All targets are built in one bake invocation, so slim and full compute
+    their shared base layers once. The cache is imported from and exported
+    to a local directory (type=local), optionally kept as a tar archive, so
+    a wiped or new machine rebuilds from the cache instead of downloading
+    every package again.
+    """
+
+    # The default docker driver cannot export cache
+    BUILDER = "gemini-cache-builder"
+
+    def __init__(self, config: SetupConfig, targets: List[BuildTarget]):
+        self.config = config
+        self.targets = targets
+
+    def ensure_builder(self) -> bool:
+        """Create the docker-container builder on first use."""
+        inspect = CommandRunner.run_list(["docker", "buildx", "inspect", self.BUILDER], check=False)
+        if inspect.returncode == 0:
+            return True
+        logger.info(f"Creating buildx builder {self.BUILDER}...")
+        create = CommandRunner.run_list(
+            ["docker", "buildx", "create", "--name", self.BUILDER, "--driver", "docker-container"],
+            check=False
         )
+        if create.returncode != 0:
+            logger.error(f"Could not create buildx builder: {create.stderr.strip()}")
+        return create.returncode == 0
+
+    def definition(self, cache_dir: Path) -> dict:
+        """Bake file building every target with the local cache."""
+        # Every target reads all targets' caches (the base layers are shared)
+        cache_from = [
+            f"type=local,src={cache_dir / t.value}" for t in BuildTarget
+            if (cache_dir / t.value / "index.json").exists()
+        ]
+        targets = {}
+        for target in self.targets:
+            targets[target.value] = {
+                "context": str(Path(__file__).parent),
+                "dockerfile": "Dockerfile",
+                "args": {"BUILD_VERSION": target.value},
+                "tags": [f"{self.config.image_name}:{target.value}"],
+                "cache-from": cache_from,
+                # Exported next to the old cache and swapped in afterwards;
+                # exporting into the directory being read keeps growing it
+                "cache-to": [f"type=local,dest={cache_dir / (target.value + '.new')},mode=max"],
+                "output": ["type=docker"],
+            }
+        return {"group": {"default": {"targets": list(targets)}}, "target": targets}
+
+    def build(self, cache_dir: Path) -> Optional[BuildProfile]:
+        """Run the bake, echoing its progress; None if it failed."""
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', suffix=".json", delete=False) as f:
+            json.dump(self.definition(cache_dir), f)
+        cmd = ["docker", "buildx", "bake", "--builder", self.BUILDER, "--progress", "rawjson", "-f", f.name]
+
+        profile = BuildProfile([t.value for t in self.targets])
+        try:
+            with Tracer.span("buildx bake", cat="command", targets=profile.targets):
+                returncode = profile.follow(cmd)
+        finally:
+            os.unlink(f.name)
+
+        if returncode != 0:
+            return None
+
+        for target in self.targets:
+            fresh = cache_dir / (target.value + ".new")
+            if fresh.exists():
+                shutil.rmtree(cache_dir / target.value, ignore_errors=True)
+                fresh.rename(cache_dir / target.value)
+            profile.attach_sizes(f"{self.config.image_name}:{target.value}", target.value)
+        profile.save()
+        return profile
+
+    @staticmethod
+    def import_archive(archive: Path, cache_dir: Path) -> None:
+        """Unpack a cache archive (.tar, .tar.gz) into the cache directory."""
+        logger.info(f"Importing build cache from {archive}...")
+        with tarfile.open(archive, "r:*") as tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extractall(cache_dir, filter="data")
+            else:
+                tar.extractall(cache_dir)
+
+    @staticmethod
+    def export_archive(cache_dir: Path, archive: Path) -> None:
+        """Pack the cache directory into an archive, replacing it atomically."""
+        logger.info(f"Exporting build cache to {archive}...")
+        mode = "w:gz" if archive.name.endswith((".gz", ".tgz")) else "w"
+        tmp = archive.with_name(archive.name + ".tmp")
+        with tarfile.open(tmp, mode) as tar:
+            for entry in sorted(cache_dir.iterdir()):
+                if not entry.name.endswith(".new"):
+                    tar.add(entry, arcname=entry.name)
+        os.replace(tmp, archive)
 
 
 class DockerChecker:
@@ -111,12 +1114,13 @@ class DockerChecker:
     def is_docker_running() -> bool:
         """Check if Docker is running."""
         try:
-            result = subprocess.run(
-                ["docker", "version"],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            with Tracer.span("docker version", cat="docker"):
+                result = subprocess.run(
+                    ["docker", "version"],
+                    capture_output=True,
+                    text=True,
+                    timeout=5
+                )
             return result.returncode == 0
         except (subprocess.TimeoutExpired, FileNotFoundError):
             return False
@@ -124,21 +1128,23 @@ class DockerChecker:
     @staticmethod
     def image_exists(image_name: str) -> bool:
         """Check if Docker image exists."""
-        result = subprocess.run(
-            ["docker", "images", "-q", image_name],
-            capture_output=True,
-            text=True
-        )
+        with Tracer.span("docker images", cat="docker"):
+            result = subprocess.run(
+                ["docker", "images", "-q", image_name],
+                capture_output=True,
+                text=True
+            )
         return bool(result.stdout.strip())
 
     @staticmethod
     def container_exists(container_name: str) -> bool:
         """Check if Docker container exists."""
-        result = subprocess.run(
-            ["docker", "ps", "-a", "--format", "{{.Names}}"],
-            capture_output=True,
-            text=True
-        )
+        with Tracer.span("docker ps", cat="docker"):
+            result = subprocess.run(
+                ["docker", "ps", "-a", "--format", "{{.Names}}"],
+                capture_output=True,
+                text=True
+            )
         return container_name in result.stdout.splitlines()
 
 
@@ -184,6 +1190,10 @@ class ImageSetup:
         """Build or verify Docker image."""
         logger.info("\nChecking Docker image...")
 
+        if self.config.cache_build:
+            # Asked for explicitly - always build, the cache makes it cheap
+            return self._build_cached()
+
         if self.docker_checker.image_exists(f"{self.config.image_name}:{self.config.build_target.value}"):
             logger.info("Image already exists")
             logger.info("  Tip: To rebuild with new dependencies use:")
@@ -205,25 +1215,70 @@ class ImageSetup:
         # Set environment
         os.environ['DOCKER_TARGET'] = build_target.value
 
-        # Build command
-        build_cmd = "docker compose build"
+        # Build command - the docker-compose.yml build section, with
+        # machine-readable progress for the build profile
+        image = f"{self.config.image_name}:{build_target.value}"
+        build_cmd = [
+            "docker", "buildx", "build", "--progress", "rawjson", "--load",
+            "--build-arg", f"BUILD_VERSION={build_target.value}",
+            "--cache-from", image, "--cache-from", f"{self.config.image_name}:latest",
+            "-t", image, str(Path(__file__).parent)
+        ]
         if not use_cache:
-            build_cmd += " --no-cache"
+            build_cmd.insert(3, "--no-cache")
 
         logger.info(f"\nBuilding {build_target.value} image...")
         logger.info("Docker BuildKit enabled for faster builds!")
 
         start_time = time.time()
-        success = self.command_runner.run(build_cmd, show_output=True)
+        profile = BuildProfile([build_target.value])
+        with Tracer.span("build image", target=build_target.value, cache=use_cache):
+            success = profile.follow(build_cmd) == 0
 
         if success:
             build_time = time.time() - start_time
             logger.info(f"\nBuild completed in {build_time:.0f} seconds ({build_time/60:.1f} minutes)")
+            profile.attach_sizes(image, build_target.value)
+            profile.save()
+            profile.report()
+            logger.info(f"Compare with earlier builds: python {Path(__file__).name} --compare")
         else:
             logger.error("Build failed!")
 
         return success
 
+    def _build_cached(self) -> bool:
+        """Build with buildx bake and a local BuildKit cache."""
+        if self.config.build_both:
+            targets = [BuildTarget.SLIM, BuildTarget.FULL]
+        else:
+            targets = [self.config.build_target]
+        builder = CacheBuilder(self.config, targets)
+        if not builder.ensure_builder():
+            return False
+
+        archive = Path(self.config.cache_archive) if self.config.cache_archive else None
+        with tempfile.TemporaryDirectory(prefix="build-cache-") as tmp:
+            cache_dir = Path(self.config.cache_dir) if self.config.cache_dir else Path(tmp)
+            if archive is not None and archive.exists():
+                CacheBuilder.import_archive(archive, cache_dir)
+
+            logger.info(f"\nBuilding {' + '.join(t.value for t in targets)} with buildx bake...")
+            start_time = time.time()
+            profile = builder.build(cache_dir)
+            if profile is None:
+                logger.error("Build failed!")
+                return False
+            build_time = time.time() - start_time
+
+            if archive is not None:
+                CacheBuilder.export_archive(cache_dir, archive)
+
+        logger.info(f"\nBuild completed in {build_time:.0f} seconds ({build_time/60:.1f} minutes)")
+        logger.info(f"Cache hits: {CacheStats.from_profile(profile).summary()}")
+        profile.report()
+        return True
+
     def _ensure_container(self) -> None:
         """Ensure persistent container exists."""
         logger.info("\nChecking persistent container...")
@@ -301,7 +1356,9 @@ class ImageSetup:
         logger.info("  - gemini-apt-cache: APT package cache")
         logger.info("  - gemini-usr-local: System-wide installations")
         logger.info("  - gemini-node-modules: Node.js global packages")
+        logger.info("  - gemini-node-cache: Compiled CLI code, so sessions start faster")
         logger.info("  - Project directory: Mounted isolated in container")
+        logger.info("  Snapshot the tool volumes with: python setup.py --snapshot-volumes DIR")
 
         logger.info("\n🆓 FREE Gemini 2.5 Pro Features:")
         logger.info("  - 1 million token context window")
@@ -326,7 +1383,7 @@ class ImageSetup:
 
         if version == "slim":
             logger.info("\n📦 SLIM Version - Available tools:")
-            logger.info("  - Node.js 20 + npm")
+            logger.info("  - Node.js 22 + npm")
             logger.info("  - Python 3 + pip (requests, beautifulsoup4, google-generativeai)")
             logger.info("  - Java 17 (OpenJDK) + Maven")
             logger.info("  - Git, vim, nano")
@@ -334,7 +1391,7 @@ class ImageSetup:
         else:
             logger.info("\n📦 FULL Version - Available tools:")
             logger.info("  Programming languages:")
-            logger.info("  - Node.js 20 + npm")
+            logger.info("  - Node.js 22 + npm")
             logger.info("  - Python 3 + pip")
             logger.info("  - Java 17 (OpenJDK) + Maven + Gradle")
             logger.info("  - Ruby")
@@ -357,8 +1414,87 @@ class ImageSetup:
 
 def main() -> None:
     """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace of the setup phases to FILE")
+    parser.add_argument("--target", choices=[t.value for t in BuildTarget],
+                        help="image version for the cache build (default: full)")
+    parser.add_argument("--both", action="store_true",
+                        help="build slim and full together, sharing their base layers")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="import/export the BuildKit cache in DIR (type=local)")
+    parser.add_argument("--cache-archive", metavar="FILE",
+                        help="import/export the BuildKit cache as a .tar or .tar.gz archive")
+    parser.add_argument("--compare", nargs="*", type=int, metavar="BUILD",
+                        help="show step regressions between two profiled builds "
+                             "(history positions; default: the last two of the same target)")
+    parser.add_argument("--export", metavar="FILE",
+                        help="write the built image (--target, or both with --both) to a zstd chunked archive")
+    parser.add_argument("--import", dest="import_archive", metavar="FILE",
+                        help="load an image archive written by --export instead of building")
+    parser.add_argument("--snapshot-volumes", metavar="DIR",
+                        help="store a deduplicated snapshot of the shared tool volumes in DIR")
+    parser.add_argument("--restore-volumes", metavar="DIR",
+                        help="recreate the shared tool volumes from a snapshot in DIR")
+    parser.add_argument("--snapshot", metavar="ID",
+                        help="snapshot for --restore-volumes (default: the latest)")
+    parser.add_argument("--volumes", metavar="LIST",
+                        help=f"comma-separated volumes to snapshot or restore "
+                             f"(default: {', '.join(VolumeSnapshots.VOLUMES)})")
+    parser.add_argument("--threads", type=int, metavar="N",
+                        help="compression threads for archives and snapshots (default: CPU count)")
+    args = parser.parse_args()
+    if args.trace:
+        Tracer.enable(args.trace)
+
+    if args.compare is not None:
+        if len(args.compare) not in (0, 2):
+            parser.error("--compare takes no or two build positions")
+        sys.exit(0 if BuildProfile.compare(args.compare) else 1)
+
+    if args.snapshot_volumes or args.restore_volumes:
+        volumes = [v.strip() for v in args.volumes.split(",") if v.strip()] if args.volumes else None
+        snapshots = VolumeSnapshots(args.snapshot_volumes or args.restore_volumes, args.threads)
+        try:
+            if args.restore_volumes:
+                sys.exit(0 if snapshots.restore(args.snapshot, volumes) else 1)
+            volumes = volumes or VolumeSnapshots.VOLUMES
+            missing = [v for v in volumes if not VolumeSnapshots.volume_exists(v)]
+            if missing:
+                logger.error(f"No such volume: {', '.join(missing)}")
+                sys.exit(1)
+            sys.exit(0 if snapshots.snapshot(volumes) else 1)
+        except (OSError, RuntimeError, ValueError, subprocess.CalledProcessError) as e:
+            logger.error(str(e))
+            sys.exit(1)
+
+    if args.export or args.import_archive:
+        archive = ImageArchive(args.export or args.import_archive, args.threads)
+        try:
+            if args.import_archive:
+                sys.exit(0 if archive.load() else 1)
+            targets = [BuildTarget(args.target)] if args.target else [BuildTarget.FULL]
+            if args.both:
+                targets = list(BuildTarget)
+            references = []
+            for target in targets:
+                image = f"{SetupConfig.image_name}:{target.value}"
+                if not DockerChecker.image_exists(image):
+                    logger.error(f"Image {image} does not exist - build it first")
+                    sys.exit(1)
+                references.append(image)
+            sys.exit(0 if archive.export(references) else 1)
+        except (OSError, RuntimeError) as e:
+            logger.error(str(e))
+            sys.exit(1)
+
     try:
-        config = SetupConfig()
+        config = SetupConfig(
+            cache_dir=args.cache_dir,
+            cache_archive=args.cache_archive,
+            build_both=args.both,
+        )
+        if args.target:
+            config.build_target = BuildTarget(args.target)
         setup = ImageSetup(config)
         setup.run()
     except KeyboardInterrupt:
@@ -367,6 +1503,8 @@ def main() -> None:
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         sys.exit(1)
+    finally:
+        Tracer.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Launch-latency benchmark for claude.py and gemini.py.
+
+Puts fake ``docker`` / ``docker-compose`` executables (fake_docker.py) on
+PATH and drives ClaudeLauncher and GeminiLauncher in-process, end to end up
+to the final ``docker exec``, across the cold / stopped / warm / slow-start
+scenarios and resuming a paused container. The stress scenario instead
+starts 20 launcher processes at once against a missing container and checks
+that exactly one of them creates it. Reports p50/p95/p99 per phase and in
+total, and writes JSON so runs can be compared across commits:
+
+    python bench.py --iterations 30 --output before.json
+    python bench.py --iterations 30 --output after.json
+    python bench.py --compare before.json after.json
+
+``--cli-startup`` instead times the agent CLI itself (``--version``) in the
+real running container, with its V8 compile cache disabled and enabled:
+
+    python bench.py --cli-startup --iterations 10 --output cli.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import builtins
+import platform
+import tempfile
+import subprocess
+import importlib.util
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Callable, Tuple
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+
+
+@dataclass
+class Scenario:
+    """Initial fake daemon state for one benchmark scenario."""
+    name: str
+    container_state: Optional[str]  # None = container does not exist
+    delays: Dict[str, float] = field(default_factory=dict)
+    ready_after: float = 0.0
+    # Keep the launcher's on-disk caches between iterations
+    warm_cache: bool = False
+    # Launchers started at once, as separate processes
+    concurrency: int = 1
+    # Launcher feature the scenario exercises (see Tool.features)
+    needs: Optional[str] = None
+
+
+# Rough per-command latencies of a local Docker daemon, on top of the fake
+# executable's own process start-up
+DEFAULT_DELAYS = {
+    "version": 0.03,
+    "images": 0.02,
+    "inspect": 0.02,
+    "start": 0.3,
+    "compose-up": 1.5,
+    "unpause": 0.01,
+    "exec": 0.0,
+}
+
+SCENARIOS = {
+    "cold": Scenario("cold", None),
+    "stopped": Scenario("stopped", "exited"),
+    "warm": Scenario("warm", "running"),
+    "cached": Scenario("cached", "running", warm_cache=True),
+    "slow-start": Scenario("slow-start", "exited", {"start": 1.0}, ready_after=1.0),
+    "paused": Scenario("paused", "paused", needs="unpause"),
+    "stress": Scenario("stress", None, concurrency=min(20, 4 * (os.cpu_count() or 1)),
+                       needs="single-flight"),
+}
+
+# Each stress iteration spawns a whole batch of launcher processes; the
+# default batch scales with the cores so the launchers' 2s Docker probes
+# do not time out on small hosts
+STRESS_ITERATIONS = 3
+
+
+@dataclass
+class Tool:
+    """One launcher under test."""
+    name: str
+    script: Path
+    launcher_class: str
+    launch_method: str
+    container: str
+    image: str
+    state_env: str
+    # Behaviour some scenarios depend on: "single-flight" (concurrent
+    # starts are serialized), "unpause" (resumes a paused container)
+    features: Tuple[str, ...] = ()
+    # Agent CLI inside the container, for --cli-startup: command, user,
+    # package.json and compile cache directory prefix
+    cli: Tuple[str, str, str, str] = ("", "", "", "")
+
+
+TOOLS = {
+    "claude": Tool("claude", REPO_DIR / "claude-code-starter" / "claude.py", "ClaudeLauncher",
+                   "launch_claude", "claude-persistent", "claude-code-container:full",
+                   "CLAUDE_LAUNCHER_HOME", features=("single-flight", "unpause"),
+                   cli=("claude", "claude",
+                        "/usr/local/lib/node_modules/@anthropic-ai/claude-code/package.json",
+                        "/var/cache/node-compile/claude-code-")),
+    "gemini": Tool("gemini", REPO_DIR / "gemini-cli-starter" / "gemini.py", "GeminiLauncher",
+                   "launch_gemini", "gemini-persistent", "gemini-cli-container:full",
+                   "GEMINI_LAUNCHER_HOME", features=("single-flight",),
+                   cli=("gemini", "root", "/usr/lib/node_modules/@google/gemini-cli/package.json",
+                        "/var/cache/node-compile/gemini-cli-")),
+}
+
+
+class FakeDockerEnv:
+    """Temporary PATH entry with fake docker executables and their state file."""
+
+    def __init__(self):
+        self.root = Path(tempfile.mkdtemp(prefix="launcher-bench-"))
+        self.bin_dir = self.root / "bin"
+        self.bin_dir.mkdir()
+        self.state_file = self.root / "docker-state.json"
+
+        fake = BENCH_DIR / "fake_docker.py"
+        # docker-compose is the same fake with an implicit "compose" subcommand
+        for name, prefix in (("docker", ""), ("docker-compose", "compose ")):
+            if sys.platform == "win32":
+                (self.bin_dir / f"{name}.bat").write_text(
+                    f'@"{sys.executable}" "{fake}" {prefix}%*\n', encoding='utf-8'
+                )
+            else:
+                target = self.bin_dir / name
+                target.write_text(
+                    f'#!/bin/sh\nexec "{sys.executable}" "{fake}" {prefix}"$@"\n', encoding='utf-8'
+                )
+                target.chmod(0o755)
+
+        self.saved_env = dict(os.environ)
+        os.environ["PATH"] = f"{self.bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+        os.environ["FAKE_DOCKER_STATE"] = str(self.state_file)
+        os.environ.pop("DOCKER_HOST", None)
+
+    def reset(self, tool: Tool, scenario: Scenario, delays: Dict[str, float]) -> None:
+        """Write the scenario's initial daemon state."""
+        containers = {}
+        if scenario.container_state is not None:
+            containers[tool.container] = {
+                "id": f"{tool.container}-id",
+                "state": scenario.container_state,
+                "started_at": time.time() - 3600,
+                "image": tool.image,
+            }
+        state = {
+            "images": [tool.image],
+            "containers": containers,
+            "compose_container": tool.container,
+            "delays": {**delays, **scenario.delays},
+            "ready_after": scenario.ready_after,
+        }
+        self.state_file.write_text(json.dumps(state), encoding='utf-8')
+
+    def close(self) -> None:
+        """Restore the environment and remove the temp dir."""
+        os.environ.clear()
+        os.environ.update(self.saved_env)
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def load_tool_module(tool: Tool, state_dir: Path):
+    """Import claude.py / gemini.py fresh, pointed at a private state dir."""
+    os.environ[tool.state_env] = str(state_dir)
+    spec = importlib.util.spec_from_file_location(f"bench_{tool.name}", tool.script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class PhaseTimer:
+    """Wraps launcher methods to record how long each phase takes."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self._restore: List[Callable[[], None]] = []
+
+    def wrap(self, owner, attr: str, phase: str, when: Optional[Callable] = None) -> None:
+        original = getattr(owner, attr)
+        is_class = isinstance(owner, type)
+        saved = vars(owner).get(attr)
+
+        def timed(*args, **kwargs):
+            if when is not None and not when(*args, **kwargs):
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.phases[phase] = self.phases.get(phase, 0.0) + time.perf_counter() - start
+
+        # On a class, keep the wrapper from being bound to instances
+        setattr(owner, attr, staticmethod(timed) if is_class else timed)
+        if saved is None:
+            self._restore.append(lambda: delattr(owner, attr))
+        else:
+            self._restore.append(lambda: setattr(owner, attr, saved))
+
+    def restore(self) -> None:
+        for undo in reversed(self._restore):
+            undo()
+        self._restore.clear()
+
+
+def run_once(module, tool: Tool, scenario: Scenario) -> Dict[str, float]:
+    """Run one launch and return seconds per phase plus the total."""
+    manager = module.DockerManager
+    manager._api = None
+    manager._api_resolved = False
+
+    timer = PhaseTimer()
+    launcher = getattr(module, tool.launcher_class)(debug=False)
+    timer.wrap(launcher, "ensure_prerequisites", "probes")
+    timer.wrap(manager, "start_container", "start")
+    timer.wrap(module.subprocess, "run", "exec",
+               when=lambda cmd, *a, **kw: isinstance(cmd, list) and cmd[:2] == ["docker", "exec"] and "-it" in cmd)
+
+    start = time.perf_counter()
+    try:
+        launch = getattr(launcher, tool.launch_method)
+        cache = getattr(module, "LaunchStateCache", None)
+        if scenario.warm_cache and cache is not None and launcher.load_cached_state():
+            launch([], container_ready=True)
+        else:
+            launcher.ensure_prerequisites()
+            launch([])
+    except SystemExit:
+        raise RuntimeError(f"{tool.name} launch failed in scenario '{scenario.name}'")
+    finally:
+        total = time.perf_counter() - start
+        timer.restore()
+
+    phases = dict(timer.phases)
+    phases["total"] = total
+    return phases
+
+
+def run_concurrent(env: FakeDockerEnv, tool: Tool, scenario: Scenario,
+                   state_dir: Path) -> Dict[str, List[float]]:
+    """Start ``scenario.concurrency`` launcher processes at once.
+
+    They share one state dir, as terminals on one host do. Fails unless
+    every launcher reached its exec and the container was created once.
+    """
+    project = env.root / "project"
+    project.mkdir(exist_ok=True)
+    cmd = [sys.executable, str(tool.script), "--no-daemon", "--no-cache"]
+    child_env = {**os.environ, tool.state_env: str(state_dir)}
+    # Decline set-up prompts (gemini's API key), as run_once does
+    answers = env.root / "answers"
+    answers.write_text("n\n" * 4, encoding='utf-8')
+
+    start = time.perf_counter()
+    procs = []
+    for _ in range(scenario.concurrency):
+        with open(answers, encoding='utf-8') as stdin:
+            procs.append((subprocess.Popen(cmd, cwd=project, env=child_env, stdin=stdin,
+                                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True),
+                          time.perf_counter()))
+    latencies = []
+    failures = []
+    for proc, started in procs:
+        _, stderr = proc.communicate()
+        latencies.append(time.perf_counter() - started)
+        if proc.returncode != 0:
+            failures.append(stderr.strip().splitlines()[-1:] or [f"exit {proc.returncode}"])
+    wall = time.perf_counter() - start
+
+    log = json.loads(env.state_file.read_text(encoding='utf-8')).get("log", [])
+    creates = sum(1 for entry in log if entry.startswith("compose-up "))
+    conflicts = sum(1 for entry in log if entry.startswith("compose-up-conflict "))
+    if failures or creates != 1:
+        raise RuntimeError(
+            f"{tool.name} stress: {len(failures)}/{scenario.concurrency} launchers failed, "
+            f"{creates} creates, {conflicts} conflicts; first error: {failures[0][0] if failures else '-'}"
+        )
+    # Latency is measured per launcher until its own process exited
+    return {"total": latencies, "wall": [wall]}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Percentile with linear interpolation between closest ranks."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean in milliseconds."""
+    return {
+        "n": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+def benchmark(tools: List[str], scenarios: List[str], iterations: int,
+              delays: Dict[str, float]) -> Dict[str, Dict[str, Dict[str, dict]]]:
+    """Run every tool x scenario combination."""
+    env = FakeDockerEnv()
+    os.environ["CLAUDE_DOCKER_BACKEND"] = "cli"
+    os.environ["GEMINI_DOCKER_BACKEND"] = "cli"
+    # Auto-pause is off by default; keep it off whatever the caller exported
+    os.environ["CLAUDE_IDLE_PAUSE"] = "0"
+    real_input = builtins.input
+    # Never block on the launchers' interactive prompts
+    builtins.input = lambda prompt="": "n"
+
+    results: Dict[str, Dict[str, Dict[str, dict]]] = {}
+    try:
+        for tool_name in tools:
+            tool = TOOLS[tool_name]
+            state_dir = env.root / f"{tool.name}-state"
+            module = load_tool_module(tool, state_dir)
+            # After the import, which configures logging itself
+            logging.getLogger().setLevel(logging.ERROR)
+            results[tool.name] = {}
+
+            for scenario_name in scenarios:
+                scenario = SCENARIOS[scenario_name]
+                samples: Dict[str, List[float]] = {}
+                if scenario.needs and scenario.needs not in tool.features:
+                    print(f"  {tool.name:<7} {scenario.name:<11} skipped (no {scenario.needs} support)",
+                          file=sys.stderr)
+                    continue
+                if scenario.concurrency > 1:
+                    for _ in range(min(iterations, STRESS_ITERATIONS)):
+                        env.reset(tool, scenario, delays)
+                        shutil.rmtree(state_dir, ignore_errors=True)
+                        for phase, values in run_concurrent(env, tool, scenario, state_dir).items():
+                            samples.setdefault(phase, []).extend(values)
+                else:
+                    for i in range(iterations + 1):
+                        env.reset(tool, scenario, delays)
+                        if not scenario.warm_cache or i == 0:
+                            shutil.rmtree(state_dir, ignore_errors=True)
+                        phases = run_once(module, tool, scenario)
+                        if i == 0:
+                            continue  # warm-up (also primes the cache scenario)
+                        for phase, seconds in phases.items():
+                            samples.setdefault(phase, []).append(seconds)
+
+                results[tool.name][scenario.name] = {
+                    phase: summarize(values) for phase, values in samples.items()
+                }
+                print(f"  {tool.name:<7} {scenario.name:<11} "
+                      f"p50 {results[tool.name][scenario.name]['total']['p50_ms']:>9.1f} ms",
+                      file=sys.stderr)
+    finally:
+        builtins.input = real_input
+        env.close()
+
+    return results
+
+
+def cli_startup(tools: List[str], iterations: int) -> Dict[str, Dict[str, Dict[str, dict]]]:
+    """Time ``<cli> --version`` in the running containers, compile cache off and on.
+
+    The "exec" phase is a bare ``docker exec`` for reference; "no-cache" and
+    "cached" include it.
+    """
+    results: Dict[str, Dict[str, Dict[str, dict]]] = {}
+    for tool_name in tools:
+        tool = TOOLS[tool_name]
+        command, user, package, cache_prefix = tool.cli
+        try:
+            probe = subprocess.run(
+                ["docker", "exec", "-u", user, tool.container, "node", "-p", f"require('{package}').version"],
+                capture_output=True, text=True, check=False
+            )
+        except OSError:
+            sys.exit("--cli-startup needs a real docker CLI on PATH")
+        if probe.returncode != 0:
+            print(f"  {tool.name:<7} cli-startup skipped ({tool.container} not running "
+                  f"or {command} not installed)", file=sys.stderr)
+            continue
+        cache_dir = cache_prefix + probe.stdout.strip()
+
+        variants = {
+            "exec": [tool.container, "true"],
+            "no-cache": ["-e", "NODE_DISABLE_COMPILE_CACHE=1", tool.container, command, "--version"],
+            "cached": ["-e", f"NODE_COMPILE_CACHE={cache_dir}", tool.container, command, "--version"],
+        }
+        samples: Dict[str, List[float]] = {}
+        # Interleaved so drift in the host's load hits every variant alike;
+        # the first round is a warm-up (and fills a missing cache)
+        for i in range(iterations + 1):
+            for phase, args in variants.items():
+                started = time.perf_counter()
+                subprocess.run(["docker", "exec", "-u", user] + args,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+                if i:
+                    samples.setdefault(phase, []).append(time.perf_counter() - started)
+
+        results[tool.name] = {"cli-startup": {phase: summarize(values) for phase, values in samples.items()}}
+        phases = results[tool.name]["cli-startup"]
+        print(f"  {tool.name:<7} cli-startup p50 {phases['no-cache']['p50_ms']:>9.1f} ms uncached, "
+              f"{phases['cached']['p50_ms']:.1f} ms cached", file=sys.stderr)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Current commit of the repository, if available."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR, capture_output=True, text=True, check=False
+        )
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_table(report: dict) -> None:
+    """Human-readable per-phase table, on stderr so stdout stays JSON."""
+    out = sys.stderr
+    for tool, scenarios in report["results"].items():
+        print(f"\n{tool}", file=out)
+        print(f"  {'scenario':<11} {'phase':<8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}", file=out)
+        for scenario, phases in scenarios.items():
+            for phase in ("probes", "start", "exec", "no-cache", "cached", "total", "wall"):
+                if phase in phases:
+                    stats = phases[phase]
+                    print(f"  {scenario:<11} {phase:<8} {stats['p50_ms']:>9.1f} "
+                          f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}", file=out)
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Show p50/p95 total changes between two JSON reports."""
+    before = json.loads(Path(before_path).read_text(encoding='utf-8'))
+    after = json.loads(Path(after_path).read_text(encoding='utf-8'))
+    print(f"{before['meta'].get('revision')} -> {after['meta'].get('revision')}")
+    print(f"  {'tool':<7} {'scenario':<11} {'phase':<8} {'p50 before':>11} {'p50 after':>10} {'change':>8}")
+    for tool, scenarios in after["results"].items():
+        for scenario, phases in scenarios.items():
+            for phase, stats in phases.items():
+                old = before["results"].get(tool, {}).get(scenario, {}).get(phase)
+                if not old:
+                    continue
+                change = (stats["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+                print(f"  {tool:<7} {scenario:<11} {phase:<8} {old['p50_ms']:>11.1f} "
+                      f"{stats['p50_ms']:>10.1f} {change:>+7.1f}%")
+
+
+def main() -> None:
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Launch-latency benchmark for claude.py / gemini.py")
+    parser.add_argument("--tool", action="append", choices=sorted(TOOLS), help="launcher to run (default: all)")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="scenario to run (default: all)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--delay", action="append", default=[], metavar="CMD=SECONDS",
+                        help="override a fake docker command latency, e.g. compose-up=0.5")
+    parser.add_argument("--concurrency", type=int, metavar="N",
+                        help="launchers started at once in the stress scenario (default: 4 per core, "
+                             "at most 20; above that the 2s Docker probes may time out)")
+    parser.add_argument("--cli-startup", action="store_true",
+                        help="time the agent CLI start-up in the real running containers "
+                             "with and without its compile cache")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two JSON reports")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.concurrency:
+        SCENARIOS["stress"].concurrency = args.concurrency
+
+    delays = dict(DEFAULT_DELAYS)
+    for override in args.delay:
+        command, seconds = override.split("=", 1)
+        delays[command] = float(seconds)
+
+    tools = args.tool or list(TOOLS)
+    scenarios = args.scenario or list(SCENARIOS)
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "concurrency": SCENARIOS["stress"].concurrency,
+            "delays": delays,
+        },
+        "results": (cli_startup(tools, args.iterations) if args.cli_startup
+                    else benchmark(tools, scenarios, args.iterations, delays)),
+    }
+
+    print_table(report)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding='utf-8')
+        print(f"\nReport written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
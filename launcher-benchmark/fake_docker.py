@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Scriptable stand-in for the docker / docker-compose executables.
+
+Installed on PATH by bench.py as ``docker`` and ``docker-compose`` (the
+latter as ``fake_docker.py compose ...``). All state
+lives in the JSON file named by FAKE_DOCKER_STATE, so several launcher
+processes see (and race on) the same fake daemon:
+
+    {
+      "images": ["claude-code-container:full"],
+      "containers": {"claude-persistent": {"id": "...", "state": "exited"}},
+      "delays": {"version": 0.02, "compose-up": 1.5, ...},
+      "ready_after": 0.0
+    }
+
+``delays`` maps a command key (version, images, inspect, start, exec,
+compose-up, events, ...) to extra seconds of latency. ``ready_after`` is how
+long a started container keeps failing its healthcheck probe.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows - no cross-process locking, fine for single runs
+    fcntl = None
+
+STATE_ENV = "FAKE_DOCKER_STATE"
+
+# docker exec exits with 1 when the daemon rejects it, like a failing session
+EXIT_DAEMON_ERROR = 1
+
+
+def fake_id(name: str) -> str:
+    """Stable 64-hex-digit ID for a name."""
+    return hashlib.sha256(name.encode('utf-8')).hexdigest()
+
+
+class FakeDaemon:
+    """Reads and updates the shared fake daemon state under a file lock."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock_file = None
+        self.state = {}
+
+    def __enter__(self) -> "FakeDaemon":
+        self._lock_file = open(self.path + ".lock", "a+")
+        if fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.state = json.load(f)
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f)
+            os.replace(tmp, self.path)
+        if fcntl is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+
+    def container(self, ref: str) -> Optional[dict]:
+        """Look a container up by name or ID."""
+        for name, info in self.state.get("containers", {}).items():
+            if ref in (name, info.get("id")):
+                info.setdefault("name", name)
+                return info
+        return None
+
+    def log(self, entry: str) -> None:
+        """Append to the command log (used by the stress test)."""
+        self.state.setdefault("log", []).append(entry)
+
+
+def read_state() -> dict:
+    """Read the state without taking the lock (for polling)."""
+    with open(os.environ[STATE_ENV], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def delay(key: str) -> None:
+    """Sleep for the configured latency of a command."""
+    seconds = read_state().get("delays", {}).get(key, 0.0)
+    if seconds:
+        time.sleep(seconds)
+
+
+def is_ready(info: dict, ready_after: float) -> bool:
+    """Whether a container's healthcheck would pass right now."""
+    return info.get("state") == "running" and time.time() >= info.get("started_at", 0) + ready_after
+
+
+def option_values(args: List[str], flag: str) -> List[str]:
+    """Collect every value given for a repeated option."""
+    return [args[i + 1] for i, arg in enumerate(args[:-1]) if arg == flag]
+
+
+def cmd_version(args: List[str]) -> int:
+    delay("version")
+    print("Client: fake\nServer: fake")
+    return 0
+
+
+def cmd_images(args: List[str]) -> int:
+    delay("images")
+    refs = [a for a in args if not a.startswith("-")]
+    images = read_state().get("images", [])
+    for image in images:
+        if not refs or image in refs:
+            print(fake_id(image)[:12])
+    return 0
+
+
+def cmd_inspect(args: List[str], kind: Optional[str] = None) -> int:
+    delay("inspect")
+    fmt = (option_values(args, "-f") + option_values(args, "--format") or ["{{json .}}"])[0]
+    refs = [a for i, a in enumerate(args)
+            if not a.startswith("-") and (i == 0 or args[i - 1] not in ("-f", "--format"))]
+    state = read_state()
+    ref = refs[0] if refs else ""
+
+    if kind in (None, "image") and ref in state.get("images", []):
+        print(f"sha256:{fake_id(ref)}" if "{{.Id}}" in fmt else json.dumps({"Id": f"sha256:{fake_id(ref)}"}))
+        return 0
+
+    if kind in (None, "container"):
+        for name, info in state.get("containers", {}).items():
+            if ref in (name, info.get("id")):
+                running = info.get("state") in ("running", "paused")
+                paused = info.get("state") == "paused"
+                if "{{.Id}}" in fmt and "Paused" in fmt:
+                    print(f"{info['id']} {'true' if running else 'false'} {'true' if paused else 'false'}")
+                elif "{{.Id}}" in fmt and "Running" in fmt:
+                    print(f"{info['id']} {'true' if running else 'false'}")
+                elif "{{.Id}}" in fmt:
+                    print(info["id"])
+                elif "{{.Image}}" in fmt:
+                    image = info.get("image") or (state.get("images") or [""])[0]
+                    print(f"sha256:{fake_id(image)}")
+                elif "Running" in fmt:
+                    print("true" if running else "false")
+                else:
+                    print(json.dumps({"Id": info["id"], "State": {"Running": running, "Paused": paused}}))
+                return 0
+
+    print(f"Error: No such object: {ref}", file=sys.stderr)
+    return 1
+
+
+def cmd_ps(args: List[str]) -> int:
+    delay("ps")
+    names = [f.split("=", 1)[1] for f in option_values(args, "--filter") if f.startswith("name=")]
+    fmt = (option_values(args, "--format") or ["{{.ID}}\t{{.Names}}\t{{.State}}"])[0]
+    for name, info in read_state().get("containers", {}).items():
+        if not names or any(n in name for n in names):
+            state = info.get("state", "exited")
+            line = fmt.replace("{{.ID}}", info["id"]).replace("{{.Names}}", name).replace("{{.State}}", state)
+            print(line.replace("\\t", "\t"))
+    return 0
+
+
+def cmd_start(args: List[str]) -> int:
+    delay("start")
+    refs = [a for a in args if not a.startswith("-")]
+    with FakeDaemon(os.environ[STATE_ENV]) as daemon:
+        info = daemon.container(refs[0]) if refs else None
+        if info is None:
+            print(f"Error response from daemon: No such container: {refs}", file=sys.stderr)
+            return 1
+        daemon.log(f"start {info['name']}")
+        if info.get("state") != "running":
+            info["state"] = "running"
+            info["started_at"] = time.time()
+    return 0
+
+
+def cmd_pause(args: List[str], paused: bool) -> int:
+    delay("pause" if paused else "unpause")
+    refs = [a for a in args if not a.startswith("-")]
+    with FakeDaemon(os.environ[STATE_ENV]) as daemon:
+        info = daemon.container(refs[0]) if refs else None
+        if info is None:
+            print(f"Error response from daemon: No such container: {refs}", file=sys.stderr)
+            return 1
+        if info.get("state") != ("running" if paused else "paused"):
+            print(f"Error response from daemon: Container {refs[0]} is not "
+                  f"{'running' if paused else 'paused'}", file=sys.stderr)
+            return 1
+        daemon.log(f"{'pause' if paused else 'unpause'} {info['name']}")
+        info["state"] = "paused" if paused else "running"
+    return 0
+
+
+def cmd_exec(args: List[str]) -> int:
+    # Skip exec options to find the container reference
+    i = 0
+    while i < len(args) and args[i].startswith("-"):
+        i += 2 if args[i] in ("-e", "--env", "-u", "--user", "-w", "--workdir") else 1
+    ref, command = args[i], args[i + 1:]
+
+    state = read_state()
+    info = None
+    for name, candidate in state.get("containers", {}).items():
+        if ref in (name, candidate.get("id")):
+            info = candidate
+    if info is None or info.get("state") != "running":
+        print(f"Error response from daemon: container {ref} is not running", file=sys.stderr)
+        return EXIT_DAEMON_ERROR
+
+    if command[:1] == ["test"] or command[:1] == ["which"]:
+        # Readiness probe
+        return 0 if is_ready(info, state.get("ready_after", 0.0)) else 1
+
+    delay("exec")
+    return 0
+
+
+def cmd_events(args: List[str]) -> int:
+    """Stream start events for the filtered containers until killed."""
+    names = [f.split("=", 1)[1] for f in option_values(args, "--filter") if f.startswith("container=")]
+    last_start = {name: info.get("started_at") for name, info in read_state().get("containers", {}).items()}
+    deadline = time.time() + 600
+    while time.time() < deadline:
+        for name, info in read_state().get("containers", {}).items():
+            if names and name not in names:
+                continue
+            started = info.get("started_at")
+            if info.get("state") == "running" and started != last_start.get(name):
+                print(json.dumps({"Type": "container", "Action": "start", "status": "start",
+                                  "Actor": {"Attributes": {"name": name}}}), flush=True)
+                last_start[name] = started
+        time.sleep(0.01)
+    return 0
+
+
+def cmd_compose(args: List[str]) -> int:
+    """docker-compose / docker compose: only `up -d` is modelled."""
+    if "up" not in args:
+        return 0
+
+    # Like the real compose, decide to create before doing the slow part, so
+    # concurrent `up`s that all saw no container race on the name
+    state = read_state()
+    name = os.environ.get("CLAUDE_CONTAINER_NAME") or state.get("compose_container", "claude-persistent")
+    existed = name in state.get("containers", {})
+    delay("compose-up")
+    with FakeDaemon(os.environ[STATE_ENV]) as daemon:
+        containers = daemon.state.setdefault("containers", {})
+        info = containers.get(name)
+        if info is not None and not existed:
+            daemon.log(f"compose-up-conflict {name}")
+            print(f'Error response from daemon: Conflict. The container name "/{name}" '
+                  f'is already in use by container "{info["id"]}".', file=sys.stderr)
+            return 1
+        daemon.log(f"compose-up {name}")
+        if info is None:
+            containers[name] = {"id": fake_id(f"{name}:{time.time()}"), "state": "running",
+                                "started_at": time.time(),
+                                "image": (daemon.state.get("images") or [""])[0],
+                                "target": os.environ.get("DOCKER_TARGET", "")}
+        elif info.get("state") != "running":
+            info["state"] = "running"
+            info["started_at"] = time.time()
+    return 0
+
+
+def main() -> int:
+    """Main entry point."""
+    args = sys.argv[1:]
+    if not args:
+        return 0
+
+    command, rest = args[0], args[1:]
+    if command == "compose":
+        return cmd_compose(rest)
+    if command in ("image", "container") and rest[:1] == ["inspect"]:
+        return cmd_inspect(rest[1:], kind=command)
+
+    handlers = {
+        "version": cmd_version,
+        "images": cmd_images,
+        "ps": cmd_ps,
+        "inspect": cmd_inspect,
+        "start": cmd_start,
+        "pause": lambda rest: cmd_pause(rest, True),
+        "unpause": lambda rest: cmd_pause(rest, False),
+        "exec": cmd_exec,
+        "events": cmd_events,
+    }
+    handler = handlers.get(command)
+    if handler is None:
+        print(f"fake docker: unsupported command: {command}", file=sys.stderr)
+        return 1
+    return handler(rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())